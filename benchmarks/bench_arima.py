@@ -0,0 +1,108 @@
+# benchmarks/bench_arima.py
+"""
+ARIMA(5,1,0) z dryfem: szybka ścieżka CLS (OLS na opóźnionych różnicach) vs innovations_mle
+(zimny start i ciepły start: parametry z poprzedniej świeczki + sam filtr stanu).
+--check: zgodność prognoz CLS z MLE w granicach PARITY_RTOL (kilka serii syntetycznych) oraz ciepłego startu
+MLE bez zaglądania w przyszłość (wycinek historii po dopasowaniu na pełnej serii), kod wyjścia 1 przy błędzie.
+
+    python -m benchmarks.bench_arima --length 5000 --horizon 30
+    python -m benchmarks.bench_arima --check
+"""
+import argparse
+import importlib
+import sys
+import time
+import warnings
+
+import numpy as np
+
+from benchmarks.fixtures import synthetic_ohlc
+
+arima = importlib.import_module("methods.arima")
+
+PARITY_RTOL = 1e-3  # względna różnica ceny prognozy CLS vs MLE
+
+
+def _best_of(fn, repeat: int):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def check_parity(length: int, horizon: int, seeds=(1, 2, 3, 4, 5)) -> bool:
+    ok = True
+    print(f"\n{'seria':<8}{'max błąd wzgl.':>16}")
+    for seed in seeds:
+        series = synthetic_ohlc(length, seed=seed)["close"]
+        mle = arima.forecast_arima(series, horizon, fit="mle").values
+        cls = arima.forecast_arima(series, horizon, fit="cls").values
+        rel = np.max(np.abs(cls - mle) / mle)
+        passed = rel < PARITY_RTOL
+        ok &= passed
+        print(f"{seed:<8}{rel:>16.2e}  {'OK' if passed else 'BŁĄD'}")
+    return ok
+
+
+def check_warm_start(length: int, horizon: int, cut: float = 0.6) -> bool:
+    """Prognoza MLE na wycinku historii nie może zależeć od wcześniejszego dopasowania na pełnej serii."""
+    series = synthetic_ohlc(length)["close"]
+    series.attrs.update(symbol="PARITY/USD", interval="1day")
+    head = series.iloc[:int(length * cut)]
+    arima._warm_params.clear()
+    before = arima.forecast_arima(head, horizon, fit="mle").values
+    arima.forecast_arima(series, horizon, fit="mle")
+    after = arima.forecast_arima(head, horizon, fit="mle").values
+    rel = np.max(np.abs(after - before) / before)
+    passed = rel < 1e-9
+    print(f"\n[BENCH] Ciepły start: wycinek {len(head)} po pełnej serii {length} - różnica {rel:.2e}  "
+          f"{'OK' if passed else 'BŁĄD (parametry z przyszłych świeczek)'}")
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--length", type=int, default=5000)
+    parser.add_argument("--horizon", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--check", action="store_true")
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")
+
+    if args.check:
+        ok = check_parity(args.length, args.horizon)
+        ok &= check_warm_start(args.length, args.horizon)
+        sys.exit(0 if ok else 1)
+
+    series = synthetic_ohlc(args.length)["close"]
+    log_values = np.log(series.values)
+
+    _, t_cls = _best_of(lambda: arima._fit_cls(log_values), args.repeat * 10)
+    cold, t_mle = _best_of(lambda: arima._fit_model(log_values), args.repeat)
+
+    # Ciepły start: dopasowanie na serii o świeczkę krótszej, potem nowa świeczka
+    key = ("BENCH", "1day")
+    arima._warm_params.clear()
+    arima._fit_warm(log_values[:-1], series.index[:-1], key)
+    warm, t_warm = _best_of(lambda: arima._fit_warm(log_values, series.index, key), args.repeat)
+    drift = np.max(np.abs(np.exp(warm.forecast(args.horizon)) / np.exp(cold.forecast(args.horizon)) - 1))
+
+    print(f"\n[BENCH] Dopasowanie ARIMA(5,1,0) na {args.length} punktach")
+    print(f"[BENCH] MLE zimny start: {t_mle * 1000:8.1f} ms")
+    print(f"[BENCH] MLE ciepły start: {t_warm * 1000:8.1f} ms  ({t_mle / t_warm:.1f}x, "
+          f"różnica prognozy vs pełne dopasowanie {drift:.1e})")
+    print(f"[BENCH] CLS (lstsq):     {t_cls * 1000:8.2f} ms  ({t_mle / t_cls:.0f}x)")
+
+    # Cała metoda z backtestem (pewność) - jak w /predict
+    from core.backtester import calculate_confidence
+    for fit in ("mle", "cls"):
+        _, t = _best_of(lambda: calculate_confidence(
+            lambda s, horizon: arima.forecast_arima(s, horizon, fit=fit), series, args.horizon,
+            walk_forward=lambda s, horizon, origins: arima.walk_forward_arima(s, horizon, origins, fit=fit)), 1)
+        print(f"[BENCH] pewność (20 okien backtestu), {fit}: {t:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# benchmarks/bench_backtest.py
+"""
+Ewaluacja walk-forward (/backtest) na --windows oknach: pełne dopasowania vs walk-forward (jedno dopasowanie
+na fragment), w bieżącym procesie vs w puli --workers procesów.
+
+    python -m benchmarks.bench_backtest --length 5000 --windows 500 --workers 4 --methods monte_carlo arima
+"""
+import argparse
+import os
+import time
+
+from core.backtester import walk_forward_origins
+from core.executor import ForecastExecutor
+from core.registry import MethodRegistry
+from benchmarks.fixtures import synthetic_ohlc
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run(executor: ForecastExecutor, method, series, horizon: int, origins: list, mode: str) -> tuple:
+    start = time.perf_counter()
+    outcome = executor.run_backtest(method, series, horizon, origins, mode=mode)
+    return outcome, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--length", type=int, default=5000)
+    parser.add_argument("--windows", type=int, default=500)
+    parser.add_argument("--stride", type=int, default=1)
+    parser.add_argument("--horizon", type=int, default=7)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--methods", nargs="*", default=None)
+    args = parser.parse_args()
+
+    registry = MethodRegistry(os.path.join(BASE_DIR, "methods"))
+    registry.load_methods()
+    series = synthetic_ohlc(args.length, regime_length=500)["close"]
+    origins = walk_forward_origins(len(series), args.horizon, args.windows, args.stride)
+
+    inline = ForecastExecutor(max_workers=1)
+    pool = ForecastExecutor(max_workers=args.workers) if args.workers > 1 else None
+    if pool is not None:
+        # Start procesów poza pomiarem (w serwerze pula już działa)
+        first = registry.all_methods()[0]
+        pool.run_backtest(first, series, args.horizon, origins[-1:], mode="refit")
+
+    print(f"\n[BENCH] {len(origins)} okien, horyzont {args.horizon}, {args.length} świeczek, pula {args.workers}")
+    print(f"{'metoda':<20}{'tryb':<14}{'proces [s]':>12}{'pula [s]':>10}{'MAE':>12}{'kierunek %':>12}{'pokrycie %':>12}")
+    for method in registry.all_methods():
+        if args.methods and method.key not in args.methods:
+            continue
+        modes = ["refit"] + (["walk_forward"] if method.walk_forward is not None else [])
+        for mode in modes:
+            outcome, t_inline = _run(inline, method, series, args.horizon, origins, mode)
+            t_pool = _run(pool, method, series, args.horizon, origins, mode)[1] if pool is not None else None
+            if outcome.error:
+                print(f"{method.key:<20}{mode:<14} BŁĄD: {outcome.error}")
+                continue
+            summary = outcome.report["summary"]
+            coverage = f"{summary['coverage']:.1f}" if summary["coverage"] is not None else "-"
+            print(f"{method.key:<20}{mode:<14}{t_inline:>12.2f}{(f'{t_pool:.2f}' if t_pool else '-'):>10}"
+                  f"{summary['mae']:>12.3f}{summary['directional']:>12.1f}{coverage:>12}")
+
+    if pool is not None:
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
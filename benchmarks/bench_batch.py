@@ -0,0 +1,80 @@
+# benchmarks/bench_batch.py
+"""
+Przepustowość prognoz: N symboli pojedynczymi /predict (jak dotąd) vs jedno zadanie /predict/batch.
+Dane z lokalnego fałszywego API (opóźnienie na zapytanie), magazyn świeczek w katalogu tymczasowym.
+
+    python -m benchmarks.bench_batch --symbols 100 --methods monte_carlo arima --latency 0.05
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.fake_twelvedata import start_fake_server
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=100)
+    parser.add_argument("--methods", nargs="+", default=["monte_carlo"])
+    parser.add_argument("--interval", default="1h")
+    parser.add_argument("--horizon", type=int, default=7)
+    parser.add_argument("--latency", type=float, default=0.05, help="opóźnienie fałszywego API [s]")
+    args = parser.parse_args()
+
+    server, state, base_url = start_fake_server(latency=args.latency)
+    os.environ["TWELVE_DATA_BASE_URL"] = base_url
+
+    import main as app_module
+    from fastapi.testclient import TestClient
+
+    symbols = [f"SYM{i:03d}/USD" for i in range(args.symbols)]
+    forecasts = args.symbols * len(args.methods)
+    body = {"method_keys": args.methods, "horizon": args.horizon}
+
+    with tempfile.TemporaryDirectory() as store_dir, TestClient(app_module.app) as client:
+        # Osobne magazyny: oba warianty zaczynają od zimnego pobrania
+        app_module.data_client.store.root_dir = os.path.join(store_dir, "sequential")
+        os.makedirs(app_module.data_client.store.root_dir)
+        before = len(state.requests)
+        start = time.perf_counter()
+        for symbol in symbols:
+            client.post("/predict?format=columnar", json={**body, "ticker": symbol, "interval": args.interval})
+        sequential = time.perf_counter() - start
+        sequential_requests = len(state.requests) - before
+
+        app_module.data_client._cache.clear()
+        app_module.registry.cache.clear()
+        app_module.data_client.store.root_dir = os.path.join(store_dir, "batch")
+        os.makedirs(app_module.data_client.store.root_dir)
+        before = len(state.requests)
+        start = time.perf_counter()
+        job = client.post("/predict/batch", json={**body, "tickers": symbols, "intervals": [args.interval]}).json()
+        first_result = None
+        lines = 0
+        with client.stream("GET", job["results_url"]) as response:
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                lines += 1
+                if first_result is None:
+                    first_result = time.perf_counter() - start
+                    sample = json.loads(line)
+        batch = time.perf_counter() - start
+        batch_requests = len(state.requests) - before
+
+    server.shutdown()
+
+    print(f"\n[BENCH] {args.symbols} symboli x {len(args.methods)} metod ({', '.join(args.methods)}), "
+          f"opóźnienie API {args.latency * 1000:.0f} ms")
+    print(f"[BENCH] /predict po kolei: {sequential:.2f}s | {forecasts / sequential:.1f} prognoz/s | "
+          f"zapytań do API: {sequential_requests}")
+    print(f"[BENCH] /predict/batch:    {batch:.2f}s | {forecasts / batch:.1f} prognoz/s | "
+          f"zapytań do API: {batch_requests} | pierwszy wynik po {first_result:.2f}s | linii NDJSON: {lines}")
+    print(f"[BENCH] przyspieszenie {sequential / batch:.1f}x | przykład: {sample['ticker']} "
+          f"{[p['method_name'] for p in sample.get('predictions', [])]}")
+
+
+if __name__ == "__main__":
+    main()
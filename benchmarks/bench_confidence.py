@@ -0,0 +1,54 @@
+# benchmarks/bench_confidence.py
+"""
+Czas calculate_confidence per metoda: pełne dopasowania vs backtest przyrostowy (walk_forward).
+
+Uruchomienie (z katalogu projektu):
+    python -m benchmarks.bench_confidence --length 5000 --horizon 7
+"""
+import argparse
+import os
+import time
+
+from core.backtester import calculate_confidence
+from core.registry import MethodRegistry
+from benchmarks.fixtures import synthetic_ohlc
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--length", type=int, default=5000)
+    parser.add_argument("--horizon", type=int, default=7)
+    parser.add_argument("--methods", nargs="*", default=None)
+    args = parser.parse_args()
+
+    registry = MethodRegistry(os.path.join(BASE_DIR, "methods"))
+    registry.load_methods()
+
+    series = synthetic_ohlc(args.length)["close"]
+
+    print(f"\n{'metoda':<22}{'pełne [s]':>12}{'przyrostowe [s]':>18}{'przysp.':>10}{'pewność':>16}")
+    for method in registry.all_methods():
+        if args.methods and method.key not in args.methods:
+            continue
+
+        score_full, t_full = _timed(lambda: calculate_confidence(method.func, series, args.horizon))
+        if method.walk_forward is None:
+            print(f"{method.key:<22}{t_full:>12.3f}{'-':>18}{'-':>10}{score_full:>16}")
+            continue
+
+        score_inc, t_inc = _timed(lambda: calculate_confidence(method.func, series, args.horizon,
+                                                               walk_forward=method.walk_forward))
+        print(f"{method.key:<22}{t_full:>12.3f}{t_inc:>18.3f}{t_full / t_inc:>9.1f}x"
+              f"{f'{score_full} / {score_inc}':>16}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# benchmarks/bench_data_client.py
+"""
+DataClient na lokalnym fałszywym API: zimny start, odczyt z dysku, dociąganie ogona,
+single-flight dla równoczesnych zapytań i pobieranie wielu symboli jednym zapytaniem.
+Kod wyjścia 1, gdy ogon nie zgadza się z pełnym pobraniem, single-flight zdublował zapytanie,
+czekający zawisł po anulowaniu prowadzącego pobranie albo fetch_many nie zmieścił się w jednym zapytaniu.
+--no-httpx: ścieżka asynchroniczna bez httpx (sesja requests w wątku).
+
+    python -m benchmarks.bench_data_client
+    python -m benchmarks.bench_data_client --no-httpx
+"""
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+
+from core import data_client
+from core.data_client import DataClient
+from benchmarks.fake_twelvedata import start_fake_server
+
+failures = []
+
+
+def check(passed: bool, label: str):
+    if not passed:
+        failures.append(label)
+    print(f"[BENCH]   {label}: {'OK' if passed else 'BŁĄD'}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--no-httpx", action="store_true", help="async bez httpx (jak bez zainstalowanej biblioteki)")
+    args = parser.parse_args()
+    if args.no_httpx:
+        data_client.httpx = None
+
+    server, state, base_url = start_fake_server()
+    DataClient.BASE_URL = base_url
+
+    with tempfile.TemporaryDirectory() as store_dir:
+        client = DataClient(store_dir=store_dir)
+
+        start = time.perf_counter()
+        df = client.fetch_series("BTC/USD", interval="1min", outputsize=5000)
+        print(f"[BENCH] Zimny start (pełne pobranie): {len(df)} świeczek, {time.perf_counter() - start:.3f}s")
+
+        # Restart procesu: nowy klient, pusty cache w pamięci, ta sama historia na dysku
+        restarted = DataClient(store_dir=store_dir)
+        start = time.perf_counter()
+        df = restarted.fetch_series("BTC/USD", interval="1min", outputsize=5000)
+        print(f"[BENCH] Po restarcie (odczyt z dysku): {len(df)} świeczek, {time.perf_counter() - start:.4f}s")
+
+        # Wygasłe dane: dociągamy tylko ogon od ostatniej zapisanej świeczki
+        restarted._cache.clear()
+        restarted.store.touch("BTC/USD", "1min")
+        restarted.CACHE_TTL = 0
+        start = time.perf_counter()
+        df = restarted.fetch_series("BTC/USD", interval="1min", outputsize=5000)
+        start_date = state.requests[-1].get("start_date")
+        print(f"[BENCH] Odświeżenie ogona: {len(df)} świeczek, {time.perf_counter() - start:.3f}s, start_date={start_date}")
+        check(start_date is not None, "odświeżenie pyta tylko o ogon (start_date)")
+        check(df.index.is_unique and df.index.is_monotonic_increasing, "ogon bez duplikatów, rosnące czasy")
+        with tempfile.TemporaryDirectory() as fresh_dir:
+            full = DataClient(store_dir=fresh_dir).fetch_series("BTC/USD", interval="1min", outputsize=5000)
+        # Na wspólnym zakresie (pełne pobranie chwilę później może mieć już nową świeczkę)
+        common = df.index.intersection(full.index)
+        check(len(common) >= len(df) - 1 and df.loc[common].equals(full.loc[common]), "historia + ogon = pełne pobranie")
+
+        print(f"[BENCH] Zapytań do API łącznie: {len(state.requests)}")
+
+    with tempfile.TemporaryDirectory() as store_dir:
+        asyncio.run(_bench_async(DataClient(store_dir=store_dir), state))
+
+    server.shutdown()
+    if failures:
+        print(f"[BENCH] Niespełnione: {', '.join(failures)}")
+        sys.exit(1)
+
+
+async def _bench_async(client: DataClient, state):
+    state.latency = 0.2
+    before = len(state.requests)
+    start = time.perf_counter()
+    frames = await asyncio.gather(*[client.fetch_series_async("ETH/USD", "1h", 5000) for _ in range(50)])
+    print(f"[BENCH] 50 równoczesnych /predict dla ETH/USD 1h: {len(state.requests) - before} zapytanie(a) do API, "
+          f"{time.perf_counter() - start:.3f}s, {len(frames[0])} świeczek")
+    check(len(state.requests) - before == 1, "single-flight: jedno zapytanie")
+    check(all(frame is frames[0] for frame in frames) and len(frames[0]) == 5000, "single-flight: wspólny wynik")
+
+    # Prowadzący pobranie anulowany (rozłączony klient), gdy inni na nie czekają - czekający pobierają sami
+    leader = asyncio.create_task(client.fetch_series_async("BNB/USD", "1h", 5000))
+    await asyncio.sleep(0.05)
+    followers = [asyncio.create_task(client.fetch_series_async("BNB/USD", "1h", 5000)) for _ in range(5)]
+    await asyncio.sleep(0.05)
+    leader.cancel()
+    try:
+        frames = await asyncio.wait_for(asyncio.gather(*followers), timeout=10)
+    except asyncio.TimeoutError:
+        frames = []
+    print(f"[BENCH] Anulowany prowadzący: {len(frames)}/{len(followers)} czekających z wynikiem")
+    check(len(frames) == len(followers) and all(len(frame) == 5000 for frame in frames),
+          "single-flight: anulowanie prowadzącego nie blokuje czekających")
+
+    symbols = ["SOL/USD", "XRP/USD", "ADA/USD", "DOGE/USD", "LTC/USD"]
+    before = len(state.requests)
+    start = time.perf_counter()
+    frames = await client.fetch_many(symbols + ["ETH/USD"], "1h", 5000)
+    print(f"[BENCH] fetch_many({len(symbols)} nowych + 1 w cache): {len(state.requests) - before} zapytanie(a), "
+          f"{time.perf_counter() - start:.3f}s, zwrócono {len(frames)} symboli")
+    check(len(state.requests) - before == 1 and len(frames) == len(symbols) + 1, "fetch_many: jedno zapytanie")
+
+    await client.aclose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# benchmarks/bench_garch.py
+"""
+ARIMA-GARCH: estymator wbudowany (core/garch.py) vs biblioteka arch - czas prognozy, czas backtestu
+(pewność, 20 okien) i zgodność prognozy średniej oraz pasm wariancji.
+--check: zgodność w granicach PARITY_RTOL na kilku seriach, kod wyjścia 1 przy błędzie.
+
+    python -m benchmarks.bench_garch --length 1000 --horizon 7
+"""
+import argparse
+import importlib
+import sys
+import time
+
+import numpy as np
+
+from core.backtester import calculate_confidence
+from core.data_client import INTERVAL_FREQ
+from benchmarks.fixtures import synthetic_ohlc
+
+garch = importlib.import_module("methods.arima_garch")
+
+PARITY_RTOL = 1e-4  # względna różnica cen (prognoza i pasma) numpy vs arch
+
+
+def _series(length: int, seed: int):
+    series = synthetic_ohlc(length, seed=seed, regime_length=300)["close"]
+    series.attrs["freq"] = INTERVAL_FREQ["1h"]  # jak ramka z DataClient
+    return series
+
+
+def _run(backend: str, fn):
+    garch.GARCH_BACKEND = backend
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def _max_rel(a, b) -> float:
+    return float(np.max(np.abs(np.asarray(a) / np.asarray(b) - 1)))
+
+
+def check_parity(length: int, horizon: int, seeds=(1, 2, 3, 4, 5)) -> bool:
+    ok = True
+    print(f"\n{'seria':<8}{'prognoza':>12}{'pasma':>12}")
+    for seed in seeds:
+        series = _series(length, seed)
+        fc_arch, _ = _run("arch", lambda: garch.forecast_arima_garch(series, horizon))
+        fc_np, _ = _run("numpy", lambda: garch.forecast_arima_garch(series, horizon))
+        rel_mean = _max_rel(fc_np.values, fc_arch.values)
+        rel_bands = max(_max_rel(fc_np.attrs["bands"][k], fc_arch.attrs["bands"][k]) for k in fc_arch.attrs["bands"])
+        passed = rel_mean < PARITY_RTOL and rel_bands < PARITY_RTOL
+        ok &= passed
+        print(f"{seed:<8}{rel_mean:>12.2e}{rel_bands:>12.2e}  {'OK' if passed else 'BŁĄD'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--length", type=int, default=1000)
+    parser.add_argument("--horizon", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--check", action="store_true")
+    args = parser.parse_args()
+
+    if not garch.HAS_ARCH:
+        print("[BENCH] Brak biblioteki 'arch' - porównanie niemożliwe")
+        sys.exit(1)
+
+    if args.check:
+        sys.exit(0 if check_parity(args.length, args.horizon) else 1)
+
+    series = _series(args.length, 42)
+    print(f"\n[BENCH] ARIMA-GARCH na {args.length} świeczkach, horyzont {args.horizon}")
+    print(f"{'backend':<10}{'prognoza [ms]':>16}{'pewność [s]':>14}")
+    for backend in ("arch", "numpy"):
+        t_forecast = min(_run(backend, lambda: garch.forecast_arima_garch(series, args.horizon))[1]
+                         for _ in range(args.repeat))
+        _, t_confidence = _run(backend, lambda: calculate_confidence(garch.forecast_arima_garch, series, args.horizon))
+        print(f"{backend:<10}{t_forecast * 1000:>16.1f}{t_confidence:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+# benchmarks/bench_indicators.py
+"""
+Wszystkie zarejestrowane wskaźniki na 5000 świeczkach:
+każdy osobno (jak dawniej, bez współdzielenia) vs jeden wspólny kontekst obliczeń.
+--check porównuje backend numpy z wzorami referencyjnymi (pandas + proste pętle, jak w źródłach pandas_ta,
+bez samej biblioteki) i - gdy jest zainstalowana - z pandas_ta (zgodność numeryczna, kod wyjścia 1 przy różnicy).
+--stream: koszt jednej nowej świeczki w stanach strumieniowych vs przeliczenie całej historii i zgodność
+stanów z backendem (kod wyjścia 1 przy różnicy - tak jak przy INDICATORS_STREAMING=1 w /predict).
+
+    python -m benchmarks.bench_indicators --length 5000 --backend numpy
+    python -m benchmarks.bench_indicators --check
+    python -m benchmarks.bench_indicators --stream
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.indicators_lib import (INDICATORS_REGISTRY, IndicatorContext, calculate_indicator,
+                                 calculate_indicators, resolve_backend)
+from core.indicators_stream import IndicatorStream
+from benchmarks.fixtures import synthetic_ohlc
+
+PARITY_RTOL = 1e-6
+
+
+def _best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def _compare(reference: dict, candidate: dict, names: list, title: str) -> bool:
+    """Te same pozycje NaN i różnica względna poniżej PARITY_RTOL dla każdego wskaźnika."""
+    ok = True
+    print(f"\n[CHECK] {title}")
+    print(f"{'wskaźnik':<18}{'max błąd wzgl.':>16}{'różne NaN':>12}")
+    for name in names:
+        a, b = reference[name].values.astype(float), candidate[name].values.astype(float)
+        nan_mismatch = int((np.isnan(a) != np.isnan(b)).sum())
+        both = ~np.isnan(a) & ~np.isnan(b)
+        rel = np.max(np.abs(a[both] - b[both]) / np.maximum(np.abs(a[both]), 1e-12)) if both.any() else 0.0
+        passed = rel < PARITY_RTOL and nan_mismatch == 0
+        ok &= passed
+        print(f"{name:<18}{rel:>16.2e}{nan_mismatch:>12}  {'OK' if passed else 'BŁĄD'}")
+    return ok
+
+
+def _ref_ema(close: pd.Series, length: int) -> pd.Series:
+    # pandas_ta.ema: pierwsza wartość = SMA z 'length' wartości, dalej ewm(adjust=False)
+    first = close.first_valid_index()
+    values = close.loc[first:].copy()
+    seed = values.iloc[:length].mean()
+    values.iloc[:length - 1] = np.nan
+    values.iloc[length - 1] = seed
+    return values.ewm(span=length, adjust=False).mean().reindex(close.index)
+
+
+def _ref_rma(x: pd.Series, length: int) -> pd.Series:
+    return x.ewm(alpha=1.0 / length, min_periods=length).mean()
+
+
+def _ref_rsi(close: pd.Series, length: int) -> pd.Series:
+    diff = close.diff()
+    positive, negative = diff.clip(lower=0), diff.clip(upper=0)
+    positive[diff.isna()] = negative[diff.isna()] = np.nan
+    up, down = _ref_rma(positive, length), _ref_rma(negative, length)
+    return 100 * up / (up + down.abs())
+
+
+def _ref_supertrend(df, length: int, multiplier: float) -> pd.Series:
+    high, low, close = df["high"], df["low"], df["close"]
+    prev_close = close.shift(1)
+    tr = pd.concat([high - low, (high - prev_close).abs(), (low - prev_close).abs()], axis=1).max(axis=1)
+    tr.iloc[0] = np.nan
+    matr = multiplier * _ref_rma(tr, length)
+    upper, lower = ((high + low) / 2 + matr).tolist(), ((high + low) / 2 - matr).tolist()
+    direction, trend = [1] * len(df), [np.nan] * len(df)
+    for i in range(1, len(df)):
+        if close.iloc[i] > upper[i - 1]:
+            direction[i] = 1
+        elif close.iloc[i] < lower[i - 1]:
+            direction[i] = -1
+        else:
+            direction[i] = direction[i - 1]
+            if direction[i] > 0 and lower[i] < lower[i - 1]:
+                lower[i] = lower[i - 1]
+            if direction[i] < 0 and upper[i] > upper[i - 1]:
+                upper[i] = upper[i - 1]
+        trend[i] = lower[i] if direction[i] > 0 else upper[i]
+    return pd.Series(trend, index=df.index)
+
+
+def _ref_psar(df, af0: float = 0.02, max_af: float = 0.2) -> pd.Series:
+    high, low, close = df["high"], df["low"], df["close"]
+    up, dn = high.iloc[1] - high.iloc[0], low.iloc[0] - low.iloc[1]
+    falling = bool(dn > up and dn > 0)
+    sar, ep, af = close.iloc[0], (low.iloc[0] if falling else high.iloc[0]), af0
+    out = pd.Series(np.nan, index=df.index)
+    for row in range(1, len(df)):
+        high_, low_ = high.iloc[row], low.iloc[row]
+        _sar = sar + af * (ep - sar)
+        if falling:
+            reverse = high_ > _sar
+            if low_ < ep:
+                ep, af = low_, min(af + af0, max_af)
+            _sar = max(high.iloc[row - 1], high.iloc[row - 2], _sar)
+        else:
+            reverse = low_ < _sar
+            if high_ > ep:
+                ep, af = high_, min(af + af0, max_af)
+            _sar = min(low.iloc[row - 1], low.iloc[row - 2], _sar)
+        if reverse:
+            _sar, af, falling = ep, af0, not falling
+            ep = low_ if falling else high_
+        sar = out.iloc[row] = _sar
+    return out
+
+
+def reference_indicators(df) -> dict:
+    """Wzory referencyjne jak w źródłach pandas_ta: rolling/ewm z pandas i proste pętle, bez indicators_numpy."""
+    close = df["close"]
+    sma = {n: close.rolling(n).mean() for n in (20, 50, 200)}
+    ema = {n: _ref_ema(close, n) for n in (12, 26, 50)}
+    macd = ema[12] - ema[26]
+    signal = _ref_ema(macd, 9)
+    return {
+        "SMA 20": sma[20], "SMA 50": sma[50], "SMA 200": sma[200],
+        "EMA 12": ema[12], "EMA 26": ema[26], "EMA 50": ema[50],
+        "Bollinger Bands": sma[20] - 2 * close.rolling(20).std(ddof=0),
+        "SuperTrend": _ref_supertrend(df, 7, 3),
+        "Parabolic SAR": _ref_psar(df),
+        "RSI 14": _ref_rsi(close, 14),
+        "MACD": macd, "MACD_Signal": signal, "MACD_Hist": macd - signal,
+    }
+
+
+def check_parity(df) -> bool:
+    """Backend numpy vs wzory referencyjne i vs pandas_ta (gdy zainstalowana)."""
+    names = list(INDICATORS_REGISTRY)
+    candidate = calculate_indicators(names, df, backend="numpy")
+    reference = reference_indicators(df)
+    missing = [name for name in names if name not in reference]
+    if missing:
+        print(f"[CHECK] Brak wzoru referencyjnego: {missing}")
+        return False
+    ok = _compare(reference, candidate, names, "numpy vs wzory referencyjne")
+
+    if resolve_backend("pandas_ta") != "pandas_ta":
+        print("\n[CHECK] Brak pandas_ta - porównanie z biblioteką pominięte")
+        return ok
+    return _compare(calculate_indicators(names, df, backend="pandas_ta"), candidate, names,
+                    "numpy vs pandas_ta") and ok
+
+
+def bench_stream(df, backend: str, new_candles: int = 200) -> bool:
+    """Ostatnie new_candles świeczek dokładane pojedynczo: stan strumieniowy vs pełne przeliczenie (+ zgodność)."""
+    names = list(INDICATORS_REGISTRY)
+    warm = df.iloc[:-new_candles]
+    stream = IndicatorStream()
+    start = time.perf_counter()
+    stream.sync(warm)
+    warmup = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(len(df) - new_candles, len(df)):
+        stream.sync(df.iloc[i:i + 1])
+    per_candle_stream = (time.perf_counter() - start) / new_candles
+
+    full = _best_of(lambda: calculate_indicators(names, df, backend), 3)
+
+    print(f"\n[BENCH] Strumień: rozgrzewka {len(warm)} świeczek {warmup * 1000:.1f} ms")
+    print(f"[BENCH] nowa świeczka: strumień {per_candle_stream * 1e6:.1f} us | pełne przeliczenie ({backend}) "
+          f"{full * 1000:.2f} ms | przyspieszenie {full / per_candle_stream:.0f}x")
+
+    streamed = {name: stream.series(name, df.index) for name in names}
+    reference = calculate_indicators(names, df, backend)
+    return _compare(reference, streamed, names, f"strumień vs {backend}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--length", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--backend", default=None, help="pandas_ta | numpy (domyślnie INDICATORS_BACKEND)")
+    parser.add_argument("--check", action="store_true")
+    parser.add_argument("--stream", action="store_true")
+    args = parser.parse_args()
+
+    df = synthetic_ohlc(args.length)
+    names = list(INDICATORS_REGISTRY)
+
+    if args.check:
+        sys.exit(0 if check_parity(df) else 1)
+
+    backend = resolve_backend(args.backend)
+    if args.stream:
+        sys.exit(0 if bench_stream(df, backend) else 1)
+
+    print(f"\n[BENCH] Backend: {backend}")
+    print(f"{'wskaźnik':<18}{'czas [ms]':>12}")
+    for name in names:
+        t = _best_of(lambda: calculate_indicator(name, df, IndicatorContext(df, backend)), args.repeat)
+        print(f"{name:<18}{t * 1000:>12.2f}")
+
+    separate = _best_of(lambda: [calculate_indicator(name, df, IndicatorContext(df, backend)) for name in names],
+                        args.repeat)
+    shared = _best_of(lambda: calculate_indicators(names, df, backend), args.repeat)
+    print(f"\n[BENCH] {len(names)} wskaźników, {args.length} świeczek")
+    print(f"[BENCH] osobno: {separate * 1000:.2f} ms | wspólny kontekst: {shared * 1000:.2f} ms "
+          f"| przyspieszenie {separate / shared:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
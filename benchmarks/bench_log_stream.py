@@ -0,0 +1,160 @@
+# benchmarks/bench_log_stream.py
+"""
+Dziennik i postęp prognozy: odpytywanie /api/logs co --poll s (poprzednio) vs strumień SSE /api/logs/stream.
+
+Kilka /predict z nagłówkiem X-Request-ID; dla każdego wpisu dziennika mierzymy opóźnienie dostarczenia
+(czas odbioru - czas zapisu) i liczymy zapytania HTTP klienta dziennika. Osobny strumień z ?request_id=
+zbiera zdarzenia 'progress' (pobranie, wskaźniki, metody k/n, okna backtestu i/n).
+
+Serwer startuje jako 'uvicorn main:app' (jeden worker, fałszywe Twelve Data).
+Kod wyjścia 1, gdy strumień zgubił wpisy, nie dostarczył postępu albo był wolniejszy od odpytywania.
+
+    python -m benchmarks.bench_log_stream --requests 5 --poll 0.5 --workers 2
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+from benchmarks.bench_workers import BASE_DIR, _free_port, _wait_ready
+from benchmarks.fake_twelvedata import start_fake_server
+
+BODY = {"method_keys": ["monte_carlo", "arima"], "horizon": 7, "interval": "1h"}
+
+
+def _sse_events(response):
+    """Zdarzenia SSE (typ, dane) z odpowiedzi strumieniowej requests."""
+    event, data = None, []
+    for line in response.iter_lines(decode_unicode=True):
+        if line == "":
+            if data:
+                yield event, json.loads("\n".join(data))
+            event, data = None, []
+        elif line.startswith("event:"):
+            event = line[6:].strip()
+        elif line.startswith("data:"):
+            data.append(line[5:].strip())
+
+
+class StreamReader(threading.Thread):
+    def __init__(self, url: str):
+        super().__init__(daemon=True)
+        self.url = url
+        self.events = []
+        self.connected = threading.Event()
+        self.stop = threading.Event()
+
+    def run(self):
+        with requests.get(self.url, stream=True, timeout=60) as response:
+            self.connected.set()
+            for event, data in _sse_events(response):
+                self.events.append((time.time(), event, data))
+                if self.stop.is_set():
+                    return
+
+
+class PollReader(threading.Thread):
+    def __init__(self, url: str, interval: float):
+        super().__init__(daemon=True)
+        self.url = url
+        self.interval = interval
+        self.events = []
+        self.calls = 0
+        self.stop = threading.Event()
+
+    def run(self):
+        after = requests.get(self.url).json()["last_seq"]
+        while not self.stop.is_set():
+            time.sleep(self.interval)
+            data = requests.get(f"{self.url}?after={after}").json()
+            self.calls += 1
+            after = data["last_seq"]
+            self.events.extend((time.time(), "log", record) for record in data["logs"])
+
+
+def _delays(events, request_ids) -> list:
+    return [received - data["time"] for received, event, data in events
+            if event == "log" and data["request_id"] in request_ids]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5, help="kolejne /predict")
+    parser.add_argument("--poll", type=float, default=0.5, help="okres odpytywania [s] (LogConsole: 0.5)")
+    parser.add_argument("--workers", type=int, default=2, help="FORECAST_WORKERS serwera (1 = bez puli)")
+    args = parser.parse_args()
+
+    fake, _, base_url = start_fake_server()
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}"
+    print(f"\n[BENCH] Dziennik: {args.requests} /predict, odpytywanie co {args.poll:.2f}s vs SSE "
+          f"(FORECAST_WORKERS={args.workers})")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {**os.environ, "TWELVE_DATA_BASE_URL": base_url, "WEB_CONCURRENCY": "1",
+               "FORECAST_WORKERS": str(args.workers), "OHLC_STORE_DIR": os.path.join(tmp, "ohlc"),
+               "METHODS_RELOAD_INTERVAL": "0", "LOG_LEVEL": "DEBUG", "LOG_STDOUT": "0"}
+        server = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+                                   "--log-level", "warning"],
+                                  cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            _wait_ready(url)
+            stream = StreamReader(f"{url}/api/logs/stream")
+            poll = PollReader(f"{url}/api/logs", args.poll)
+            stream.start()
+            poll.start()
+            stream.connected.wait(10)
+
+            request_ids, progress = [], {}
+            start = time.perf_counter()
+            for i in range(args.requests):
+                request_id = f"bench{i:03d}"
+                request_ids.append(request_id)
+                channel = StreamReader(f"{url}/api/logs/stream?request_id={request_id}&level=ERROR")
+                channel.start()
+                channel.connected.wait(10)
+                response = requests.post(f"{url}/predict?format=columnar", json={**BODY, "ticker": f"SSE{i:02d}/USD"},
+                                         headers={"X-Request-ID": request_id}, timeout=300)
+                response.raise_for_status()
+                time.sleep(0.05)  # ostatnie zdarzenia w drodze
+                channel.stop.set()
+                progress[request_id] = [data for _, event, data in channel.events if event == "progress"]
+            elapsed = time.perf_counter() - start
+            time.sleep(args.poll * 1.5)  # ostatni cykl odpytywania
+            stream.stop.set()
+            poll.stop.set()
+            poll.join()
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+            fake.shutdown()
+
+    sse_delays = _delays(stream.events, set(request_ids))
+    poll_delays = _delays(poll.events, set(request_ids))
+    print(f"[BENCH] Wpisy żądań: SSE {len(sse_delays)} | odpytywanie {len(poll_delays)} "
+          f"({poll.calls} zapytań HTTP w {elapsed:.2f}s, SSE: 1 połączenie)")
+    if sse_delays and poll_delays:
+        print(f"[BENCH] Opóźnienie dostarczenia: SSE mediana {statistics.median(sse_delays) * 1000:.1f} ms, "
+              f"max {max(sse_delays) * 1000:.1f} ms | odpytywanie mediana "
+              f"{statistics.median(poll_delays) * 1000:.1f} ms, max {max(poll_delays) * 1000:.1f} ms")
+
+    sample = progress[request_ids[-1]]
+    stages = " -> ".join(f"{p['stage']}" + (f" {p['step']}/{p['total']}" if p.get("total") else "")
+                         for p in sample[:3] + (sample[-2:] if len(sample) > 5 else sample[3:]))
+    print(f"[BENCH] Postęp (zdarzenia na żądanie): {[len(p) for p in progress.values()]}; ostatnie: {stages}")
+
+    passed = (len(sse_delays) == len(poll_delays) > 0
+              and all(any(p["stage"] == "method" for p in events) for events in progress.values())
+              and statistics.median(sse_delays) < statistics.median(poll_delays))
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
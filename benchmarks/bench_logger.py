@@ -0,0 +1,68 @@
+# benchmarks/bench_logger.py
+"""
+Koszt dziennika na gorącej ścieżce:
+- zapis do pełnego bufora: lista + pop(0) (poprzednio, O(n)) vs deque(maxlen) (core/logger.py),
+- wyłączony poziom: logger.debug("... %s", x) vs zapis z f-stringiem,
+- odczyt przyrostowy ?after=seq z pełnego bufora.
+
+    python -m benchmarks.bench_logger --calls 200000 --buffer 1000
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault("LOG_STDOUT", "0")
+os.environ.setdefault("LOG_LEVEL", "INFO")
+
+from core import logger
+
+
+def _list_buffer(calls: int, size: int) -> float:
+    buffer = []
+    start = time.perf_counter()
+    for i in range(calls):
+        buffer.append(f"[XGBoost] krok {i}")
+        if len(buffer) > size:
+            buffer.pop(0)
+    return time.perf_counter() - start
+
+
+def _timed(fn, calls: int) -> float:
+    start = time.perf_counter()
+    for i in range(calls):
+        fn(i)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200_000)
+    parser.add_argument("--buffer", type=int, default=1000, help="pojemność bufora (LOG_BUFFER_SIZE)")
+    args = parser.parse_args()
+
+    ns = 1e9 / args.calls
+    print(f"\n[BENCH] {args.calls} wpisów, bufor {args.buffer}")
+
+    if args.buffer != logger.LOG_BUFFER_SIZE:
+        logger._buffer = logger.deque(maxlen=args.buffer)
+    old = _list_buffer(args.calls, args.buffer)
+    new = _timed(lambda i: logger.info("[XGBoost] krok %s", i), args.calls)
+    print(f"[BENCH] Zapis (pełny bufor): lista+pop(0) {old * ns:.0f} ns | deque {new * ns:.0f} ns na wpis "
+          f"(deque z numerem, czasem i id żądania)")
+
+    disabled_lazy = _timed(lambda i: logger.debug("[XGBoost] krok %s z %s", i, args.calls), args.calls)
+    disabled_fstr = _timed(lambda i: logger.debug(f"[XGBoost] krok {i} z {args.calls}"), args.calls)
+    baseline = _timed(lambda i: None, args.calls)
+    print(f"[BENCH] Wyłączony DEBUG: z argumentami {(disabled_lazy - baseline) * ns:.0f} ns | "
+          f"f-string {(disabled_fstr - baseline) * ns:.0f} ns na wywołanie (ponad puste wywołanie)")
+
+    last = logger.get_logs(after=0, limit=len(logger._buffer))["last_seq"]
+    reads = 2000
+    start = time.perf_counter()
+    for _ in range(reads):
+        logger.get_logs(after=last - 10)
+    print(f"[BENCH] Odczyt 10 najnowszych z {len(logger._buffer)}: {(time.perf_counter() - start) / reads * 1e6:.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# benchmarks/bench_metrics.py
+"""
+Koszt pomiarów czasu (core/metrics.py) i rozkład czasu /predict:
+- metrics.span() wyłączony (METRICS=0, bez ?timings=1), włączony (histogram) i z zbieraniem 'timings',
+- /predict?timings=1 przez TestClient (fałszywe Twelve Data) - czas etapów zwracany w odpowiedzi.
+
+    python -m benchmarks.bench_metrics --calls 200000 --methods monte_carlo arima
+"""
+import argparse
+import os
+import time
+
+from benchmarks.fake_twelvedata import start_fake_server
+from core import metrics
+
+
+def _timed(fn, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return time.perf_counter() - start
+
+
+def _span():
+    with metrics.span("bench", method="x"):
+        pass
+
+
+def _bare():
+    pass
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200_000)
+    parser.add_argument("--methods", nargs="+", default=["monte_carlo", "arima"])
+    parser.add_argument("--indicators", nargs="*", default=["RSI 14", "MACD", "SMA 20"])
+    args = parser.parse_args()
+
+    ns = 1e9 / args.calls
+    print(f"\n[BENCH] metrics.span(): {args.calls} wywołań")
+    baseline = _timed(_bare, args.calls)
+    metrics.ENABLED = False
+    disabled = _timed(_span, args.calls)
+    metrics.ENABLED = True
+    enabled = _timed(_span, args.calls)
+    with metrics.collect():
+        collecting = _timed(_span, args.calls)
+    print(f"[BENCH] Na etap (ponad puste wywołanie): wyłączony {(disabled - baseline) * ns:.0f} ns | "
+          f"histogram {(enabled - baseline) * ns:.0f} ns | histogram + timings {(collecting - baseline) * ns:.0f} ns")
+
+    fake, _, base_url = start_fake_server()
+    os.environ["TWELVE_DATA_BASE_URL"] = base_url
+    import main as app_module
+    from fastapi.testclient import TestClient
+
+    body = {"ticker": "TIME/USD", "interval": "1h", "method_keys": args.methods, "horizon": 7,
+            "indicators": args.indicators}
+    with TestClient(app_module.app) as client:
+        for label in ("zimny start", "ponownie (cache)"):
+            response = client.post("/predict?timings=1", json=body)
+            timings = response.json()["timings"]
+            stages = ", ".join(f"{key} {value:.1f}" for key, value in timings.items())
+            print(f"[BENCH] /predict {label} [ms]: {stages}")
+        exported = sum(1 for line in client.get("/metrics").text.splitlines() if line.endswith("_count") or "_count{" in line)
+        print(f"[BENCH] /metrics: {exported} serii histogramów")
+    fake.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# benchmarks/bench_monte_carlo.py
+"""
+Symulacja Monte Carlo: czas kwantyli dla N ścieżek (GBM i bootstrap) przy różnych horyzontach.
+
+    python -m benchmarks.bench_monte_carlo --paths 100000 --horizons 7 30 90
+"""
+import argparse
+import importlib
+import time
+
+import numpy as np
+
+from benchmarks.fixtures import synthetic_ohlc
+
+mc = importlib.import_module("methods.monte_carlo")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--paths", type=int, default=100_000)
+    parser.add_argument("--horizons", type=int, nargs="+", default=[7, 30, 90])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    log_returns = np.diff(np.log(synthetic_ohlc(5000)["close"].values))
+
+    print(f"\n[BENCH] {args.paths} ścieżek, kwantyle {mc.QUANTILES}")
+    print(f"{'horyzont':>9}{'GBM [ms]':>12}{'bootstrap [ms]':>16}")
+    for horizon in args.horizons:
+        timings = []
+        for bootstrap in (False, True):
+            best = float("inf")
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                mc.simulate_quantiles(log_returns, horizon, n_paths=args.paths, bootstrap=bootstrap)
+                best = min(best, time.perf_counter() - start)
+            timings.append(best)
+        print(f"{horizon:>9}{timings[0] * 1000:>12.1f}{timings[1] * 1000:>16.1f}")
+
+    # Mediana GBM vs wartość analityczna (log-normalny rozkład: mediana = exp(t * dryf))
+    drift = log_returns.mean() - 0.5 * log_returns.var(ddof=1)
+    median = mc.simulate_quantiles(log_returns, 30, n_paths=args.paths)[mc.QUANTILES.index(50)]
+    error = np.max(np.abs(median - drift * np.arange(1, 31)))
+    print(f"\n[BENCH] max |mediana - t*dryf| (30 kroków): {error:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# benchmarks/bench_rate_limit.py
+"""
+Limit kredytów API: fałszywe Twelve Data odrzuca zapytania ponad --credits na okres (--period, HTTP 429).
+
+1. Seria - N równoczesnych /predict o różne symbole: limiter rozkłada zapytania na kolejne okresy,
+   serwer praktycznie nie odrzuca zapytań (pojedyncze 429 na granicy okresu klient ponawia w następnym).
+2. Priorytety - zadanie wsadowe o M symboli, a w trakcie kilka /predict: interaktywne dostają kredyty
+   przed resztą zadania (czekają najwyżej okres, zamiast do końca zadania).
+
+Serwer startuje jako 'uvicorn main:app' (jeden worker), okres skrócony, żeby test trwał sekundy.
+Kod wyjścia 1, gdy któreś żądanie się nie powiodło albo interaktywne czekały dłużej niż zadanie.
+
+    python -m benchmarks.bench_rate_limit --credits 8 --period 2 --burst 24 --batch 32
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.bench_workers import BASE_DIR, _free_port, _wait_ready
+from benchmarks.fake_twelvedata import start_fake_server
+
+BODY = {"method_keys": ["monte_carlo"], "horizon": 7, "interval": "1h"}
+
+
+def _predict(url: str, symbol: str) -> tuple:
+    start = time.perf_counter()
+    response = requests.post(f"{url}/predict?format=columnar", json={**BODY, "ticker": symbol}, timeout=300)
+    return response.status_code, time.perf_counter() - start
+
+
+def burst(url: str, count: int) -> dict:
+    symbols = [f"BURST{i:02d}/USD" for i in range(count)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(count) as pool:
+        results = list(pool.map(lambda s: _predict(url, s), symbols))
+    return {"ok": sum(1 for status, _ in results if status == 200), "elapsed": time.perf_counter() - start}
+
+
+def priority(url: str, batch_size: int, interactive: int, delay: float) -> dict:
+    tickers = [f"BATCH{i:02d}/USD" for i in range(batch_size)]
+    start = time.perf_counter()
+    job = requests.post(f"{url}/predict/batch", json={**BODY, "tickers": tickers, "intervals": ["1h"]}).json()
+    arrivals = []
+
+    def stream():
+        with requests.get(f"{url}{job['results_url']}", stream=True, timeout=600) as response:
+            for line in response.iter_lines():
+                if line:
+                    arrivals.append((time.perf_counter() - start, json.loads(line).get("status")))
+
+    reader = threading.Thread(target=stream)
+    reader.start()
+    time.sleep(delay)  # zadanie zdążyło zająć kredyty bieżącego okresu i czeka na kolejne
+    with ThreadPoolExecutor(interactive) as pool:
+        results = list(pool.map(lambda i: _predict(url, f"LIVE{i:02d}/USD"), range(interactive)))
+    reader.join()
+
+    return {
+        "interactive_ok": sum(1 for status, _ in results if status == 200),
+        "interactive_max": max(t for _, t in results),
+        "batch_ok": sum(1 for _, status in arrivals if status == "ok"),
+        "batch_elapsed": arrivals[-1][0] if arrivals else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--credits", type=int, default=8, help="kredyty na okres")
+    parser.add_argument("--period", type=float, default=2.0, help="okres limitu [s] (Twelve Data: 60)")
+    parser.add_argument("--burst", type=int, default=24, help="równoczesne /predict w serii")
+    parser.add_argument("--batch", type=int, default=32, help="symbole zadania wsadowego")
+    parser.add_argument("--interactive", type=int, default=4, help="/predict w trakcie zadania")
+    args = parser.parse_args()
+
+    fake, state, base_url = start_fake_server(credits=args.credits, period=args.period)
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}"
+    print(f"\n[BENCH] Limit API: {args.credits} kredytów / {args.period:.1f}s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {**os.environ, "TWELVE_DATA_BASE_URL": base_url, "WEB_CONCURRENCY": "1", "FORECAST_WORKERS": "1",
+               "TWELVE_DATA_CREDITS_PER_MINUTE": str(args.credits), "TWELVE_DATA_CREDITS_PERIOD": str(args.period),
+               "OHLC_STORE_DIR": os.path.join(tmp, "ohlc"), "METHODS_RELOAD_INTERVAL": "0"}
+        server = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+                                   "--log-level", "warning"],
+                                  cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            _wait_ready(url)
+            b = burst(url, args.burst)
+            periods = -(-args.burst // args.credits) - 1
+            print(f"[BENCH] Seria {args.burst} /predict: OK {b['ok']}/{args.burst}, {b['elapsed']:.2f}s "
+                  f"(minimum ~{periods * args.period:.1f}s), odrzucone przez API: {state.rejected}")
+            rejected_burst = state.rejected
+
+            p = priority(url, args.batch, args.interactive, delay=min(0.5, args.period / 4))
+            print(f"[BENCH] Zadanie {args.batch} symboli: OK {p['batch_ok']}/{args.batch} w {p['batch_elapsed']:.2f}s; "
+                  f"{args.interactive} /predict w trakcie: OK {p['interactive_ok']}/{args.interactive}, "
+                  f"najdłużej {p['interactive_max']:.2f}s")
+            quota = requests.get(f"{url}/quota").json()
+            print(f"[BENCH] /quota: dziś {quota['used']}/{quota['limit']} kredytów, "
+                  f"minuta {quota['minute']['used']}/{quota['minute']['limit']}, odrzucone lokalnie {quota['rejected']}")
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+            fake.shutdown()
+
+    prioritized = p["interactive_max"] < p["batch_elapsed"]
+    passed = (b["ok"] == args.burst and p["batch_ok"] == args.batch and p["interactive_ok"] == args.interactive
+              and prioritized)
+    print(f"[BENCH] Odrzucone przez API: {state.rejected} (seria {rejected_burst}) | "
+          f"priorytet interaktywnych: {'OK' if prioritized else 'BRAK'}")
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
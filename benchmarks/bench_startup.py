@@ -0,0 +1,90 @@
+# benchmarks/bench_startup.py
+"""
+Czas startu serwera: import main + rejestracja metod, leniwie (METHODS_LAZY=1) vs wszystko od razu.
+Każdy wariant w świeżym procesie z 'python -X importtime' - raport najdroższych importów najwyższego
+poziomu, pamięć procesu (max RSS) i koszt pierwszego użycia metod przy ładowaniu leniwym.
+
+Test regresji: --max-seconds N kończy się kodem 1, gdy leniwy start trwa dłużej niż N sekund.
+
+    python -m benchmarks.bench_startup --top 10
+    python -m benchmarks.bench_startup --max-seconds 3
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Kod uruchamiany w procesie potomnym: start jak w uvicorn (import aplikacji + zdarzenie startup)
+_BOOT = """
+import json, resource, sys, time
+start = time.perf_counter()
+import main
+main.registry.load_methods()
+boot = time.perf_counter() - start
+sys.stderr.write("BOOT_DONE\\n")
+rss_boot = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+for method in main.registry.all_methods():
+    method.func
+first_use = time.perf_counter() - start
+print(json.dumps({"boot": boot, "first_use": first_use, "rss_boot_mb": rss_boot / 1024,
+                  "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+"""
+
+
+def _parse_importtime(stderr: str) -> list:
+    """
+    Importy do końca startu, najwyżej jeden poziom zagnieżdżenia (np. main i jego bezpośrednie importy):
+    [(nazwa z wcięciem, czas skumulowany [s])], malejąco.
+    """
+    imports = []
+    for line in stderr.split("BOOT_DONE")[0].splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split(":", 1)[1].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2  # wcięcie = import zagnieżdżony
+        if depth <= 1:
+            imports.append(("  " * depth + name.strip(), int(cumulative_us) / 1e6))
+    return sorted(imports, key=lambda item: item[1], reverse=True)
+
+
+def measure(lazy: bool) -> tuple:
+    env = {**os.environ, "METHODS_LAZY": "1" if lazy else "0", "FORECAST_WORKERS": "1"}
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", _BOOT], cwd=BASE_DIR, env=env,
+                          capture_output=True, text=True, check=True)
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    return result, _parse_importtime(proc.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--top", type=int, default=8, help="ile najdroższych importów pokazać")
+    parser.add_argument("--max-seconds", type=float, default=None, help="limit leniwego startu (test regresji)")
+    args = parser.parse_args()
+
+    results = {}
+    for lazy in (False, True):
+        label = "leniwie" if lazy else "od razu"
+        result, imports = measure(lazy)
+        results[lazy] = result
+        print(f"\n[BENCH] Start ({label}): {result['boot']:.2f}s | RSS po starcie {result['rss_boot_mb']:.0f} MB | "
+              f"pierwsze użycie metod {result['first_use']:.2f}s | RSS z metodami {result['rss_mb']:.0f} MB")
+        print(f"{'import':<40}{'skumulowany [s]':>16}")
+        for name, seconds in imports[:args.top]:
+            print(f"{name:<40}{seconds:>16.3f}")
+
+    eager, lazy = results[False], results[True]
+    print(f"\n[BENCH] Przyspieszenie startu {eager['boot'] / lazy['boot']:.1f}x, "
+          f"pamięć po starcie -{eager['rss_boot_mb'] - lazy['rss_boot_mb']:.0f} MB na proces")
+
+    if args.max_seconds is not None:
+        passed = lazy["boot"] <= args.max_seconds
+        print(f"[BENCH] Limit startu {args.max_seconds:.2f}s: {'OK' if passed else 'PRZEKROCZONY'}")
+        sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# benchmarks/bench_training_window.py
+"""
+Raport dokładność vs czas dla okna treningowego metod (max_window / downsample).
+Dla każdej metody i wariantu okna: backtest na --windows punktach startowych (trafność kierunku,
+MAPE ceny za 'horizon') oraz czas pojedynczej prognozy i całego backtestu.
+Dane syntetyczne ze zmianą reżimu (dryf i zmienność) co --regime świeczek.
+
+    python -m benchmarks.bench_training_window --methods arima monte_carlo --horizon 7
+"""
+import argparse
+import os
+import time
+import warnings
+
+import numpy as np
+
+from core.backtester import backtest_predictions, confidence_from_predictions
+from core.registry import MethodRegistry
+from core.training import TrainingWindow
+from benchmarks.fixtures import synthetic_ohlc
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+VARIANTS = [
+    TrainingWindow(),
+    TrainingWindow(2000),
+    TrainingWindow(1000),
+    TrainingWindow(500),
+    TrainingWindow(250),
+    TrainingWindow(2000, downsample=4),
+]
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def _mape(series, horizon: int, predictions: dict) -> float:
+    origins = np.fromiter(predictions, dtype=int)
+    if not len(origins):
+        return float("nan")
+    actual = series.values[origins + horizon]
+    predicted = np.fromiter(predictions.values(), dtype=float)
+    return float(np.mean(np.abs(predicted - actual) / actual) * 100)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--length", type=int, default=5000)
+    parser.add_argument("--horizon", type=int, default=7)
+    parser.add_argument("--windows", type=int, default=100, help="liczba punktów startowych backtestu")
+    parser.add_argument("--regime", type=int, default=500, help="długość reżimu danych syntetycznych")
+    parser.add_argument("--methods", nargs="*", default=None)
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")
+
+    registry = MethodRegistry(os.path.join(BASE_DIR, "methods"))
+    registry.load_methods()
+
+    series = synthetic_ohlc(args.length, regime_length=args.regime)["close"]
+
+    print(f"\n[BENCH] {args.length} świeczek, horyzont {args.horizon}, {args.windows} okien backtestu, "
+          f"reżim co {args.regime}")
+    for method in registry.all_methods():
+        if args.methods and method.key not in args.methods:
+            continue
+
+        print(f"\n{method.name} (specyfikacja: {method.training.tag})")
+        print(f"{'okno':<18}{'trafność %':>12}{'MAPE %':>10}{'prognoza [ms]':>16}{'backtest [s]':>14}")
+        for window in VARIANTS:
+            _, t_forecast = _timed(lambda: method.func(window.apply(series), horizon=args.horizon))
+            predictions, t_backtest = _timed(lambda: backtest_predictions(
+                method.func, series, args.horizon, args.windows, method.walk_forward, window))
+            confidence = confidence_from_predictions(series, args.horizon, predictions)
+            mape = _mape(series, args.horizon, predictions)
+            print(f"{window.tag:<18}{confidence:>12.1f}{mape:>10.3f}{t_forecast * 1000:>16.1f}{t_backtest:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# benchmarks/bench_workers.py
+"""
+Wiele workerów uvicorn: ile zapytań do API kosztuje ta sama seria żądań /predict.
+Wariant 'osobno' - bez blokady pobierania i bez SharedCache (każdy worker pobiera i liczy sam),
+wariant 'wspólnie' - blokada plikowa per symbol/interwał + SharedCache.
+
+Serwer startuje jako 'uvicorn main:app --workers N' z fałszywym API (opóźnienie --latency)
+i świeżym magazynem świeczek; klienci wysyłają równocześnie żądania o te same symbole.
+
+    python -m benchmarks.bench_workers --workers 4 --symbols 5 --clients 40
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.fake_twelvedata import start_fake_server
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+VARIANTS = {
+    "osobno": {"FETCH_LOCK_TIMEOUT": "0", "SHARED_CACHE": "0"},
+    "wspólnie": {"SHARED_CACHE": "1"},
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(url: str, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{url}/methods", timeout=1).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("Serwer nie wystartował")
+
+
+def run_variant(name: str, args, base_url: str, state) -> dict:
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {**os.environ, **VARIANTS[name],
+               "TWELVE_DATA_BASE_URL": base_url, "WEB_CONCURRENCY": str(args.workers), "FORECAST_WORKERS": "1",
+               "OHLC_STORE_DIR": os.path.join(tmp, "ohlc"), "SHARED_CACHE_DIR": os.path.join(tmp, "shared"),
+               "METHODS_RELOAD_INTERVAL": "0"}
+        server = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+                                   "--workers", str(args.workers), "--log-level", "warning"],
+                                  cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            _wait_ready(url)
+            body = {"method_keys": args.methods, "horizon": 7, "indicators": ["RSI 14", "MACD"], "interval": "1h"}
+            symbols = [f"SYM{i:02d}/USD" for i in range(args.symbols)]
+            before = len(state.requests)
+
+            def call(i):
+                start = time.perf_counter()
+                # Osobne połączenie na żądanie - jądro rozdziela je między workery
+                response = requests.post(f"{url}/predict?format=columnar", timeout=120,
+                                         json={**body, "ticker": symbols[i % len(symbols)]},
+                                         headers={"Connection": "close"})
+                return response.status_code, time.perf_counter() - start
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(args.clients) as pool:
+                results = list(pool.map(call, range(args.clients)))
+            elapsed = time.perf_counter() - start
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    latencies = sorted(t for _, t in results)
+    return {
+        "api_requests": len(state.requests) - before,
+        "ok": sum(1 for status, _ in results if status == 200),
+        "elapsed": elapsed,
+        "p50": latencies[len(latencies) // 2],
+        "max": latencies[-1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--symbols", type=int, default=5)
+    parser.add_argument("--clients", type=int, default=40, help="równoczesne żądania /predict")
+    parser.add_argument("--methods", nargs="+", default=["monte_carlo"])
+    parser.add_argument("--latency", type=float, default=0.3, help="opóźnienie fałszywego API [s]")
+    args = parser.parse_args()
+
+    fake, state, base_url = start_fake_server(latency=args.latency)
+    print(f"\n[BENCH] {args.workers} workery, {args.clients} równoczesnych żądań o {args.symbols} symboli, "
+          f"opóźnienie API {args.latency * 1000:.0f} ms")
+    print(f"{'wariant':<12}{'zapytania API':>15}{'OK':>6}{'czas [s]':>10}{'p50 [s]':>10}{'max [s]':>10}")
+    try:
+        for name in VARIANTS:
+            r = run_variant(name, args, base_url, state)
+            print(f"{name:<12}{r['api_requests']:>15}{r['ok']:>6}{r['elapsed']:>10.2f}{r['p50']:>10.2f}{r['max']:>10.2f}")
+    finally:
+        fake.shutdown()
+    print(f"[BENCH] Minimum: {args.symbols} zapytań (jedno na symbol niezależnie od liczby workerów)")
+
+
+if __name__ == "__main__":
+    main()
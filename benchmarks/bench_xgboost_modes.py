@@ -0,0 +1,71 @@
+# benchmarks/bench_xgboost_modes.py
+"""
+XGBoost: tryb rekurencyjny vs bezpośredni (wielowyjściowy) dla horyzontów 7/30/90.
+Czas treningu, czas samej predykcji (1 okno i okna backtestu naraz) oraz MAE ścieżek na oknach backtestu.
+
+    python -m benchmarks.bench_xgboost_modes --length 5000 --horizons 7 30 90
+"""
+import argparse
+import importlib
+import time
+
+import numpy as np
+
+from core.backtester import backtest_origins
+from benchmarks.fixtures import synthetic_ohlc
+
+xgb_method = importlib.import_module("methods.xgboost")
+
+
+def _timed(fn, repeat: int = 1):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--length", type=int, default=5000)
+    parser.add_argument("--horizons", type=int, nargs="+", default=[7, 30, 90])
+    parser.add_argument("--windows", type=int, default=20)
+    args = parser.parse_args()
+
+    xgb_method.log = lambda *a, **k: None
+    values = synthetic_ohlc(args.length)["close"].values
+    returns = values[1:] / values[:-1] - 1
+    W = xgb_method.WINDOW_SIZE
+
+    print(f"\n[BENCH] {args.length} świeczek, {args.windows} okien backtestu")
+    print(f"{'h':>4} {'tryb':<10}{'trening [s]':>12}{'predykcja 1 [ms]':>18}"
+          f"{'predykcja okien [ms]':>22}{'MAE ścieżki [%]':>17}")
+
+    for horizon in args.horizons:
+        origins = np.asarray(backtest_origins(len(values), horizon, args.windows))
+        training = returns[:origins[0]]
+        windows = np.lib.stride_tricks.sliding_window_view(returns, W)[origins - W]
+        actual = np.stack([values[o + 1:o + 1 + horizon] for o in origins])
+
+        for mode in ("recursive", "direct"):
+            direct = mode == "direct"
+            X, y = (xgb_method._build_direct_training_set(training, horizon) if direct
+                    else xgb_method._build_training_set(training))
+            model, t_train = _timed(lambda: xgb_method._train_model(X, y))
+
+            if direct:
+                predict = lambda w: xgb_method._predict_direct_batch(model, w, horizon)
+            else:
+                predict = lambda w: xgb_method._predict_returns_batch(model, w, horizon)
+            _, t_single = _timed(lambda: predict(windows[-1:]), repeat=5)
+            predicted, t_batch = _timed(lambda: predict(windows), repeat=5)
+
+            paths = xgb_method._returns_to_prices(values[origins], predicted)
+            mae = np.mean(np.abs(paths - actual) / actual) * 100
+            print(f"{horizon:>4} {mode:<10}{t_train:>12.3f}{t_single * 1000:>18.2f}"
+                  f"{t_batch * 1000:>22.2f}{mae:>17.3f}")
+
+
+if __name__ == "__main__":
+    main()
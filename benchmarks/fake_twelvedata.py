@@ -0,0 +1,153 @@
+# benchmarks/fake_twelvedata.py
+"""
+Lokalny, fałszywy serwer Twelve Data (/time_series) do testów i benchmarków DataClient.
+
+Limit kredytów jak w Twelve Data: zapytanie o N symboli kosztuje N kredytów, limit liczony
+w minutach zegarowych (okres --period), nagłówki api-credits-used / api-credits-left
+w każdej odpowiedzi, po przekroczeniu HTTP 429 z {"code": 429}. --credits 0 = bez limitu.
+
+    python -m benchmarks.fake_twelvedata --port 8765 --credits 8
+    TWELVE_DATA_BASE_URL=http://127.0.0.1:8765 python main.py
+"""
+import argparse
+import calendar
+import json
+import math
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+INTERVAL_SECONDS = {"1min": 60, "5min": 300, "15min": 900, "30min": 1800, "1h": 3600, "4h": 14400, "1day": 86400}
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _candle(symbol: str, ts: int, step: int) -> dict:
+    """Deterministyczna świeczka: ta sama para (symbol, czas) zawsze daje te same wartości."""
+    seed = zlib.crc32(symbol.encode()) % 1000
+    k = ts // step
+    close = (100 + seed) * math.exp(0.05 * math.sin(k / 40) + 0.02 * math.sin(k / 7 + seed))
+    open_ = (100 + seed) * math.exp(0.05 * math.sin((k - 1) / 40) + 0.02 * math.sin((k - 1) / 7 + seed))
+    return {
+        "datetime": datetime.fromtimestamp(ts, timezone.utc).strftime(DATE_FORMAT),
+        "open": f"{open_:.5f}",
+        "high": f"{max(open_, close) * 1.002:.5f}",
+        "low": f"{min(open_, close) * 0.998:.5f}",
+        "close": f"{close:.5f}",
+        "volume": str(1000 + k % 500),
+    }
+
+
+class FakeTwelveData:
+    """Stan serwera: lista otrzymanych zapytań, opcjonalne opóźnienie odpowiedzi i limit kredytów."""
+
+    def __init__(self, latency: float = 0.0, credits: int = 0, period: float = 60.0):
+        self.latency = latency
+        self.credits = credits
+        self.period = period
+        self.requests = []
+        self.rejected = 0
+        self.lock = threading.Lock()
+        self._window = None
+        self._used = 0
+
+    def charge(self, params: dict) -> tuple:
+        """Rozliczenie kredytów zapytania: (przyjęte?, zużyte w bieżącym okresie, pozostałe)."""
+        cost = len([s for s in params.get("symbol", "").split(",") if s])
+        with self.lock:
+            window = int(time.time() // self.period)
+            if window != self._window:
+                self._window, self._used = window, 0
+            if self.credits and self._used + cost > self.credits:
+                self.rejected += 1
+                return False, self._used, self.credits - self._used
+            self._used += cost
+            return True, self._used, (self.credits or 10 ** 6) - self._used
+
+    def time_series(self, params: dict) -> dict:
+        symbols = [s for s in params.get("symbol", "").split(",") if s]
+        interval = params.get("interval", "1day")
+        outputsize = int(params.get("outputsize", 30))
+        step = INTERVAL_SECONDS.get(interval, 86400)
+
+        with self.lock:
+            self.requests.append(params)
+
+        end = int(time.time()) // step * step
+        start = end - (outputsize - 1) * step
+        if "start_date" in params:
+            start_date = calendar.timegm(datetime.strptime(params["start_date"], DATE_FORMAT).timetuple())
+            start = max(start, start_date // step * step)
+
+        def series(symbol):
+            values = [_candle(symbol, ts, step) for ts in range(start, end + 1, step)]
+            return {"meta": {"symbol": symbol, "interval": interval}, "values": values, "status": "ok"}
+
+        if len(symbols) == 1:
+            return series(symbols[0])
+        return {symbol: series(symbol) for symbol in symbols}
+
+
+def make_handler(state: FakeTwelveData):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+            if state.latency:
+                time.sleep(state.latency)
+
+            if url.path != "/time_series":
+                self.send_response(404)
+                self.end_headers()
+                return
+
+            accepted, used, left = state.charge(params)
+            if accepted:
+                status, payload = 200, state.time_series(params)
+            else:
+                status, payload = 429, {"code": 429, "status": "error",
+                                        "message": f"You have run out of API credits for the current minute. "
+                                                   f"{used} API credits were used, with the current limit being "
+                                                   f"{state.credits}."}
+
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("api-credits-used", str(used))
+            self.send_header("api-credits-left", str(left))
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def start_fake_server(port: int = 0, latency: float = 0.0, credits: int = 0, period: float = 60.0):
+    """Uruchamia serwer w wątku w tle. Zwraca (server, state, base_url)."""
+    state = FakeTwelveData(latency=latency, credits=credits, period=period)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--credits", type=int, default=0, help="kredyty na okres (0 = bez limitu)")
+    parser.add_argument("--period", type=float, default=60.0, help="okres limitu kredytów [s]")
+    args = parser.parse_args()
+
+    srv, _, url = start_fake_server(args.port, args.latency, args.credits, args.period)
+    print(f"[FAKE API] {url}/time_series")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        srv.shutdown()
@@ -0,0 +1,38 @@
+# benchmarks/fixtures.py
+import numpy as np
+import pandas as pd
+
+INTERVAL_FREQ = {
+    "1min": "1min",
+    "5min": "5min",
+    "15min": "15min",
+    "1h": "1h",
+    "4h": "4h",
+    "1day": "1D",
+}
+
+
+def synthetic_ohlc(length: int = 5000, interval: str = "1h", seed: int = 42, start_price: float = 30000.0,
+                   regime_length: int = None) -> pd.DataFrame:
+    """
+    Syntetyczne świeczki OHLCV (GBM) w tym samym formacie co DataClient.fetch_series:
+    indeks 'datetime', kolumny open/high/low/close/volume (float).
+    regime_length - co tyle świeczek losowany jest nowy dryf i zmienność (stare dane mniej aktualne).
+    """
+    rng = np.random.default_rng(seed)
+    if regime_length:
+        regimes = -(-length // regime_length)
+        drift = np.repeat(rng.normal(0.0, 0.002, regimes), regime_length)[:length]
+        vol = np.repeat(rng.uniform(0.005, 0.02, regimes), regime_length)[:length]
+        log_returns = rng.normal(drift, vol)
+    else:
+        log_returns = rng.normal(0.0002, 0.01, length)
+    close = start_price * np.exp(np.cumsum(log_returns))
+    open_ = np.concatenate(([start_price], close[:-1]))
+    spread = np.abs(rng.normal(0, 0.004, length)) * close
+    high = np.maximum(open_, close) + spread
+    low = np.minimum(open_, close) - spread
+    volume = rng.lognormal(10, 1, length)
+
+    index = pd.date_range("2020-01-01", periods=length, freq=INTERVAL_FREQ.get(interval, "1h"), name="datetime")
+    return pd.DataFrame({"open": open_, "high": high, "low": low, "close": close, "volume": volume}, index=index)
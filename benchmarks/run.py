@@ -0,0 +1,271 @@
+# benchmarks/run.py
+"""
+Zbiorczy pomiar wydajności z wynikiem w JSON i porównaniem z zapisanym punktem odniesienia (regresje).
+
+Zestawy (--suites):
+  methods    - każda zarejestrowana metoda: prognoza (fit + forecast na oknie treningowym metody)
+               i backtest_predictions (backtest jak w ForecastExecutor; bez żadnej prognozy = błąd,
+               calculate_confidence połyka wyjątki i zepsuta metoda wyglądałaby na szybszą),
+  indicators - każdy wskaźnik z INDICATORS_REGISTRY osobno + wszystkie we wspólnym kontekście,
+  api        - /predict przez TestClient z DataClient podmienionym na dane z fixture (bez sieci):
+               zimne (nowy symbol - bez cache) i ponowne (cache prognoz i wskaźników).
+
+Dane: syntetyczne świeczki (benchmarks.fixtures, stałe ziarno) o długościach --sizes dla --intervals
+oraz opcjonalnie nagrane - z magazynu świeczek (--recorded BTC/USD:1h, katalog OHLC_STORE_DIR),
+ostatnie N świeczek dla każdej długości.
+
+Wynik: {"meta": {...}, "results": {"methods/arima/forecast/syn-1h-5000": {"min", "median", "runs"}, ...}}.
+--baseline: porównanie po 'min' (najmniej wrażliwe na szum); regresja, gdy wynik wolniejszy o ponad
+--threshold (względnie) i --min-delta (bezwzględnie). Kod wyjścia 1 przy regresji.
+
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --suites methods --methods arima --sizes 1000 5000 50000 --baseline bench.json
+    python -m benchmarks.run --recorded BTC/USD:1h --baseline bench.json --threshold 0.2
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+# Powtarzalne warunki: bez puli procesów (brak kosztu startu i szumu planisty) i bez wypisywania dziennika
+os.environ.setdefault("FORECAST_WORKERS", "1")
+os.environ.setdefault("LOG_STDOUT", "0")
+os.environ.setdefault("METHODS_RELOAD_INTERVAL", "0")
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.fixtures import synthetic_ohlc
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SUITES = ("methods", "indicators", "api")
+
+
+def measure(fn, repeat: int, warmup: int, budget: float) -> dict:
+    """Czasy 'repeat' wywołań po 'warmup' rozgrzewkowych; przerywa po przekroczeniu 'budget' sekund (min. 1)."""
+    for _ in range(warmup):
+        fn()
+    timings = []
+    spent = 0.0
+    while len(timings) < repeat and (not timings or spent < budget):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+        spent += timings[-1]
+    return {"min": min(timings), "median": statistics.median(timings), "runs": len(timings)}
+
+
+def load_fixtures(sizes: list, intervals: list, recorded: list) -> dict:
+    """{nazwa: DataFrame}: syntetyczne syn-<interwał>-<długość> + nagrane rec-<symbol>-<interwał>-<długość>."""
+    fixtures = {}
+    for interval in intervals:
+        for size in sizes:
+            fixtures[f"syn-{interval}-{size}"] = synthetic_ohlc(size, interval=interval, regime_length=500)
+
+    if recorded:
+        from core.data_client import DataClient
+        from core.ohlc_store import OHLCStore
+        store = OHLCStore(DataClient.STORE_DIR)
+        for spec in recorded:
+            symbol, _, interval = spec.partition(":")
+            df = store.load(symbol, interval or "1day")
+            if df is None:
+                print(f"[BENCH] Brak nagranych świeczek {spec} w {store.root_dir} - pomijam")
+                continue
+            tag = symbol.upper().replace("/", "-")
+            for size in sizes:
+                if len(df) >= size:
+                    fixtures[f"rec-{tag}-{interval or '1day'}-{size}"] = df.iloc[-size:].copy()
+                else:
+                    print(f"[BENCH] {spec}: {len(df)} świeczek, za mało na {size}")
+    return fixtures
+
+
+def _safe(results: dict, key: str, fn, args):
+    try:
+        results[key] = measure(fn, args.repeat, args.warmup, args.budget)
+    except Exception as e:
+        results[key] = {"error": str(e)}
+    entry = results[key]
+    status = f"min {entry['min'] * 1000:10.2f} ms  mediana {entry['median'] * 1000:10.2f} ms  ({entry['runs']}x)" \
+        if "error" not in entry else f"BŁĄD: {entry['error']}"
+    print(f"[BENCH] {key:<58} {status}")
+
+
+def _backtest(method, series, horizon: int):
+    from core.backtester import backtest_predictions
+
+    predictions = backtest_predictions(method.func, series, horizon, walk_forward=method.walk_forward,
+                                       training=method.training)
+    if not predictions:
+        raise RuntimeError("backtest bez prognoz - wszystkie okna zakończone błędem")
+
+
+def suite_methods(fixtures: dict, args, results: dict):
+    from core.registry import MethodRegistry
+
+    registry = MethodRegistry(os.path.join(BASE_DIR, "methods"))
+    registry.load_methods()
+    for method in registry.all_methods():
+        if args.methods and method.key not in args.methods:
+            continue
+        for name, df in fixtures.items():
+            series = df["close"]
+            window = method.training.apply(series)
+            _safe(results, f"methods/{method.key}/forecast/{name}",
+                  lambda: method.func(window, horizon=args.horizon), args)
+            _safe(results, f"methods/{method.key}/backtest/{name}",
+                  lambda: _backtest(method, series, args.horizon), args)
+
+
+def suite_indicators(fixtures: dict, args, results: dict):
+    from core.indicators_lib import INDICATORS_REGISTRY, calculate_indicator, calculate_indicators
+
+    for name, df in fixtures.items():
+        for indicator in INDICATORS_REGISTRY:
+            # Osobno - bez współdzielenia węzłów (pełny koszt jednego wskaźnika)
+            _safe(results, f"indicators/{indicator}/{name}", lambda: calculate_indicator(indicator, df), args)
+        _safe(results, f"indicators/all-shared/{name}", lambda: calculate_indicators(list(INDICATORS_REGISTRY), df),
+              args)
+
+
+def suite_api(fixtures: dict, args, results: dict):
+    import main as app_module
+    from fastapi.testclient import TestClient
+    from core.indicators_lib import get_indicators_metadata
+
+    current = {}
+
+    async def fetch_fixture(symbol, interval="1day", outputsize=5000, **kwargs):
+        # DataClient bez sieci: zawsze ramka bieżącej fixture
+        return current["df"]
+
+    app_module.data_client.fetch_series_async = fetch_fixture
+    indicators = [m["key"] for m in get_indicators_metadata() if m.get("parent") is None]
+    app_module.registry.load_methods()
+    methods = args.methods or [m.key for m in app_module.registry.all_methods()]
+    counter = iter(range(10 ** 9))
+
+    with TestClient(app_module.app) as client:
+        for name, df in fixtures.items():
+            current["df"] = df
+            interval = name.split("-")[-2]
+            body = {"method_keys": methods, "horizon": args.horizon, "indicators": indicators, "interval": interval}
+
+            def predict(ticker: str, fmt: str = "columnar"):
+                response = client.post(f"/predict?format={fmt}", json={**body, "ticker": ticker})
+                if response.status_code != 200:
+                    raise RuntimeError(f"HTTP {response.status_code}: {response.text[:200]}")
+
+            # Zimne: nowy symbol przy każdym wywołaniu - bez cache prognoz i stanów wskaźników
+            _safe(results, f"api/predict-cold/{name}", lambda: predict(f"BENCH{next(counter)}/USD"), args)
+            ticker = f"WARM-{name}/USD"
+            predict(ticker)
+            _safe(results, f"api/predict-cached/{name}", lambda: predict(ticker), args)
+            _safe(results, f"api/predict-cached-records/{name}", lambda: predict(ticker, "records"), args)
+
+
+def compare(results: dict, baseline: dict, threshold: float, min_delta: float) -> list:
+    """
+    Lista regresji (klucz, baseline, wynik albo None przy błędzie, stosunek); wypisuje też przyspieszenia
+    i brakujące pozycje.
+    """
+    regressions = []
+    missing = 0
+    for key, entry in results.items():
+        base = baseline.get(key)
+        if "error" in entry and base and "error" not in base:
+            # Działało w punkcie odniesienia - zepsuta metoda to regresja, nie brak porównania
+            regressions.append((key, base["min"], None, float("inf")))
+            print(f"[BENCH] REGRESJA {key:<50} {base['min'] * 1000:9.2f} ms -> BŁĄD: {entry['error']}")
+            continue
+        if "error" in entry or not base or "error" in base:
+            missing += 1
+            continue
+        ratio = entry["min"] / base["min"] if base["min"] > 0 else float("inf")
+        delta = entry["min"] - base["min"]
+        if ratio > 1 + threshold and delta > min_delta:
+            regressions.append((key, base["min"], entry["min"], ratio))
+            print(f"[BENCH] REGRESJA {key:<50} {base['min'] * 1000:9.2f} -> {entry['min'] * 1000:9.2f} ms "
+                  f"({ratio:.2f}x)")
+        elif ratio < 1 / (1 + threshold) and -delta > min_delta:
+            print(f"[BENCH] szybciej  {key:<50} {base['min'] * 1000:9.2f} -> {entry['min'] * 1000:9.2f} ms "
+                  f"({ratio:.2f}x)")
+    if missing:
+        print(f"[BENCH] {missing} pozycji bez porównania (brak w punkcie odniesienia albo błąd)")
+    return regressions
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--suites", nargs="+", choices=SUITES, default=list(SUITES))
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 5000, 50000])
+    parser.add_argument("--intervals", nargs="+", default=["1h", "1day"])
+    parser.add_argument("--recorded", nargs="*", default=[], help="nagrane świeczki SYMBOL:INTERWAŁ z magazynu")
+    parser.add_argument("--methods", nargs="*", default=None, help="tylko te metody (domyślnie wszystkie)")
+    parser.add_argument("--horizon", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--budget", type=float, default=10.0, help="limit czasu powtórzeń jednej pozycji [s]")
+    parser.add_argument("--output", default=None, help="plik JSON z wynikami")
+    parser.add_argument("--baseline", default=None, help="wynik poprzedniego uruchomienia do porównania")
+    parser.add_argument("--threshold", type=float, default=0.25, help="dopuszczalne spowolnienie (0.25 = 25%%)")
+    parser.add_argument("--min-delta", type=float, default=0.002, help="pomijane różnice poniżej [s]")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.sizes, args.intervals, args.recorded)
+    print(f"\n[BENCH] {len(fixtures)} zestawów danych: {', '.join(fixtures)}")
+
+    results = {}
+    started = time.perf_counter()
+    for suite in args.suites:
+        {"methods": suite_methods, "indicators": suite_indicators, "api": suite_api}[suite](fixtures, args, results)
+
+    report = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "env": {var: os.getenv(var) for var in ("FORECAST_WORKERS", "INDICATORS_BACKEND", "INDICATORS_STREAMING")},
+            "args": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+            "elapsed": round(time.perf_counter() - started, 2),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"[BENCH] Wyniki: {args.output} ({len(results)} pozycji, {report['meta']['elapsed']}s)")
+
+    failed = [key for key, entry in results.items() if "error" in entry]
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline.get("results", {}), args.threshold, args.min_delta)
+        print(f"[BENCH] Porównanie z {args.baseline} (commit {baseline.get('meta', {}).get('commit')}): "
+              f"{len(regressions)} regresji powyżej {args.threshold:.0%}")
+        if regressions:
+            sys.exit(1)
+    if failed:
+        print(f"[BENCH] {len(failed)} pozycji zakończonych błędem")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
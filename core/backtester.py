@@ -1,59 +1,220 @@
+import warnings
+
 import pandas as pd
 import numpy as np
 
+from core.training import TrainingWindow, FULL_WINDOW
+from core import logger
+
+# Najmniej świeczek, jakie widzi najwcześniejsze okno backtestu (jak w backtest_origins)
+MIN_HISTORY = 50
+# Rynek "stał" - zmiana poniżej 0.1% ceny: ocena kierunku 0.5 (remis)
+FLAT_MOVE = 0.001
+
+
+def backtest_origins(series_length: int, horizon: int, lookback_windows: int = 20) -> list:
+    """
+    Zwraca indeksy punktów startowych backtestu (rosnąco).
+    Dla każdego indeksu 'i' strategia widzi dane do 'i' włącznie, a oceniamy cenę z 'i + horizon'.
+    """
+    # start_index = ostatni znany punkt, dla którego znamy przyszłość (horizon)
+    last_possible_index = series_length - horizon - 1
+    end_index = max(last_possible_index - lookback_windows, 50)
+    return list(range(end_index + 1, last_possible_index + 1))
+
+
+def walk_forward_origins(series_length: int, horizon: int, windows: int, stride: int = 1) -> list:
+    """
+    Punkty startowe ewaluacji (rosnąco): 'windows' okien co 'stride' świeczek, ostatnie tak,
+    żeby znać pełny horyzont. Okna z mniej niż MIN_HISTORY świeczkami historii są pomijane.
+    """
+    last_possible_index = series_length - horizon - 1
+    first = last_possible_index - stride * (max(windows, 1) - 1)
+    return [i for i in range(first, last_possible_index + 1, max(stride, 1)) if i >= MIN_HISTORY]
+
+
+def direction_scores(current, actual_future, predicted_future) -> np.ndarray:
+    """
+    Ocena kierunku (wektorowo): 1 = trafiony, 0.5 = remis (rynek stał, zmiana < 0.1%), 0 = pudło.
+    Brak prognozy (NaN) liczy się jak pudło albo remis - tak jak dotąd w calculate_confidence.
+    """
+    actual_move = np.asarray(actual_future, dtype=float) - current
+    predicted_move = np.asarray(predicted_future, dtype=float) - current
+    with np.errstate(invalid="ignore"):
+        hit = ((actual_move > 0) & (predicted_move > 0)) | ((actual_move < 0) & (predicted_move < 0))
+        flat = np.abs(actual_move) < np.abs(current) * FLAT_MOVE
+    return np.where(hit, 1.0, np.where(flat, 0.5, 0.0))
+
+
+def walk_forward_paths(walk_forward, series: pd.Series, horizon: int, origins: list,
+                       training: TrainingWindow = FULL_WINDOW) -> dict:
+    """
+    Tryb przyrostowy: metoda trenuje się raz na najwcześniejszym oknie,
+    a dla kolejnych punktów tylko dokłada obserwacje (append/extend, warm start).
+    Okno treningowe ogranicza dane najwcześniejszego punktu (indeksy przesunięte o 'offset').
+    Zwraca {indeks_startowy: ścieżka prognozy (horizon punktów)}.
+    """
+    frame, offset = training.walk_forward_frame(series, origins[0]) if origins else (series, 0)
+    paths = walk_forward(frame, horizon=horizon, origins=[i + offset for i in origins])
+    return {i: np.asarray(paths[i + offset], dtype=float) for i in origins if i + offset in paths}
+
 
-def calculate_confidence(method_func, series: pd.Series, horizon: int, lookback_windows: int = 20) -> float:
+def walk_forward_forecasts(walk_forward, series: pd.Series, horizon: int, origins: list,
+                           training: TrainingWindow = FULL_WINDOW) -> dict:
+    """Jak walk_forward_paths, ale tylko ostatni punkt prognozy: {indeks_startowy: cena za 'horizon'}."""
+    return {i: float(path[-1]) for i, path in walk_forward_paths(walk_forward, series, horizon, origins,
+                                                                  training).items()}
+
+
+def refit_paths(method_func, series: pd.Series, horizon: int, origins: list,
+                training: TrainingWindow = FULL_WINDOW) -> tuple:
+    """
+    Pełne dopasowanie dla każdego okna, z pasmami niepewności, jeśli metoda je zwraca (attrs["bands"]).
+    Zwraca (ścieżki {i: tablica}, pasma {i: (dolne, górne)} - skrajne kwantyle, błędy ["Typ: opis"]).
+    """
+    paths, bands, errors = {}, {}, []
+    for i in origins:
+        try:
+            forecast = method_func(training.window(series, i), horizon=horizon)
+            paths[i] = np.asarray(forecast.values[:horizon], dtype=float)
+            if forecast.attrs.get("bands"):
+                quantiles = np.asarray(list(forecast.attrs["bands"].values()), dtype=float)[:, :horizon]
+                bands[i] = (quantiles.min(axis=0), quantiles.max(axis=0))
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+    return paths, bands, errors
+
+
+def _refit_forecasts(method_func, series: pd.Series, horizon: int, origins: list,
+                     training: TrainingWindow = FULL_WINDOW) -> dict:
+    """Tryb klasyczny: pełne dopasowanie modelu od zera dla każdego okna."""
+    predictions = {}
+    for done, i in enumerate(origins, 1):
+        try:
+            # Trenujemy/karmimy strategię danymi TYLKO do punktu 'i' (nie podglądamy przyszłości);
+            # okno to widok na serię (bez kopii), najwyżej training.max_window świeczek
+            forecast_series = method_func(training.window(series, i), horizon=horizon)
+            # Pobieramy ostatni punkt prognozy
+            predictions[i] = float(forecast_series.iloc[-1])
+        except Exception:
+            continue
+        finally:
+            # Postęp dla kanału SSE żądania (bez subskrybentów - natychmiastowy powrót)
+            logger.progress("backtest", done, len(origins))
+    return predictions
+
+
+def backtest_predictions(method_func, series: pd.Series, horizon: int, lookback_windows: int = 20,
+                         walk_forward=None, training: TrainingWindow = FULL_WINDOW) -> dict:
+    """Prognozy backtestu {indeks_startowy: przewidziana cena za 'horizon'} - walk-forward albo pełne dopasowania."""
+    origins = backtest_origins(len(series), horizon, lookback_windows)
+
+    if walk_forward is not None:
+        try:
+            return walk_forward_forecasts(walk_forward, series, horizon, origins, training)
+        except Exception as e:
+            logger.warning(f"[BACKTEST] Walk-forward nieudany ({e}), przechodzę na pełne dopasowania")
+
+    return _refit_forecasts(method_func, series, horizon, origins, training)
+
+
+def calculate_confidence(method_func, series: pd.Series, horizon: int, lookback_windows: int = 20,
+                         walk_forward=None, training: TrainingWindow = FULL_WINDOW) -> float:
     """
     Wykonuje 'Rolling Window Backtest'.
     Cofa się w czasie i sprawdza, czy strategia poprawnie przewidziała KIERUNEK ceny (Góra/Dół).
 
+    Jeśli metoda udostępnia 'walk_forward', model jest dopasowywany raz i aktualizowany
+    przyrostowo. W przeciwnym razie (lub przy błędzie) każde okno liczone jest od zera.
+    'training' ogranicza dane widziane w każdym oknie (jak przy prognozie właściwej).
+
     Zwraca wynik 0-100%.
     """
     # Zabezpieczenie: potrzebujemy wystarczająco dużo danych (np. 50 świeczek + horyzont + lookback)
     if len(series) < 50 + horizon + lookback_windows:
         return 0.0
 
-    hits = 0
-    total = 0
+    predictions = backtest_predictions(method_func, series, horizon, lookback_windows, walk_forward, training)
+    return confidence_from_predictions(series, horizon, predictions)
 
-    # Iterujemy wstecz, symulując, że jesteśmy w przeszłości
-    # start_index = ostatni znany punkt, dla którego znamy przyszłość (horizon)
-    last_possible_index = len(series) - horizon - 1
-    start_index = last_possible_index
-    end_index = max(last_possible_index - lookback_windows, 50)
 
-    for i in range(start_index, end_index, -1):
-        try:
-            # 1. Trenujemy/karmimy strategię danymi TYLKO do punktu 'i' (nie podglądamy przyszłości)
-            input_slice = series.iloc[:i + 1]
-            current_price = series.iloc[i]
+def confidence_from_predictions(series: pd.Series, horizon: int, predictions: dict) -> float:
+    """Liczy wynik 0-100% z gotowych prognoz {indeks_startowy: przewidziana cena za 'horizon'}."""
+    if not predictions:
+        return 0.0
 
-            # 2. Rzeczywista cena, która wystąpiła 'horizon' dni później
-            actual_future_price = series.iloc[i + horizon]
+    values = np.asarray(series.values, dtype=float)
+    origins = np.fromiter(predictions.keys(), dtype=np.int64, count=len(predictions))
+    predicted = np.fromiter(predictions.values(), dtype=float, count=len(predictions))
+    # Rzeczywista cena, która wystąpiła 'horizon' świeczek później
+    scores = direction_scores(values[origins], values[origins + horizon], predicted)
 
-            # 3. Co strategia myślała w tamtym momencie?
-            forecast_series = method_func(input_slice, horizon=horizon)
+    # Wynik w procentach
+    return round(float(scores.mean()) * 100, 1)
 
-            # Pobieramy ostatni punkt prognozy
-            predicted_future_price = forecast_series.iloc[-1]
 
-            # 4. Ocena: Czy przewidziała kierunek? (Directional Accuracy)
-            actual_move = actual_future_price - current_price
-            predicted_move = predicted_future_price - current_price
+def path_matrix(paths: dict, origins: list, horizon: int) -> np.ndarray:
+    """Macierz (okna x horyzont) z {indeks_startowy: ścieżka}; brakujące okna i punkty = NaN."""
+    matrix = np.full((len(origins), horizon), np.nan)
+    for row, i in enumerate(origins):
+        path = paths.get(i)
+        if path is not None:
+            path = np.asarray(path, dtype=float)[:horizon]
+            matrix[row, :len(path)] = path
+    return matrix
 
-            # Jeśli oba ruchy są dodatnie LUB oba ujemne -> sukces
-            if (actual_move > 0 and predicted_move > 0) or (actual_move < 0 and predicted_move < 0):
-                hits += 1
-            # Jeśli rynek stał w miejscu (zmiana < 0.1%), uznajemy remis (0.5 pkt)
-            elif abs(actual_move) < (current_price * 0.001):
-                hits += 0.5
 
-            total += 1
-        except Exception:
-            continue
+def _masked_mean(values: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    counts = mask.sum(axis=0)
+    totals = np.where(mask, values, 0.0).sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, totals / np.maximum(counts, 1), np.nan)
 
-    if total == 0:
-        return 0.0
 
-    # Wynik w procentach
-    return round((hits / total) * 100, 1)
\ No newline at end of file
+def evaluate_paths(series: pd.Series, origins: list, predicted: np.ndarray, lower: np.ndarray = None,
+                   upper: np.ndarray = None) -> dict:
+    """
+    Miary błędu dla każdego kroku horyzontu (1..H) z macierzy prognoz (okna x H), bez pętli po oknach.
+    Krok k okna 'i' porównujemy z ceną z 'i + k'. Puste pola (NaN) nie wchodzą do średnich.
+    mae, rmse - w jednostkach ceny, mape i directional (jak calculate_confidence) - w %,
+    coverage - % cen w paśmie [dolne, górne] (tylko gdy podane pasma).
+    """
+    values = np.asarray(series.values, dtype=float)
+    origins = np.asarray(origins, dtype=np.int64)
+    horizon = predicted.shape[1]
+    current = values[origins][:, None]
+    actual = values[origins[:, None] + np.arange(1, horizon + 1)]
+
+    valid = ~np.isnan(predicted) & ~np.isnan(actual)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        error = predicted - actual
+        abs_error = np.abs(error)
+        pct_error = abs_error / np.abs(actual) * 100
+    steps = {
+        "mae": _masked_mean(abs_error, valid),
+        "rmse": np.sqrt(_masked_mean(error ** 2, valid)),
+        "mape": _masked_mean(pct_error, valid & (actual != 0)),
+        "directional": _masked_mean(direction_scores(current, actual, predicted) * 100, valid),
+        "coverage": None,
+    }
+    if lower is not None and upper is not None:
+        banded = valid & ~np.isnan(lower) & ~np.isnan(upper)
+        if banded.any():
+            with np.errstate(invalid="ignore"):
+                inside = ((actual >= lower) & (actual <= upper)) * 100.0
+            steps["coverage"] = _masked_mean(inside, banded)
+
+    def _round(array):
+        return [None if np.isnan(v) else round(float(v), 6) for v in array]
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # kolumny bez danych - średnia z NaN
+        summary = {name: (None if array is None or np.isnan(array).all() else round(float(np.nanmean(array)), 6))
+                   for name, array in steps.items()}
+    return {
+        "windows": int(len(origins)),
+        "evaluated": int(valid.any(axis=1).sum()),
+        "steps": list(range(1, horizon + 1)),
+        "per_step": {name: (None if array is None else _round(array)) for name, array in steps.items()},
+        "summary": summary,
+    }
@@ -0,0 +1,155 @@
+# core/batch.py
+"""
+Harmonogram zadań wsadowych (/predict/batch): wiele symboli x metod x interwałów w jednym zadaniu.
+
+- Grupowanie po symbolu: jedno pobranie danych (fetch_many - wiele symboli w jednym zapytaniu)
+  i jeden przebieg wskaźników na symbol/interwał, niezależnie od liczby metod.
+- Ograniczona współbieżność: najwyżej BATCH_CONCURRENCY grup liczonych naraz; dopasowania modeli
+  z tych grup trafiają do wspólnej puli procesów (ForecastExecutor).
+- Wyniki spływają w miarę kończenia grup (strumień NDJSON), zadanie pamięta je do odczytu.
+
+Konfiguracja (env): BATCH_CONCURRENCY, BATCH_FETCH_CHUNK, BATCH_MAX_JOBS
+"""
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+
+from fastapi.concurrency import run_in_threadpool
+
+from core import logger
+
+
+class BatchJob:
+    def __init__(self, tickers: list, intervals: list, params: dict):
+        self.id = uuid.uuid4().hex[:12]
+        self.tickers = tickers
+        self.intervals = intervals
+        self.params = params
+        self.total = len(tickers) * len(intervals)
+        self.results = []
+        self.errors = 0
+        self.created = time.time()
+        self.finished_at = None
+        self.changed = asyncio.Condition()
+        self.task = None
+
+    @property
+    def finished(self) -> bool:
+        return self.finished_at is not None
+
+    async def add_result(self, result: dict):
+        async with self.changed:
+            self.results.append(result)
+            if result.get("status") != "ok":
+                self.errors += 1
+            self.changed.notify_all()
+
+    async def finish(self):
+        async with self.changed:
+            self.finished_at = time.time()
+            self.changed.notify_all()
+
+    async def stream(self):
+        """Wyniki po kolei: najpierw gotowe, potem kolejne w miarę kończenia grup."""
+        sent = 0
+        while True:
+            async with self.changed:
+                await self.changed.wait_for(lambda: len(self.results) > sent or self.finished)
+                batch = self.results[sent:]
+                done = self.finished
+            for result in batch:
+                yield result
+            sent += len(batch)
+            if done and sent == len(self.results):
+                return
+
+    def status(self) -> dict:
+        elapsed = (self.finished_at or time.time()) - self.created
+        return {
+            "job_id": self.id,
+            "status": "done" if self.finished else "running",
+            "total": self.total,
+            "completed": len(self.results),
+            "errors": self.errors,
+            "elapsed": round(elapsed, 3),
+        }
+
+
+class BatchScheduler:
+    """
+    fetch_many(symbols, interval) -> {symbol: DataFrame}   (asynchroniczne)
+    process_group(ticker, interval, df, params) -> dict     (synchroniczne, liczone w wątku)
+    """
+
+    def __init__(self, fetch_many, process_group, concurrency: int = None, fetch_chunk: int = None,
+                 max_jobs: int = None):
+        self.fetch_many = fetch_many
+        self.process_group = process_group
+        self.concurrency = concurrency or int(os.getenv("BATCH_CONCURRENCY", max(os.cpu_count() or 1, 2)))
+        self.fetch_chunk = fetch_chunk or int(os.getenv("BATCH_FETCH_CHUNK", 50))
+        self.max_jobs = max_jobs or int(os.getenv("BATCH_MAX_JOBS", 50))
+        self._jobs = OrderedDict()
+
+    def submit(self, tickers: list, intervals: list, params: dict) -> BatchJob:
+        tickers = list(dict.fromkeys(t.upper() for t in tickers))
+        intervals = list(dict.fromkeys(intervals))
+        job = BatchJob(tickers, intervals, params)
+        self._jobs[job.id] = job
+        self._evict()
+        job.task = asyncio.get_running_loop().create_task(self._run(job))
+        logger.info(f"[BATCH] Zadanie {job.id}: {len(tickers)} symboli x {len(intervals)} interwałów")
+        return job
+
+    def get(self, job_id: str):
+        return self._jobs.get(job_id)
+
+    def _evict(self):
+        # Najstarsze zakończone zadania usuwamy, gdy jest ich za dużo
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.max_jobs:
+                break
+            if self._jobs[job_id].finished:
+                del self._jobs[job_id]
+
+    async def _run(self, job: BatchJob):
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run_group(ticker, interval, df):
+            async with semaphore:
+                try:
+                    result = await run_in_threadpool(self.process_group, ticker, interval, df, job.params)
+                except Exception as e:
+                    result = {"ticker": ticker, "interval": interval, "status": "error", "error": str(e)}
+            await job.add_result(result)
+
+        async def run_chunk(symbols, interval):
+            try:
+                frames = await self.fetch_many(symbols, interval)
+            except Exception as e:
+                frames, error = {}, str(e)
+            else:
+                error = "Brak danych"
+            groups = []
+            for ticker in symbols:
+                df = frames.get(ticker)
+                if df is None or df.empty:
+                    await job.add_result({"ticker": ticker, "interval": interval, "status": "error", "error": error})
+                else:
+                    groups.append(run_group(ticker, interval, df))
+            await asyncio.gather(*groups)
+
+        try:
+            # Pobieranie paczkami (jedno zapytanie na paczkę), obliczenia ruszają zaraz po nadejściu danych
+            await asyncio.gather(*(
+                run_chunk(job.tickers[i:i + self.fetch_chunk], interval)
+                for interval in job.intervals
+                for i in range(0, len(job.tickers), self.fetch_chunk)
+            ))
+        finally:
+            await job.finish()
+            status = job.status()
+            rate = status["completed"] / status["elapsed"] if status["elapsed"] else 0.0
+            logger.info(f"[BATCH] Zadanie {job.id} zakończone: {status['completed']}/{status['total']} "
+                        f"w {status['elapsed']:.1f}s ({rate:.1f} grup/s, błędy: {status['errors']})")
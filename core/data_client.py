@@ -1,31 +1,88 @@
 import os
+import asyncio
 import requests
 import pandas as pd
 import time
 from dotenv import load_dotenv
+from fastapi.concurrency import run_in_threadpool
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from core import logger
+from core.ohlc_store import OHLCStore, COLUMNS
+from core.rate_limit import CreditLimiter, RateLimitExceeded, PRIORITY_INTERACTIVE, PRIORITY_BATCH
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
 
 load_dotenv()
 
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Interwał Twelve Data -> częstotliwość pandas (df.attrs["freq"], bez pd.infer_freq w metodach)
+INTERVAL_FREQ = {
+    "1min": "1min", "5min": "5min", "15min": "15min", "30min": "30min", "45min": "45min",
+    "1h": "1h", "2h": "2h", "4h": "4h", "8h": "8h", "1day": "1D", "1week": "1W", "1month": "1MS",
+}
+
+
+def frame_freq(df: pd.DataFrame, interval: str):
+    """Częstotliwość ramki: ze słownika interwałów, dla nieznanych - wykrywana raz z ostatnich świeczek."""
+    freq = INTERVAL_FREQ.get(interval)
+    if freq is None and len(df) >= 3:
+        try:
+            freq = pd.infer_freq(df.index[-100:])
+        except (TypeError, ValueError):
+            freq = None
+    return freq
+
 
 class DataClient:
-    BASE_URL = "https://api.twelvedata.com"
+    BASE_URL = os.getenv("TWELVE_DATA_BASE_URL", "https://api.twelvedata.com")
     CSV_FILE = "selected_assets.csv"
     CACHE_TTL = 60
+    STORE_DIR = os.getenv("OHLC_STORE_DIR", os.path.join(PROJECT_ROOT, "data", "ohlc"))
+    HTTP_TIMEOUT = float(os.getenv("TWELVE_DATA_TIMEOUT", 10))
+    HTTP_RETRIES = int(os.getenv("TWELVE_DATA_RETRIES", 2))
+    HTTP_POOL_SIZE = int(os.getenv("TWELVE_DATA_POOL_SIZE", 20))
+    # 429 nie jest ponawiane - limit kredytów obsługuje CreditLimiter (core/rate_limit.py)
+    RETRY_STATUSES = (500, 502, 503, 504)
+    # Maksymalne oczekiwanie na kredyty [s]: interaktywnie bez danych lokalnych, interaktywnie gdy na dysku
+    # są starsze świeczki (po tym czasie odpowiadamy nimi), zadania wsadowe
+    RATE_LIMIT_WAIT = float(os.getenv("RATE_LIMIT_WAIT", 30))
+    RATE_LIMIT_STALE_WAIT = float(os.getenv("RATE_LIMIT_STALE_WAIT", 2))
+    RATE_LIMIT_BATCH_WAIT = float(os.getenv("RATE_LIMIT_BATCH_WAIT", 600))
 
-    def __init__(self):
+    def __init__(self, store_dir: str = None):
         self.api_key = os.getenv("TWELVE_DATA_API_KEY")
-        self.quota = {"limit": 800, "remaining": 800, "used": 0, "percent": 0}
+        # Kredyty API: kubełek żetonów z kolejką priorytetową, zużycie z nagłówków odpowiedzi
+        self.limiter = CreditLimiter()
         self._cache = {}
+        self.store = OHLCStore(store_dir or self.STORE_DIR)
         self.available_assets = self._load_assets_from_csv()
 
+        # Synchroniczna sesja z pulą połączeń (keep-alive) i ponawianiem
+        self._session = requests.Session()
+        retry = Retry(total=self.HTTP_RETRIES, backoff_factor=0.5, status_forcelist=self.RETRY_STATUSES,
+                      allowed_methods=["GET"], raise_on_status=False)
+        self._session.mount("https://", HTTPAdapter(pool_maxsize=self.HTTP_POOL_SIZE, max_retries=retry))
+        self._session.mount("http://", HTTPAdapter(pool_maxsize=self.HTTP_POOL_SIZE, max_retries=retry))
+
+        # Asynchroniczny klient (tworzony leniwie w pętli zdarzeń serwera) + zapytania w locie (single-flight)
+        self._async_client = None
+        self._async_loop = None
+        self._inflight = {}
+
+        # Słuchacze nowych świeczek (np. wskaźniki strumieniowe): fn(symbol, interwał, historia)
+        self._listeners = []
+
     def _load_assets_from_csv(self):
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        project_root = os.path.dirname(current_dir)
-        file_path = os.path.join(project_root, self.CSV_FILE)
+        file_path = os.path.join(PROJECT_ROOT, self.CSV_FILE)
 
         assets = []
         if not os.path.exists(file_path):
-            print("Brak pliku CSV! Uruchom generate_assets.py")
+            logger.warning("Brak pliku CSV! Uruchom generate_assets.py")
             return []
 
         try:
@@ -39,68 +96,439 @@ class DataClient:
                 })
             return assets
         except Exception as e:
-            print(f"Błąd CSV: {e}")
+            logger.error(f"Błąd CSV: {e}")
             return []
 
     def get_all_assets(self):
         return self.available_assets
 
-    def fetch_series(self, symbol: str, interval: str = "1day", outputsize: int = 500) -> pd.DataFrame:
-        clean_symbol = symbol.upper()
+    def add_listener(self, listener):
+        """Rejestruje funkcję wywoływaną po każdym dociągnięciu świeczek z API."""
+        self._listeners.append(listener)
+
+    def _notify(self, clean_symbol: str, interval: str, history: pd.DataFrame):
+        for listener in self._listeners:
+            try:
+                listener(clean_symbol, interval, history)
+            except Exception as e:
+                logger.warning(f"[API] Błąd słuchacza nowych danych: {e}")
+
+    @staticmethod
+    def _tag(df: pd.DataFrame, clean_symbol: str, interval: str) -> pd.DataFrame:
+        """
+        Symbol/interwał/częstotliwość w df.attrs - przechodzą na kolumny i wycinki
+        (ciepły start modeli per symbol, częstotliwość dla GARCH liczona raz na ramkę).
+        """
+        df.attrs["symbol"] = clean_symbol
+        df.attrs["interval"] = interval
+        df.attrs["freq"] = frame_freq(df, interval)
+        return df
+
+    def _local_series(self, clean_symbol: str, interval: str, outputsize: int):
+        """
+        Zwraca (świeże dane albo None, historia z dysku albo None).
+        Świeże = w cache pamięci lub na dysku odświeżone w ciągu CACHE_TTL (też przez inny proces).
+        """
         cache_key = f"{clean_symbol}_{interval}"
         current_time = time.time()
 
         if cache_key in self._cache:
             data, timestamp = self._cache[cache_key]
             if current_time - timestamp < self.CACHE_TTL:
-                return data
+                return data, None
             else:
-                print(f"[CACHE] Dane wygasły dla {clean_symbol}, odświeżam...")
+                logger.debug("[CACHE] Dane wygasły dla %s, odświeżam...", clean_symbol)
+
+        # Historia z dysku: przetrwała restart albo odświeżył ją przed chwilą inny proces
+        stored = self.store.load(clean_symbol, interval)
+        if stored is not None and current_time - self.store.fetched_at(clean_symbol, interval) < self.CACHE_TTL:
+            final_df = self._tag(stored.iloc[-outputsize:], clean_symbol, interval)
+            self._cache[cache_key] = (final_df, current_time)
+            return final_df, stored
+
+        return None, stored
 
-        params = {"symbol": clean_symbol, "interval": interval, "outputsize": outputsize, "apikey": self.api_key,
+    def _request_params(self, symbols: list, interval: str, outputsize: int, stored_frames: list) -> dict:
+        params = {"symbol": ",".join(symbols), "interval": interval, "outputsize": outputsize, "apikey": self.api_key,
                   "order": "ASC"}
-        print(f"[API] Pobieranie: {clean_symbol}")
+        if stored_frames and all(df is not None for df in stored_frames):
+            # Dociągamy tylko ogon: od ostatniej zapisanej świeczki (włącznie - mogła być niedomknięta)
+            last_known = min(df.index[-1] for df in stored_frames)
+            params["start_date"] = last_known.strftime("%Y-%m-%d %H:%M:%S")
+            logger.info(f"[API] Pobieranie: {params['symbol']} (od {params['start_date']})")
+        else:
+            logger.info(f"[API] Pobieranie: {params['symbol']}")
+        return params
 
+    def _apply_response(self, data: dict, clean_symbol: str, interval: str, outputsize: int, stored) -> pd.DataFrame:
+        if "values" not in data:
+            logger.error(f"[API ERROR] Response: {data}")
+            raise Exception("Brak danych w API")
+
+        fresh_df = self._parse_values(data["values"], clean_symbol)
+        history = self.store.merge(stored, fresh_df)
+        self.store.save(clean_symbol, interval, history)
+        self._notify(clean_symbol, interval, history)
+
+        final_df = self._tag(history.iloc[-outputsize:], clean_symbol, interval)
+        self._cache[f"{clean_symbol}_{interval}"] = (final_df, time.time())
+        return final_df
+
+    def _fallback(self, error: Exception, clean_symbol: str, interval: str, outputsize: int, stored) -> pd.DataFrame:
+        logger.warning(f"Błąd API: {error}")
+        cache_key = f"{clean_symbol}_{interval}"
+        if cache_key in self._cache:
+            logger.warning("[API] Używam starych danych z cache (Awaryjnie)")
+            return self._cache[cache_key][0]
+        if stored is not None:
+            logger.warning("[API] Używam danych z dysku (Awaryjnie)")
+            return self._tag(stored.iloc[-outputsize:], clean_symbol, interval)
+        raise error
+
+    def fetch_series(self, symbol: str, interval: str = "1day", outputsize: int = 500) -> pd.DataFrame:
+        clean_symbol = symbol.upper()
+        local_df, stored = self._local_series(clean_symbol, interval, outputsize)
+        if local_df is not None:
+            return local_df
+
+        # Kredyty przed blokadą plikową: czekanie na limit nie trzyma blokady, na którą czekają inne workery
+        wait = self._limit_wait(PRIORITY_INTERACTIVE, [stored])
+        deadline = time.monotonic() + wait
         try:
-            response = requests.get(f"{self.BASE_URL}/time_series", params=params)
-            data = response.json()
+            self.limiter.acquire(1, PRIORITY_INTERACTIVE, timeout=wait)
+        except RateLimitExceeded as e:
+            return self._fallback(e, clean_symbol, interval, outputsize, stored)
+
+        granted = 1
+        try:
+            with self.store.fetch_lock(clean_symbol, interval):
+                # W czasie oczekiwania na blokadę inny worker mógł już pobrać i zapisać te dane
+                local_df, stored = self._local_series(clean_symbol, interval, outputsize)
+                if local_df is not None:
+                    return local_df
 
-            if "values" not in data:
-                print(f"[API ERROR] Response: {data}")
-                raise Exception("Brak danych w API")
+                params = self._request_params([clean_symbol], interval, outputsize, [stored])
+                granted = 0  # od tej chwili kredyty rozlicza _get_json
+                try:
+                    data = self._get_json(params, 1, PRIORITY_INTERACTIVE, deadline - time.monotonic(), granted=True)
+                    return self._apply_response(data, clean_symbol, interval, outputsize, stored)
+                except Exception as e:
+                    return self._fallback(e, clean_symbol, interval, outputsize, stored)
+        finally:
+            self.limiter.refund(granted)
 
-            df = pd.DataFrame(data["values"])
+    # --- ASYNC: wspólna pula połączeń, timeouty, ponawianie i single-flight ---
 
-            # DIAGNOSTYKA: Sprawdźmy co przyszło
-            # print(f"[DEBUG] Kolumny z API dla {clean_symbol}: {df.columns.tolist()}")
+    def _get_async_client(self):
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            limits = httpx.Limits(max_connections=self.HTTP_POOL_SIZE, max_keepalive_connections=self.HTTP_POOL_SIZE)
+            self._async_client = httpx.AsyncClient(timeout=self.HTTP_TIMEOUT, limits=limits)
+            self._async_loop = loop
+        return self._async_client
 
-            df["datetime"] = pd.to_datetime(df["datetime"])
-            df.set_index("datetime", inplace=True)
+    async def aclose(self):
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+            self._async_loop = None
 
-            cols_to_keep = ["open", "high", "low", "close", "volume"]
+    def _limit_wait(self, priority: int, stored_frames: list) -> float:
+        """Ile czekać na kredyty: krótko, gdy użytkownik czeka, a na dysku są starsze dane do odpowiedzi awaryjnej."""
+        if priority == PRIORITY_BATCH:
+            return self.RATE_LIMIT_BATCH_WAIT
+        if stored_frames and all(df is not None for df in stored_frames):
+            return self.RATE_LIMIT_STALE_WAIT
+        return self.RATE_LIMIT_WAIT
 
-            for c in cols_to_keep:
-                if c in df.columns:
-                    df[c] = df[c].astype(float)
+    def _read_response(self, response, credits: int) -> dict:
+        """
+        JSON odpowiedzi (requests albo httpx) + rozliczenie kredytów: nagłówki api-credits-used / api-credits-left
+        korygują kubełek, odmowa limitem (HTTP 429 albo {"code": 429} w treści) blokuje go do końca minuty.
+        """
+        if response.status_code == 429:
+            self.limiter.exhausted(credits)
+            raise RateLimitExceeded("Limit kredytów API (429)", self.limiter.retry_after())
+        try:
+            data = response.json()
+        except ValueError:
+            self.limiter.release(credits)
+            raise
+        if isinstance(data, dict) and data.get("code") == 429:
+            self.limiter.exhausted(credits)
+            raise RateLimitExceeded(data.get("message", "Limit kredytów API (429)"), self.limiter.retry_after())
+        self.limiter.record(credits, response.headers.get("api-credits-used"), response.headers.get("api-credits-left"))
+        return data
 
-            if "volume" not in df.columns:
-                print(f"[API WARNING] Brak wolumenu dla {clean_symbol} (To normalne dla Forex/Indeksów)")
-                df["volume"] = 0.0
+    def _get_json(self, params: dict, credits: int, priority: int, wait: float, granted: bool = False) -> dict:
+        """
+        Zapytanie po przydziale kredytów (koszt = liczba symboli; granted - pierwszy przydział już pobrany).
+        Odmowa limitem po stronie serwera (np. kredyty zużył inny proces) - ponownie od kolejki,
+        dopóki starcza czasu 'wait'.
+        """
+        deadline = time.monotonic() + wait
+        while True:
+            if not granted:
+                self.limiter.acquire(credits, priority, timeout=deadline - time.monotonic())
+            granted = False
+            try:
+                response = self._session.get(f"{self.BASE_URL}/time_series", params=params, timeout=self.HTTP_TIMEOUT)
+            except requests.RequestException:
+                self.limiter.release(credits)
+                raise
+            try:
+                return self._read_response(response, credits)
+            except RateLimitExceeded:
+                logger.warning("[API] Serwer odrzucił zapytanie limitem kredytów - czekam na nową minutę")
 
-            final_df = df[cols_to_keep]
+    async def _get_json_async(self, params: dict, credits: int = 1, priority: int = PRIORITY_INTERACTIVE,
+                              wait: float = None, granted: bool = False) -> dict:
+        """Asynchroniczny odpowiednik _get_json."""
+        deadline = time.monotonic() + (self.RATE_LIMIT_WAIT if wait is None else wait)
+        while True:
+            if not granted:
+                await self.limiter.acquire_async(credits, priority, timeout=deadline - time.monotonic())
+            granted = False
+            try:
+                return await self._request_async(params, credits)
+            except RateLimitExceeded:
+                logger.warning("[API] Serwer odrzucił zapytanie limitem kredytów - czekam na nową minutę")
 
-            self._cache[cache_key] = (final_df, current_time)
+    async def _request_async(self, params: dict, credits: int) -> dict:
+        """
+        Jedno zapytanie z przydzielonymi już kredytami; ponowienia po 5xx nie pobierają nowych.
+        Bez httpx (opcjonalna zależność) - synchroniczna sesja requests (pula połączeń, ponawianie) w wątku.
+        """
+        if httpx is None:
+            try:
+                response = await run_in_threadpool(self._session.get, f"{self.BASE_URL}/time_series", params=params,
+                                                   timeout=self.HTTP_TIMEOUT)
+            except (requests.RequestException, asyncio.CancelledError):
+                self.limiter.release(credits)
+                raise
+            return self._read_response(response, credits)
 
-            return final_df
+        client = self._get_async_client()
+        try:
+            for attempt in range(self.HTTP_RETRIES + 1):
+                try:
+                    response = await client.get(f"{self.BASE_URL}/time_series", params=params)
+                    if response.status_code not in self.RETRY_STATUSES or attempt == self.HTTP_RETRIES:
+                        return self._read_response(response, credits)
+                except httpx.TransportError:
+                    if attempt == self.HTTP_RETRIES:
+                        raise
+                await asyncio.sleep(0.5 * (2 ** attempt))
+        except (httpx.HTTPError, asyncio.CancelledError):
+            self.limiter.release(credits)
+            raise
+
+    async def _apply_response_async(self, data: dict, clean_symbol: str, interval: str, outputsize: int,
+                                    stored) -> pd.DataFrame:
+        """_apply_response w wątku: parsowanie i przepisanie pliku .npy nie blokują pętli zdarzeń."""
+        return await run_in_threadpool(self._apply_response, data, clean_symbol, interval, outputsize, stored)
+
+    async def fetch_series_async(self, symbol: str, interval: str = "1day", outputsize: int = 500,
+                                 priority: int = PRIORITY_INTERACTIVE) -> pd.DataFrame:
+        """
+        Asynchroniczny odpowiednik fetch_series. Równoczesne zapytania o ten sam
+        symbol/interwał czekają na jedno wspólne pobranie (single-flight).
+        Bez kredytów API w dopuszczalnym czasie - starsze dane z cache/dysku albo RateLimitExceeded.
+        Kredyty pobierane są przed blokadą plikową (czekanie na limit nie trzyma blokady innym workerom),
+        a niewykorzystane - dane zapisał w międzyczasie inny proces - wracają do kubełka.
+        """
+        clean_symbol = symbol.upper()
+        flight_key = (clean_symbol, interval, outputsize)
+
+        inflight = self._inflight.get(flight_key)
+        while inflight is not None:
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise  # anulowano to zapytanie, nie wspólne pobranie
+                # Prowadzący pobranie został anulowany (np. rozłączony klient) - pobieramy sami
+                inflight = self._inflight.get(flight_key)
+
+        local_df, stored = self._local_series(clean_symbol, interval, outputsize)
+        if local_df is not None:
+            return local_df
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[flight_key] = future
+        try:
+            future.set_result(await self._fetch_one_async(clean_symbol, interval, outputsize, priority, stored))
         except Exception as e:
-            print(f"Błąd API: {e}")
-            if cache_key in self._cache:
-                print("[API] Używam starych danych z cache (Awaryjnie)")
-                return self._cache[cache_key][0]
-            raise e
+            future.set_exception(e)
+        finally:
+            self._inflight.pop(flight_key, None)
+            # Anulowanie (CancelledError to BaseException) - czekający nie mogą zostać z niedokończonym future
+            if not future.done():
+                future.cancel()
+
+        return await future
+
+    async def _fetch_one_async(self, clean_symbol: str, interval: str, outputsize: int, priority: int,
+                               stored) -> pd.DataFrame:
+        wait = self._limit_wait(priority, [stored])
+        deadline = time.monotonic() + wait
+        try:
+            await self.limiter.acquire_async(1, priority, timeout=wait)
+        except RateLimitExceeded as e:
+            return self._fallback(e, clean_symbol, interval, outputsize, stored)
+
+        granted = 1
+        try:
+            # Single-flight między procesami: blokada plikowa, potem ponowne sprawdzenie dysku
+            async with self.store.fetch_lock_async([clean_symbol], interval):
+                result, stored = self._local_series(clean_symbol, interval, outputsize)
+                if result is not None:
+                    return result
+                params = self._request_params([clean_symbol], interval, outputsize, [stored])
+                granted = 0  # od tej chwili kredyty rozlicza _get_json_async
+                try:
+                    data = await self._get_json_async(params, 1, priority, deadline - time.monotonic(), granted=True)
+                    return await self._apply_response_async(data, clean_symbol, interval, outputsize, stored)
+                except Exception as e:
+                    return self._fallback(e, clean_symbol, interval, outputsize, stored)
+        finally:
+            self.limiter.refund(granted)
+
+    async def fetch_many(self, symbols: list, interval: str = "1day", outputsize: int = 500,
+                         priority: int = PRIORITY_BATCH) -> dict:
+        """
+        Pobiera wiele symboli jednym zapytaniem (symbol=A,B,C; po najwyżej minutowy limit kredytów na zapytanie).
+        Symbole świeże lokalnie i te, które właśnie są pobierane, nie trafiają do zapytania. Zwraca {symbol: DataFrame}.
+        Domyślnie z priorytetem wsadowym - interaktywne /predict dostają kredyty przed nim.
+        """
+        loop = asyncio.get_running_loop()
+        results, waiting, pending, stored_frames = {}, {}, {}, {}
+
+        for symbol in dict.fromkeys(s.upper() for s in symbols):
+            flight_key = (symbol, interval, outputsize)
+            if flight_key in self._inflight:
+                waiting[symbol] = self._inflight[flight_key]
+                continue
+
+            local_df, stored = self._local_series(symbol, interval, outputsize)
+            if local_df is not None:
+                results[symbol] = local_df
+                continue
+
+            pending[symbol] = loop.create_future()
+            stored_frames[symbol] = stored
+            self._inflight[flight_key] = pending[symbol]
+
+        if pending:
+            try:
+                await self._fetch_pending(pending, stored_frames, interval, outputsize, priority)
+            finally:
+                for symbol in pending:
+                    self._inflight.pop((symbol, interval, outputsize), None)
+                    if not pending[symbol].done():
+                        pending[symbol].cancel()
+
+        for symbol, future in {**waiting, **pending}.items():
+            try:
+                try:
+                    results[symbol] = await asyncio.shield(future)
+                except asyncio.CancelledError:
+                    if symbol not in waiting or not future.cancelled():
+                        raise
+                    # Cudze pobieranie zostało anulowane - ten symbol pobieramy sami
+                    results[symbol] = await self.fetch_series_async(symbol, interval, outputsize, priority)
+            except Exception as e:
+                logger.warning(f"[API] Pominięto {symbol}: {e}")
+
+        return results
+
+    async def _fetch_pending(self, pending: dict, stored_frames: dict, interval: str, outputsize: int, priority: int):
+        """Zapytania dla symboli z 'pending', wyniki trafiają do ich future."""
+        # Zapytanie o N symboli kosztuje N kredytów - grupy mieszczące się w minutowym limicie
+        names, size = list(pending), self.limiter.capacity
+        await asyncio.gather(*(self._fetch_chunk(names[i:i + size], pending, stored_frames, interval, outputsize,
+                                                 priority) for i in range(0, len(names), size)))
+
+    async def _fetch_chunk(self, names: list, pending: dict, stored_frames: dict, interval: str, outputsize: int,
+                           priority: int):
+        """Jak _fetch_one_async dla grupy: kredyty, potem blokady grupy i ponowne sprawdzenie dysku."""
+        wait = self._limit_wait(priority, [stored_frames[s] for s in names])
+        deadline = time.monotonic() + wait
+        try:
+            await self.limiter.acquire_async(len(names), priority, timeout=wait)
+        except RateLimitExceeded as e:
+            await self._resolve_chunk(names, {}, e, pending, stored_frames, interval, outputsize)
+            return
+
+        granted = len(names)
+        try:
+            async with self.store.fetch_lock_async(names, interval):
+                fetch = []
+                for symbol in names:
+                    # Inny worker mógł pobrać część symboli, gdy czekaliśmy na kredyty i blokady
+                    local_df, stored_frames[symbol] = self._local_series(symbol, interval, outputsize)
+                    if local_df is not None:
+                        pending[symbol].set_result(local_df)
+                    else:
+                        fetch.append(symbol)
+                self.limiter.refund(granted - len(fetch))
+                granted = len(fetch)
+                if not fetch:
+                    return
+
+                params = self._request_params(fetch, interval, outputsize, [stored_frames[s] for s in fetch])
+                granted = 0  # od tej chwili kredyty rozlicza _get_json_async
+                per_symbol, error = {}, None
+                try:
+                    data = await self._get_json_async(params, len(fetch), priority, deadline - time.monotonic(),
+                                                      granted=True)
+                    # Dla jednego symbolu API zwraca płaską odpowiedź, dla wielu - słownik po symbolach
+                    per_symbol = {fetch[0]: data} if len(fetch) == 1 else data
+                except Exception as e:
+                    error = e
+                await self._resolve_chunk(fetch, per_symbol, error, pending, stored_frames, interval, outputsize)
+        finally:
+            self.limiter.refund(granted)
+
+    async def _resolve_chunk(self, names: list, per_symbol: dict, error, pending: dict, stored_frames: dict,
+                             interval: str, outputsize: int):
+        for symbol in names:
+            stored = stored_frames[symbol]
+            try:
+                if error is not None:
+                    raise error
+                df = await self._apply_response_async(per_symbol.get(symbol, {}), symbol, interval, outputsize,
+                                                      stored)
+            except Exception as e:
+                try:
+                    df = self._fallback(e, symbol, interval, outputsize, stored)
+                except Exception as final_error:
+                    pending[symbol].set_exception(final_error)
+                    continue
+            pending[symbol].set_result(df)
+
+    def _parse_values(self, values: list, clean_symbol: str) -> pd.DataFrame:
+        df = pd.DataFrame(values)
+
+        # DIAGNOSTYKA: Sprawdźmy co przyszło
+        # print(f"[DEBUG] Kolumny z API dla {clean_symbol}: {df.columns.tolist()}")
+
+        df["datetime"] = pd.to_datetime(df["datetime"])
+        df.set_index("datetime", inplace=True)
+
+        for c in COLUMNS:
+            if c in df.columns:
+                df[c] = df[c].astype(float)
+
+        if "volume" not in df.columns:
+            logger.debug("[API] Brak wolumenu dla %s (To normalne dla Forex/Indeksów)", clean_symbol)
+            df["volume"] = 0.0
+
+        return df[COLUMNS].sort_index()
 
     def get_quota(self):
-        return self.quota
+        """Zużycie kredytów: dzienne (limit/remaining/used/percent) + bieżąca minuta z nagłówków API."""
+        return self.limiter.snapshot()
 
 
 client = DataClient()
\ No newline at end of file
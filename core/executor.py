@@ -0,0 +1,502 @@
+# core/executor.py
+import os
+import time
+import threading
+import itertools
+import multiprocessing
+from queue import Empty
+from weakref import WeakKeyDictionary
+from concurrent.futures import CancelledError, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from core import logger, metrics
+
+from core.backtester import (backtest_origins, calculate_confidence, confidence_from_predictions, evaluate_paths,
+                             path_matrix, refit_paths, walk_forward_forecasts, walk_forward_paths)
+
+CPU_COUNT = os.cpu_count() or 1
+# Workery uvicorn dzielą rdzenie: każdy dostaje swoją część na pulę procesów
+WEB_WORKERS = max(1, int(os.getenv("WEB_CONCURRENCY", 1)))
+
+# Okna ewaluacji w jednym fragmencie (zadaniu puli). Stała, niezależna od liczby procesów: w trybie walk_forward
+# model dopasowuje się na początku fragmentu, więc podział wpływa na wynik - ten sam na każdej maszynie.
+BACKTEST_CHUNK = max(1, int(os.getenv("BACKTEST_CHUNK", 25)))
+
+# Limit wątków natywnych (XGBoost, BLAS) w jednym procesie. -1 = bez limitu (tryb bez puli).
+_THREAD_BUDGET = -1
+# Kolejka zdarzeń procesu roboczego do procesu głównego: (id zadania, "start", czas) - początek limitu czasu
+# zadania, (id zadania, "progress", (etap, krok, z ilu, dane)) - postęp dla kanału SSE żądania
+_EVENTS = None
+_TASK_ID = None
+
+# Zmienne czytane przez biblioteki wątków natywnych przy ich ładowaniu (numpy/BLAS, OpenMP)
+THREAD_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+
+# Co ile sekund oczekiwanie na wynik sprawdza, które zadania puli już wystartowały (początek ich limitu czasu)
+TASK_POLL = 0.1
+
+
+def thread_budget() -> int:
+    """Ile wątków może użyć metoda w bieżącym procesie (np. n_jobs dla XGBoost)."""
+    return _THREAD_BUDGET
+
+
+def _init_worker(threads: int, events):
+    """
+    Inicjalizacja procesu roboczego: budżet wątków dla metod (n_jobs) i przekazywanie postępu (logger.progress)
+    do procesu głównego. Zmienne THREAD_VARS ustawia proces główny przed startem puli - tu byłoby za późno,
+    bo rozpakowanie tej funkcji importuje już numpy.
+    """
+    global _THREAD_BUDGET, _EVENTS
+    _THREAD_BUDGET = threads
+    _EVENTS = events
+    logger.set_progress_sink(_forward_progress)
+
+
+def _forward_progress(stage: str, step, total, data: dict):
+    _EVENTS.put((_TASK_ID, "progress", (stage, step, total, data)))
+
+
+# --- ZADANIA URUCHAMIANE W PROCESACH ROBOCZYCH ---
+# Każde zwraca (wynik, czas obliczeń [s], wpisy dziennika) - histogramy, 'timings' i dziennik zapisuje proces główny
+
+def _run_task(task_id: int, task, *args):
+    global _TASK_ID
+    _TASK_ID = task_id
+    _EVENTS.put((task_id, "start", time.time()))
+    return task(*args)
+
+
+def _timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    with logger.capture() as records:
+        result = func(*args, **kwargs)
+    return result, time.perf_counter() - start, records
+
+
+def _forecast_task(func, series, horizon):
+    return _timed(func, series, horizon=horizon)
+
+
+def _window_task(func, series, horizon):
+    # Pojedyncze okno backtestu: dane tylko do punktu startowego, zwracamy ostatni punkt prognozy
+    return _timed(lambda: float(func(series, horizon=horizon).iloc[-1]))
+
+
+def _walk_forward_task(walk_forward, series, horizon, origins, training):
+    return _timed(walk_forward_forecasts, walk_forward, series, horizon, origins, training)
+
+
+def _walk_forward_paths_task(walk_forward, series, horizon, origins, training):
+    return _timed(walk_forward_paths, walk_forward, series, horizon, origins, training)
+
+
+def _refit_paths_task(func, series, horizon, origins, training):
+    return _timed(refit_paths, func, series, horizon, origins, training)
+
+
+class MethodOutcome:
+    def __init__(self, method, forecast=None, confidence: float = 0.0, error: str = None):
+        self.method = method
+        self.forecast = forecast
+        self.confidence = confidence
+        self.error = error
+
+
+class BacktestOutcome:
+    def __init__(self, method, mode: str, report: dict = None, failed: int = 0, errors: list = None,
+                 error: str = None):
+        self.method = method
+        self.mode = mode  # 'walk_forward' albo 'refit'
+        self.report = report
+        self.failed = failed  # okna bez prognozy
+        self.errors = errors or []
+        self.error = error
+
+    def as_dict(self) -> dict:
+        return {"key": self.method.key, "method": self.method.name, "mode": self.mode, "failed_windows": self.failed,
+                "errors": self.errors[:5], "error": self.error, **(self.report or {})}
+
+
+class ForecastExecutor:
+    """
+    Warstwa równoległego wykonania metod prognozowania.
+    Każda metoda i każde okno backtestu to osobne zadanie w puli procesów,
+    wyniki zbierane są w kolejności zgłoszenia.
+
+    Konfiguracja (env):
+      FORECAST_WORKERS            - liczba procesów (0/1 = wykonanie w bieżącym procesie),
+                                    domyślnie rdzenie / WEB_CONCURRENCY
+      FORECAST_TASK_TIMEOUT       - limit czasu pojedynczego zadania [s], liczony od jego startu w procesie
+                                    (nie od zgłoszenia); zadanie po limicie zatrzymuje procesy swojej puli
+      FORECAST_THREADS_PER_WORKER - limit wątków natywnych na proces (domyślnie rdzenie / procesy)
+      BACKTEST_CHUNK              - okna ewaluacji (/backtest) w jednym fragmencie / zadaniu puli
+    """
+
+    def __init__(self, max_workers: int = None, task_timeout: float = None, threads_per_worker: int = None):
+        self.max_workers = max_workers if max_workers is not None else int(os.getenv("FORECAST_WORKERS", CPU_COUNT // WEB_WORKERS))
+        self.task_timeout = task_timeout if task_timeout is not None else float(os.getenv("FORECAST_TASK_TIMEOUT", 120))
+        if threads_per_worker is None:
+            threads_per_worker = int(os.getenv("FORECAST_THREADS_PER_WORKER", 0)) or CPU_COUNT // max(self.max_workers, 1)
+        self.threads_per_worker = max(1, threads_per_worker)
+        self._pool = None
+        self._events = None  # kolejka zdarzeń procesów bieżącej puli
+        self._lock = threading.Lock()
+        # Zadania puli: future -> [id, pula, kolejka zdarzeń puli, moment startu (monotonic) albo None,
+        #                          identyfikator żądania, etykiety postępu]; wpis znika razem z future
+        self._tasks = WeakKeyDictionary()
+        self._task_ids = itertools.count()
+
+    @property
+    def parallel(self) -> bool:
+        return self.max_workers > 1
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # Procesy 'spawn' dziedziczą środowisko z chwili startu (startują przy zgłoszeniach, nie tylko tu).
+                # Proces główny przy puli nie liczy metod, więc limit wątków mu nie przeszkadza.
+                for var in THREAD_VARS:
+                    os.environ[var] = str(self.threads_per_worker)
+                # 'spawn' - świeże procesy bez odziedziczonych wątków/OpenMP (fork + OpenMP potrafi się zawiesić)
+                context = multiprocessing.get_context("spawn")
+                self._events = context.Queue()
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=context,
+                    initializer=_init_worker,
+                    initargs=(self.threads_per_worker, self._events)
+                )
+                logger.info(f"[EXECUTOR] Pula procesów: {self.max_workers} x {self.threads_per_worker} wątków")
+            return self._pool
+
+    def recycle(self):
+        """Nowa pula przy następnym zadaniu (np. po przeładowaniu metod - procesy mają stary kod w pamięci).
+        Zadania w toku kończą się w starej puli."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
+            logger.info("[EXECUTOR] Pula procesów odświeżona")
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def _discard(self, pool, terminate: bool = False):
+        """Usuwa uszkodzoną pulę (tylko tę - inne żądanie mogło już utworzyć nową); terminate zatrzymuje procesy."""
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        if terminate:
+            # cancel() nie przerywa działającego zadania - jedyny sposób to zatrzymanie procesu
+            # (ProcessPoolExecutor nie ma na to API przed Pythonem 3.14). Zadania w toku w tej puli
+            # kończą się BrokenProcessPool.
+            for process in list((getattr(pool, "_processes", None) or {}).values()):
+                process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, pool, task, *args, progress: dict = None):
+        """Zadanie puli; 'progress' - etykiety zdarzeń postępu zadania (np. method=...), None = bez postępu."""
+        with self._lock:
+            task_id, events = next(self._task_ids), self._events
+        try:
+            future = pool.submit(_run_task, task_id, task, *args)
+        except RuntimeError as e:
+            # Pula zamknięta w międzyczasie (limit czasu zadania, recycle) - dla wywołującego to samo co uszkodzona
+            self._discard(pool)
+            if isinstance(e, BrokenProcessPool):
+                raise
+            raise BrokenProcessPool(f"Pula procesów zamknięta: {e}") from e
+        with self._lock:
+            self._tasks[future] = [task_id, pool, events, None, logger.request_id_var.get(), progress]
+        return future
+
+    def _drain_events(self):
+        """
+        Zdarzenia z procesów roboczych: start zadania (future.running() obejmuje też kolejkę wywołań puli,
+        więc moment startu zgłasza proces) i postęp - przekazywany do kanału żądania, które zgłosiło zadanie.
+        """
+        updates = []
+        with self._lock:
+            tasks = {task[0]: task for task in self._tasks.values()}
+            for queue in {id(task[2]): task[2] for task in tasks.values()}.values():
+                while True:
+                    try:
+                        task_id, kind, payload = queue.get_nowait()
+                    except (Empty, OSError, ValueError):
+                        break
+                    task = tasks.get(task_id)
+                    if task is None:
+                        continue
+                    if kind == "start":
+                        task[3] = time.monotonic() - max(0.0, time.time() - payload)
+                    elif task[5] is not None:
+                        updates.append((task[4], task[5], payload))
+        for request_id, labels, (stage, step, total, data) in updates:
+            logger.progress(stage, step, total, request_id=request_id, **{**data, **labels})
+
+    def _result(self, future):
+        """
+        Wynik zadania puli: (wynik, czas obliczeń), dziennik zadania trafia do bieżącego żądania.
+        Limit task_timeout biegnie od startu zadania - czekanie w kolejce puli (inne metody, okna) go nie zużywa.
+        TimeoutError - zadanie przekroczyło limit (jego pula jest zatrzymana). BrokenProcessPool - pula zadania
+        przestała działać (padł proces albo limit czasu innego zadania w tej puli, także innego żądania);
+        _get_pool() daje już nową pulę.
+        """
+        while True:
+            self._drain_events()
+            task = self._tasks.get(future)
+            remaining = TASK_POLL
+            if task is not None and task[3] is not None and not future.done():
+                remaining = task[3] + self.task_timeout - time.monotonic()
+                if remaining <= 0:
+                    logger.error(f"[EXECUTOR] Zadanie przekroczyło limit {self.task_timeout}s - zatrzymuję procesy puli")
+                    self._discard(task[1], terminate=True)
+                    raise TimeoutError(f"Przekroczono limit {self.task_timeout}s")
+            try:
+                result, seconds, records = future.result(timeout=min(remaining, TASK_POLL))
+            except FutureTimeout:
+                continue
+            except (BrokenProcessPool, CancelledError) as e:
+                # Zatrzymana pula anuluje zadania czekające w kolejce (cancel_futures) - to też utrata puli
+                if task is not None:
+                    self._discard(task[1])
+                if isinstance(e, BrokenProcessPool):
+                    raise
+                raise BrokenProcessPool("Pula procesów zatrzymana przed startem zadania") from e
+            logger.replay(records)
+            return result, seconds
+
+    def run_methods(self, methods: list, series, horizon: int, lookback_windows: int = 20,
+                    training: dict = None) -> list:
+        """
+        Prognoza + backtest dla każdej metody. Zwraca listę MethodOutcome w kolejności 'methods'.
+        training - {klucz metody: TrainingWindow} (domyślnie okno ze specyfikacji metody).
+        """
+        windows = {method.key: (training or {}).get(method.key, method.training) for method in methods}
+        if not self.parallel:
+            outcomes = []
+            for method in methods:
+                outcomes.append(self._run_inline(method, series, horizon, lookback_windows, windows[method.key]))
+                logger.progress("method", len(outcomes), len(methods), method=method.key)
+            return outcomes
+
+        outcomes = []
+        try:
+            self._run_pool(methods, series, horizon, lookback_windows, windows, outcomes)
+        except BrokenProcessPool as e:
+            # Nowa pula też nie przyjęła zadań - gotowe wyniki zostają, pozostałe metody z błędem
+            logger.error(f"[EXECUTOR] Pula procesów uszkodzona: {e}")
+            outcomes.extend(MethodOutcome(method, error=str(e)) for method in methods[len(outcomes):])
+        return outcomes
+
+    def run_backtest(self, method, series, horizon: int, origins: list, training=None,
+                     mode: str = "auto") -> BacktestOutcome:
+        """
+        Ewaluacja walk-forward jednej metody: prognozy z każdego punktu startowego 'origins' -> macierz
+        (okna x horyzont) -> miary per krok horyzontu (evaluate_paths).
+        mode: 'walk_forward' - dopasowanie raz na fragment i dokładanie świeczek (gdy metoda to wspiera),
+              'refit' - pełne dopasowanie na okno (pasma niepewności -> coverage), 'auto' - walk_forward, gdy można.
+        Okna dzielone są na ciągłe fragmenty po BACKTEST_CHUNK (także bez puli - te same wyniki) liczone
+        równolegle w puli; w trybie walk_forward każdy fragment dopasowuje model raz, na swoim pierwszym oknie.
+        """
+        training = training or method.training
+        use_walk_forward = mode != "refit" and method.walk_forward is not None
+        kind = "walk_forward" if use_walk_forward else "refit"
+        chunks = self._backtest_chunks(origins)
+        paths, bands, errors = {}, {}, []
+        pool = self._get_pool() if self.parallel else None
+
+        def add_refit(result):
+            paths.update(result[0])
+            bands.update(result[1])
+            errors.extend(result[2])
+
+        def walk_forward_failed(e):
+            # Jak w calculate_confidence: przy błędzie walk-forward pełne dopasowania, ale błąd zostaje w raporcie
+            errors.append(f"walk_forward: {type(e).__name__}: {e}")
+
+        try:
+            if not self.parallel:
+                for done, chunk in enumerate(chunks, 1):
+                    start = time.perf_counter()
+                    try:
+                        if use_walk_forward:
+                            paths.update(walk_forward_paths(method.walk_forward, series, horizon, chunk, training))
+                        else:
+                            add_refit(refit_paths(method.func, series, horizon, chunk, training))
+                    except Exception as e:
+                        walk_forward_failed(e)
+                        add_refit(refit_paths(method.func, series, horizon, chunk, training))
+                    metrics.observe("evaluate", time.perf_counter() - start, method=method.key)
+                    logger.progress("evaluate", done, len(chunks), method=method.key)
+            else:
+                task = _walk_forward_paths_task if use_walk_forward else _refit_paths_task
+                func = method.walk_forward if use_walk_forward else method.func
+                futures = [(chunk, self._submit(pool, task, func, series, horizon, chunk, training)) for chunk in chunks]
+                retries = []  # fragmenty po nieudanym walk-forward - pełne dopasowania też w puli
+                done = 0
+                for chunk, future in futures:
+                    try:
+                        result, seconds = self._result(future)
+                    except BrokenProcessPool:
+                        raise
+                    except Exception as e:
+                        if not use_walk_forward:
+                            raise
+                        walk_forward_failed(e)
+                        # Po limicie czasu pula jest zatrzymana - pełne dopasowania do bieżącej puli
+                        retries.append(self._submit(self._get_pool(), _refit_paths_task, method.func, series,
+                                                    horizon, chunk, training))
+                        continue
+                    metrics.observe("evaluate", seconds, method=method.key)
+                    if use_walk_forward:
+                        paths.update(result)
+                    else:
+                        add_refit(result)
+                    done += 1
+                    logger.progress("evaluate", done, len(chunks), method=method.key)
+                for future in retries:
+                    result, seconds = self._result(future)
+                    metrics.observe("evaluate", seconds, method=method.key)
+                    add_refit(result)
+                    done += 1
+                    logger.progress("evaluate", done, len(chunks), method=method.key)
+        except BrokenProcessPool as e:
+            logger.error(f"[EXECUTOR] Pula procesów uszkodzona: {e}")
+            self._discard(pool)
+            return BacktestOutcome(method, kind, error=str(e))
+        except Exception as e:
+            return BacktestOutcome(method, kind, error=f"{type(e).__name__}: {e}")
+
+        predicted = path_matrix(paths, origins, horizon)
+        lower = upper = None
+        if bands:
+            lower = path_matrix({i: band[0] for i, band in bands.items()}, origins, horizon)
+            upper = path_matrix({i: band[1] for i, band in bands.items()}, origins, horizon)
+        report = evaluate_paths(series, origins, predicted, lower, upper)
+        return BacktestOutcome(method, kind, report, failed=len(origins) - len(paths), errors=errors)
+
+    @staticmethod
+    def _backtest_chunks(origins: list) -> list:
+        """Ciągłe fragmenty po BACKTEST_CHUNK okien - niezależnie od liczby procesów."""
+        return [origins[k:k + BACKTEST_CHUNK] for k in range(0, len(origins), BACKTEST_CHUNK)]
+
+    def _run_inline(self, method, series, horizon: int, lookback_windows: int, training) -> MethodOutcome:
+        try:
+            with metrics.span("backtest", method=method.key):
+                confidence = calculate_confidence(method.func, series, horizon, lookback_windows,
+                                                  walk_forward=method.walk_forward, training=training)
+            with metrics.span("forecast", method=method.key):
+                forecast = method.func(training.apply(series), horizon=horizon)
+            return MethodOutcome(method, forecast, confidence)
+        except Exception as e:
+            return MethodOutcome(method, error=str(e))
+
+    def _submit_windows(self, pool, method, series, horizon: int, origins: list, training) -> dict:
+        return {i: self._submit(pool, _window_task, method.func, training.window(series, i), horizon) for i in origins}
+
+    def _submit_method(self, pool, method, series, horizon: int, origins: list, training) -> tuple:
+        """Zadania jednej metody: prognoza + walk-forward albo okna backtestu. Zwraca (pula, prognoza, wf, okna)."""
+        # Do procesów wysyłamy tylko okno treningowe - mniej danych do serializacji
+        forecast_future = self._submit(pool, _forecast_task, method.func, training.apply(series), horizon)
+        walk_forward_future = None
+        window_futures = {}
+        if origins and method.walk_forward is not None:
+            walk_forward_future = self._submit(pool, _walk_forward_task, method.walk_forward, series, horizon,
+                                               origins, training, progress={"method": method.key})
+        elif origins:
+            window_futures = self._submit_windows(pool, method, series, horizon, origins, training)
+        return pool, forecast_future, walk_forward_future, window_futures
+
+    def _collect_method(self, method, series, horizon: int, origins: list, training, tasks: tuple) -> MethodOutcome:
+        """
+        Wynik metody z jej zadań puli. Błąd zadania - także przekroczony limit czasu - kończy tylko tę metodę
+        (MethodOutcome z błędem); BrokenProcessPool przechodzi dalej (utrata całej puli).
+        """
+        pool, forecast_future, walk_forward_future, window_futures = tasks
+        pending = [walk_forward_future, *window_futures.values()]
+        try:
+            forecast, seconds = self._result(forecast_future)
+            metrics.observe("forecast", seconds, method=method.key)
+
+            predictions = None
+            if walk_forward_future is not None:
+                try:
+                    predictions, seconds = self._result(walk_forward_future)
+                    metrics.observe("backtest", seconds, method=method.key)
+                except BrokenProcessPool:
+                    raise
+                except Exception as e:
+                    # Jak w calculate_confidence: fallback na pełne dopasowania (tu już równolegle). Po limicie
+                    # czasu pula zgłoszenia jest zatrzymana - okna idą do bieżącej puli
+                    logger.warning(f"[BACKTEST] Walk-forward nieudany ({e}), przechodzę na pełne dopasowania")
+                    window_futures = self._submit_windows(self._get_pool(), method, series, horizon, origins, training)
+                    pending = list(window_futures.values())
+
+            if predictions is None:
+                predictions = {}
+                busy = 0.0  # suma czasu obliczeń okien (liczonych równolegle)
+                for done, (i, future) in enumerate(window_futures.items(), 1):
+                    try:
+                        predictions[i], seconds = self._result(future)
+                        busy += seconds
+                    except (BrokenProcessPool, TimeoutError):
+                        raise  # limit czasu zatrzymał pulę - pozostałe okna i tak przepadły
+                    except Exception:
+                        continue
+                    finally:
+                        logger.progress("backtest", done, len(window_futures), method=method.key)
+                if window_futures:
+                    metrics.observe("backtest", busy, method=method.key)
+            elif origins:
+                logger.progress("backtest", len(origins), len(origins), method=method.key)
+        except BrokenProcessPool:
+            raise
+        except Exception as e:
+            for future in pending:
+                if future is not None:
+                    future.cancel()
+            return MethodOutcome(method, error=str(e))
+
+        confidence = confidence_from_predictions(series, horizon, predictions) if origins else 0.0
+        return MethodOutcome(method, forecast, confidence)
+
+    def _run_pool(self, methods: list, series, horizon: int, lookback_windows: int, windows: dict,
+                  outcomes: list):
+        """Dokłada do 'outcomes' wyniki metod w kolejności 'methods' (gotowe zostają, gdy pula padnie)."""
+        enough_data = len(series) >= 50 + horizon + lookback_windows
+        origins = backtest_origins(len(series), horizon, lookback_windows) if enough_data else []
+
+        # 1. Rozsyłamy wszystkie zadania naraz: prognozy + okna backtestu wszystkich metod
+        pool = self._get_pool()
+        submitted = [self._submit_method(pool, method, series, horizon, origins, windows[method.key])
+                     for method in methods]
+
+        # 2. Zbieramy w kolejności zgłoszenia
+        retried = set()
+        while len(outcomes) < len(methods):
+            k = len(outcomes)
+            method = methods[k]
+            try:
+                outcome = self._collect_method(method, series, horizon, origins, windows[method.key], submitted[k])
+            except BrokenProcessPool as e:
+                if k in retried:
+                    logger.error(f"[EXECUTOR] Pula procesów uszkodzona: {e}")
+                    outcome = MethodOutcome(method, error=str(e))
+                else:
+                    # Pula zatrzymana (limit czasu zadania, też innego żądania) albo padł proces roboczy:
+                    # ta metoda i dalsze z tej samej puli - raz jeszcze w nowej puli
+                    logger.warning(f"[EXECUTOR] Pula procesów przerwana ({e}) - ponawiam metody w nowej puli")
+                    broken, pool = submitted[k][0], self._get_pool()
+                    for j in range(k, len(methods)):
+                        if submitted[j][0] is broken:
+                            submitted[j] = self._submit_method(pool, methods[j], series, horizon, origins,
+                                                               windows[methods[j].key])
+                            retried.add(j)
+                    continue
+            outcomes.append(outcome)
+            logger.progress("method", len(outcomes), len(methods), method=method.key,
+                            **({"error": outcome.error} if outcome.error else {}))
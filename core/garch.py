@@ -0,0 +1,100 @@
+# core/garch.py
+"""
+GARCH(1,1) ze stałą średnią na surowych tablicach NumPy (backend 'numpy' dla metody ARIMA-GARCH).
+Te same założenia co arch_model(mean='Constant', vol='Garch', p=1, q=1, dist='Normal'):
+backcast wariancji z pierwszych 75 reszt (wagi 0.94^i), gaussowska funkcja wiarygodności, SLSQP.
+
+Rekurencja wariancji  s2[t] = omega + alpha * e[t-1]^2 + beta * s2[t-1]  liczona filtrem IIR
+(scipy.signal.lfilter) - jedno wywołanie w C na całą serię zamiast pętli w Pythonie.
+"""
+import numpy as np
+from scipy.optimize import minimize
+from scipy.signal import lfilter
+
+_LOG_2PI = np.log(2 * np.pi)
+_PERSISTENCE_JAC = np.array([0.0, 0.0, -1.0, -1.0])
+
+
+def backcast(resids: np.ndarray) -> float:
+    tau = min(75, len(resids))
+    weights = 0.94 ** np.arange(tau)
+    return float(np.sum(resids[:tau] ** 2 * weights) / weights.sum())
+
+
+def variance_path(resids: np.ndarray, omega: float, alpha: float, beta: float, start: float) -> np.ndarray:
+    """Wariancje warunkowe s2[0..n-1]; s2[0] = omega + (alpha + beta) * start."""
+    shocks = np.empty(len(resids))
+    shocks[0] = omega + alpha * start
+    shocks[1:] = omega + alpha * resids[:-1] ** 2
+    # s2[t] - beta * s2[t-1] = shocks[t], stan początkowy beta * start
+    sigma2, _ = lfilter([1.0], [1.0, -beta], shocks, zi=[beta * start])
+    return sigma2
+
+
+def _neg_loglik(params: np.ndarray, returns: np.ndarray, start: float):
+    """
+    Ujemna log-wiarygodność i jej gradient. Pochodne s2 po (mu, omega, alpha, beta) spełniają tę samą
+    rekurencję co s2 (z innym wymuszeniem) - cztery filtry IIR w jednym wywołaniu lfilter(axis=1).
+    Analityczny gradient: kilkanaście ewaluacji SLSQP zamiast ~120 przy różnicach skończonych.
+    """
+    mu, omega, alpha, beta = params
+    resids = returns - mu
+    sigma2 = variance_path(resids, omega, alpha, beta, start)
+    if np.any(sigma2 <= 0):
+        return np.inf, np.zeros(4)
+
+    forcing = np.empty((4, len(resids)))
+    forcing[0, 0], forcing[0, 1:] = 0.0, -2.0 * alpha * resids[:-1]
+    forcing[1] = 1.0
+    forcing[2, 0], forcing[2, 1:] = start, resids[:-1] ** 2
+    forcing[3, 0], forcing[3, 1:] = start, sigma2[:-1]
+    derivatives = lfilter([1.0], [1.0, -beta], forcing, axis=1)
+
+    ratio = resids ** 2 / sigma2
+    weights = 0.5 * (1.0 - ratio) / sigma2
+    grad = derivatives @ weights
+    grad[0] -= float(np.sum(resids / sigma2))
+    return 0.5 * float(np.sum(_LOG_2PI + np.log(sigma2) + ratio)), grad
+
+
+class GarchFit:
+    def __init__(self, mu: float, omega: float, alpha: float, beta: float, last_resid: float, last_sigma2: float):
+        self.mu = mu
+        self.omega = omega
+        self.alpha = alpha
+        self.beta = beta
+        self.last_resid = last_resid
+        self.last_sigma2 = last_sigma2
+
+    @property
+    def persistence(self) -> float:
+        return self.alpha + self.beta
+
+    def variance_forecast(self, horizon: int) -> np.ndarray:
+        """Wariancje kroków 1..horizon: s2[T+k] = omega + (alpha + beta) * s2[T+k-1] (postać zamknięta)."""
+        first = self.omega + self.alpha * self.last_resid ** 2 + self.beta * self.last_sigma2
+        persistence = self.persistence
+        if abs(1.0 - persistence) < 1e-12:
+            return first + self.omega * np.arange(horizon)
+        long_run = self.omega / (1.0 - persistence)
+        return long_run + persistence ** np.arange(horizon) * (first - long_run)
+
+
+def fit_garch(returns: np.ndarray) -> GarchFit:
+    """Estymacja MLE (mu, omega, alpha, beta) z ograniczeniami omega > 0, alpha, beta >= 0, alpha + beta < 1."""
+    returns = np.asarray(returns, dtype=float)
+    mean, var = returns.mean(), returns.var()
+    start = backcast(returns - mean)
+
+    x0 = np.array([mean, 0.1 * var, 0.1, 0.8])
+    scale = np.sqrt(var) or 1.0
+    bounds = [(-10 * scale, 10 * scale), (1e-8 * var, 10 * var), (0.0, 1.0), (0.0, 1.0)]
+    constraints = [{"type": "ineq", "fun": lambda p: 0.99999 - p[2] - p[3], "jac": lambda p: _PERSISTENCE_JAC}]
+
+    result = minimize(_neg_loglik, x0, args=(returns, start), jac=True, method="SLSQP", bounds=bounds,
+                      constraints=constraints, options={"maxiter": 200, "ftol": 1e-9})
+    mu, omega, alpha, beta = result.x
+
+    resids = returns - mu
+    sigma2 = variance_path(resids, omega, alpha, beta, start)
+    return GarchFit(mu, omega, alpha, beta, float(resids[-1]), float(sigma2[-1]))
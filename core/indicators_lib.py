@@ -1,12 +1,52 @@
 # core/indicators_lib.py
-import pandas_ta as ta
+import os
+import numpy as np
+import pandas as pd
+from core import indicators_numpy as inp
+from core import logger, metrics
+
+# Backend obliczeń: 'pandas_ta' (domyślny) albo 'numpy' (wbudowany, bez importu pandas_ta)
+INDICATORS_BACKEND = os.getenv("INDICATORS_BACKEND", "pandas_ta")
+ANY_BACKEND = "*"
+
+_ta = None
+_ta_missing = False
+
+
+def _pandas_ta():
+    """Leniwy import pandas_ta (ciężki) - tylko gdy backend go potrzebuje."""
+    global _ta
+    if _ta is None:
+        import pandas_ta
+        _ta = pandas_ta
+    return _ta
+
+
+def resolve_backend(backend=None):
+    """Wybrany backend; bez zainstalowanego pandas_ta przechodzimy na numpy."""
+    global _ta_missing
+    backend = backend or INDICATORS_BACKEND
+    if backend == "pandas_ta" and not _ta_missing:
+        try:
+            _pandas_ta()
+        except ImportError:
+            _ta_missing = True
+            logger.info("[INDICATORS] Brak biblioteki 'pandas_ta' - używam backendu numpy")
+    return "numpy" if backend == "pandas_ta" and _ta_missing else backend
 
 # --- REJESTR WSKAŹNIKÓW ---
 INDICATORS_REGISTRY = {}
 
-def register_indicator(name, type='overlay', color='#ffffff', panel=None, viz_type='line'):
+# --- REJESTR WĘZŁÓW WSPÓLNYCH (EMA, średnie/odchylenia kroczące, MACD...) ---
+# nazwa -> {backend: funkcja}
+INDICATOR_NODES = {}
+
+
+def register_indicator(name, type='overlay', color='#ffffff', panel=None, viz_type='line', parent=None):
     """
     Dekorator rejestrujący wskaźnik.
+    parent - wskaźnik główny dla wyjść pomocniczych (np. MACD_Signal -> MACD):
+    żądanie wskaźnika głównego zwraca też wszystkie jego wyjścia.
     """
     def decorator(func):
         INDICATORS_REGISTRY[name] = {
@@ -17,72 +57,186 @@ def register_indicator(name, type='overlay', color='#ffffff', panel=None, viz_ty
                 "type": type,
                 "color": color,
                 "panel_id": panel,
-                "viz_type": viz_type
+                "viz_type": viz_type,
+                "parent": parent
             }
         }
         return func
     return decorator
 
+
+def register_node(name, backend=ANY_BACKEND):
+    """Dekorator rejestrujący węzeł pośredni, współdzielony przez wiele wskaźników."""
+    def decorator(func):
+        INDICATOR_NODES.setdefault(name, {})[backend] = func
+        return func
+    return decorator
+
+
+class IndicatorContext:
+    """
+    Kontekst obliczeń dla jednego żądania: każdy węzeł (np. EMA 12) liczony jest raz
+    i współdzielony przez wszystkie wskaźniki, które go potrzebują.
+    """
+
+    def __init__(self, df, backend=None):
+        self.df = df
+        self.backend = resolve_backend(backend)
+        self._values = {}
+        self._arrays = {}
+
+    def column(self, name) -> np.ndarray:
+        """Kolumna jako tablica float64 (dla backendu numpy)."""
+        if name not in self._arrays:
+            self._arrays[name] = np.asarray(self.df[name].values, dtype=float)
+        return self._arrays[name]
+
+    def node(self, name, *params):
+        key = (name,) + params
+        if key not in self._values:
+            impls = INDICATOR_NODES[name]
+            func = impls.get(self.backend) or impls[ANY_BACKEND]
+            self._values[key] = func(self, *params)
+        return self._values[key]
+
+
+# --- WĘZŁY WSPÓLNE: pandas_ta ---
+
+@register_node("sma", backend="pandas_ta")
+def node_sma(ctx, length):
+    return ctx.df["close"].rolling(length, min_periods=length).mean()
+
+@register_node("rolling_std", backend="pandas_ta")
+def node_rolling_std(ctx, length):
+    # ddof=0 - tak jak pandas_ta.bbands
+    return ctx.df["close"].rolling(length, min_periods=length).std(ddof=0)
+
+@register_node("ema", backend="pandas_ta")
+def node_ema(ctx, length):
+    _pandas_ta()
+    return ctx.df.ta.ema(length=length)
+
+@register_node("macd", backend="pandas_ta")
+def node_macd(ctx, fast, slow, signal):
+    # Jak pandas_ta.macd, ale z EMA współdzielonymi z wskaźnikami EMA 12 / EMA 26
+    macd = ctx.node("ema", fast) - ctx.node("ema", slow)
+    first_valid = macd.first_valid_index()
+    if first_valid is None:
+        return None
+    signal_line = _pandas_ta().ema(close=macd.loc[first_valid:], length=signal).reindex(macd.index)
+    return {"macd": macd, "signal": signal_line, "hist": macd - signal_line}
+
+@register_node("rsi", backend="pandas_ta")
+def node_rsi(ctx, length):
+    _pandas_ta()
+    return ctx.df.ta.rsi(length=length)
+
+@register_node("supertrend", backend="pandas_ta")
+def node_supertrend(ctx, length, multiplier):
+    _pandas_ta()
+    st = ctx.df.ta.supertrend(length=length, multiplier=multiplier)
+    return st.iloc[:, 0] if st is not None else None
+
+@register_node("psar", backend="pandas_ta")
+def node_psar(ctx):
+    _pandas_ta()
+    psar = ctx.df.ta.psar()
+    if psar is not None:
+        # PSAR zwraca osobne kolumny dla long/short, trzeba je scalić
+        return psar.iloc[:, 0].fillna(psar.iloc[:, 1])
+    return None
+
+# --- WĘZŁY WSPÓLNE: numpy (core/indicators_numpy.py) ---
+
+@register_node("sma", backend="numpy")
+def node_sma_np(ctx, length):
+    return inp.sma(ctx.column("close"), length)
+
+@register_node("rolling_std", backend="numpy")
+def node_rolling_std_np(ctx, length):
+    return inp.rolling_std(ctx.column("close"), length)
+
+@register_node("ema", backend="numpy")
+def node_ema_np(ctx, length):
+    return inp.ema(ctx.column("close"), length)
+
+@register_node("macd", backend="numpy")
+def node_macd_np(ctx, fast, slow, signal):
+    return inp.macd(ctx.column("close"), fast, slow, signal,
+                    fast_ema=ctx.node("ema", fast), slow_ema=ctx.node("ema", slow))
+
+@register_node("rsi", backend="numpy")
+def node_rsi_np(ctx, length):
+    return inp.rsi(ctx.column("close"), length)
+
+@register_node("supertrend", backend="numpy")
+def node_supertrend_np(ctx, length, multiplier):
+    return inp.supertrend(ctx.column("high"), ctx.column("low"), ctx.column("close"), length, multiplier)
+
+@register_node("psar", backend="numpy")
+def node_psar_np(ctx):
+    return inp.psar(ctx.column("high"), ctx.column("low"), ctx.column("close"))
+
+# --- WĘZŁY WSPÓLNE: niezależne od backendu ---
+
+@register_node("bbands")
+def node_bbands(ctx, length, std):
+    mid = ctx.node("sma", length)
+    dev = ctx.node("rolling_std", length)
+    return {"lower": mid - std * dev, "mid": mid, "upper": mid + std * dev}
+
 # --- 1. WSKAŹNIKI NAKŁADANE (OVERLAYS) ---
 
 @register_indicator("SMA 20", type='overlay', color='#2962ff')
-def calc_sma_20(df): return df.ta.sma(length=20)
+def calc_sma_20(ctx): return ctx.node("sma", 20)
 
 @register_indicator("SMA 50", type='overlay', color='#ff6d00')
-def calc_sma_50(df): return df.ta.sma(length=50)
+def calc_sma_50(ctx): return ctx.node("sma", 50)
 
 @register_indicator("SMA 200", type='overlay', color='#e91e63')
-def calc_sma_200(df): return df.ta.sma(length=200)
+def calc_sma_200(ctx): return ctx.node("sma", 200)
 
 @register_indicator("EMA 12", type='overlay', color='#2196f3')
-def calc_ema_12(df): return df.ta.ema(length=12)
+def calc_ema_12(ctx): return ctx.node("ema", 12)
 
 @register_indicator("EMA 26", type='overlay', color='#4caf50')
-def calc_ema_26(df): return df.ta.ema(length=26)
+def calc_ema_26(ctx): return ctx.node("ema", 26)
 
 @register_indicator("EMA 50", type='overlay', color='#ff6d00') # Dodano brakujące EMA 50 używane w main.py
-def calc_ema_50(df): return df.ta.ema(length=50)
+def calc_ema_50(ctx): return ctx.node("ema", 50)
 
 @register_indicator("Bollinger Bands", type='overlay', color='#9c27b0')
-def calc_bbands(df):
-    # Zwracamy środkową linię lub górną - tu przykład Upper
-    bb = df.ta.bbands(length=20, std=2)
-    return bb.iloc[:, 0] if bb is not None else None
+def calc_bbands(ctx):
+    # Dolna wstęga (pierwsza kolumna pandas_ta.bbands); średnia i odchylenie wspólne z SMA 20
+    return ctx.node("bbands", 20, 2)["lower"]
 
 @register_indicator("SuperTrend", type='overlay', color='#00e676')
-def calc_supertrend(df):
-    st = df.ta.supertrend(length=7, multiplier=3)
-    return st.iloc[:, 0] if st is not None else None
+def calc_supertrend(ctx): return ctx.node("supertrend", 7, 3)
 
 @register_indicator("Parabolic SAR", type='overlay', color='#ffffff')
-def calc_psar(df):
-    psar = df.ta.psar()
-    if psar is not None:
-        # PSAR zwraca osobne kolumny dla long/short, trzeba je scalić
-        return psar.iloc[:, 0].fillna(psar.iloc[:, 1])
-    return None
+def calc_psar(ctx): return ctx.node("psar")
 
 # --- 2. WSKAŹNIKI PANELOWE (PANELS) ---
 
 @register_indicator("RSI 14", type='panel', color='#7e57c2', panel='rsi_panel')
-def calc_rsi(df):
-    return df.ta.rsi(length=14)
+def calc_rsi(ctx):
+    return ctx.node("rsi", 14)
 
-# --- GRUPA MACD ---
+# --- GRUPA MACD (jeden węzeł, trzy wyjścia) ---
 @register_indicator("MACD", type='panel', color='#2962ff', panel='macd_panel')
-def calc_macd_main(df):
-    macd = df.ta.macd(fast=12, slow=26, signal=9)
-    return macd.iloc[:, 0] if macd is not None else None
+def calc_macd_main(ctx):
+    macd = ctx.node("macd", 12, 26, 9)
+    return macd["macd"] if macd is not None else None
 
-@register_indicator("MACD_Signal", type='panel', color='#ff6d00', panel='macd_panel')
-def calc_macd_signal(df):
-    macd = df.ta.macd(fast=12, slow=26, signal=9)
-    return macd.iloc[:, 2] if macd is not None else None
+@register_indicator("MACD_Signal", type='panel', color='#ff6d00', panel='macd_panel', parent="MACD")
+def calc_macd_signal(ctx):
+    macd = ctx.node("macd", 12, 26, 9)
+    return macd["signal"] if macd is not None else None
 
-@register_indicator("MACD_Hist", type='panel', color='#26a69a', panel='macd_panel', viz_type='histogram')
-def calc_macd_hist(df):
-    macd = df.ta.macd(fast=12, slow=26, signal=9)
-    return macd.iloc[:, 1] if macd is not None else None
+@register_indicator("MACD_Hist", type='panel', color='#26a69a', panel='macd_panel', viz_type='histogram', parent="MACD")
+def calc_macd_hist(ctx):
+    macd = ctx.node("macd", 12, 26, 9)
+    return macd["hist"] if macd is not None else None
 
 # --- PUBLICZNE API BIBLIOTEKI ---
 
@@ -90,12 +244,39 @@ def get_indicators_metadata():
     """Zwraca listę metadanych dla API."""
     return [item["meta"] for item in INDICATORS_REGISTRY.values()]
 
-def calculate_indicator(name, df):
+def expand_indicator_names(names):
+    """Dokłada wyjścia pomocnicze (np. MACD -> MACD_Signal, MACD_Hist) zaraz po wskaźniku głównym."""
+    expanded = []
+    for name in names:
+        if name in expanded:
+            continue
+        expanded.append(name)
+        expanded.extend(key for key, item in INDICATORS_REGISTRY.items()
+                        if item["meta"]["parent"] == name and key not in expanded)
+    return expanded
+
+def calculate_indicator(name, df, ctx=None):
     """Wykonuje obliczenia dla danej nazwy."""
     if name in INDICATORS_REGISTRY:
         try:
-            return INDICATORS_REGISTRY[name]["func"](df)
+            res = INDICATORS_REGISTRY[name]["func"](ctx or IndicatorContext(df))
+            if isinstance(res, np.ndarray):
+                # Backend numpy: ten sam kontrakt co pandas_ta (seria z indeksem czasu)
+                res = pd.Series(res, index=df.index, name=name)
+            return res
         except Exception as e:
-            print(f"Error calculating {name}: {e}")
+            logger.error(f"Error calculating {name}: {e}")
             return None
-    return None
\ No newline at end of file
+    return None
+
+def calculate_indicators(names, df, backend=None):
+    """Liczy wiele wskaźników we wspólnym kontekście (wspólne węzły liczone raz)."""
+    ctx = IndicatorContext(df, backend)
+    results = {}
+    for name in expand_indicator_names(names):
+        # Czas wspólnego węzła (np. EMA 12) przypada na pierwszy wskaźnik, który go potrzebuje
+        with metrics.span("indicator", name=name):
+            res = calculate_indicator(name, df, ctx)
+        if res is not None:
+            results[name] = res
+    return results
@@ -0,0 +1,186 @@
+# core/indicators_numpy.py
+"""
+Wskaźniki na surowych tablicach NumPy (backend 'numpy' dla indicators_lib).
+Wyniki zgodne z pandas_ta (te same wzory i rozgrzewka), bez narzutu akcesorów DataFrame.
+Wszystkie funkcje przyjmują i zwracają np.ndarray float64; NaN = brak wartości (rozgrzewka).
+"""
+import numpy as np
+
+_SCAN_BLOCK = 64
+
+
+def _decay_scan(x: np.ndarray, decay: float, s0: float = 0.0) -> np.ndarray:
+    """
+    s[t] = decay * s[t-1] + x[t], s[-1] = s0 - rekurencja liniowa liczona blokami bez pętli po elementach.
+    W bloku: macierz potęg decay (dolnotrójkątna), między blokami przenosimy tylko stan końcowy.
+    """
+    n = len(x)
+    if n == 0:
+        return np.empty(0)
+
+    block = min(_SCAN_BLOCK, n)
+    pad = (-n) % block
+    xb = np.concatenate([x, np.zeros(pad)]).reshape(-1, block)
+
+    k = np.arange(block)
+    lags = k[:, None] - k[None, :]
+    weights = np.where(lags >= 0, decay ** np.maximum(lags, 0), 0.0)
+    powers = decay ** (k + 1)
+
+    # Odpowiedź każdego bloku przy zerowym stanie początkowym - jedno mnożenie macierzy
+    local = xb @ weights.T
+
+    # Stan wejściowy bloków: krótka pętla po blokach (n / 64 iteracji)
+    carry = np.empty(len(xb))
+    state = s0
+    for b in range(len(xb)):
+        carry[b] = state
+        state = powers[-1] * state + local[b, -1]
+
+    return (local + carry[:, None] * powers[None, :]).ravel()[:n]
+
+
+def sma(x: np.ndarray, length: int) -> np.ndarray:
+    out = np.full(len(x), np.nan)
+    if len(x) < length:
+        return out
+    # Suma kumulacyjna od przesuniętych wartości - mniejszy błąd zaokrągleń przy dużych cenach
+    base = x[0]
+    csum = np.concatenate(([0.0], np.cumsum(x - base)))
+    out[length - 1:] = (csum[length:] - csum[:-length]) / length + base
+    return out
+
+
+def rolling_std(x: np.ndarray, length: int) -> np.ndarray:
+    """Odchylenie kroczące ddof=0 (jak pandas_ta.bbands)."""
+    out = np.full(len(x), np.nan)
+    if len(x) < length:
+        return out
+    out[length - 1:] = np.lib.stride_tricks.sliding_window_view(x, length).std(axis=1)
+    return out
+
+
+def ema(x: np.ndarray, length: int) -> np.ndarray:
+    """EMA jak pandas_ta: start od SMA pierwszych 'length' wartości, dalej alpha = 2 / (length + 1)."""
+    out = np.full(len(x), np.nan)
+    valid = np.flatnonzero(~np.isnan(x))
+    if len(valid) < length:
+        return out
+
+    start = valid[0]
+    values = x[start:]
+    alpha = 2.0 / (length + 1)
+    seed = values[:length].mean()
+
+    out[start + length - 1] = seed
+    out[start + length:] = _decay_scan(alpha * values[length:], 1.0 - alpha, seed)
+    return out
+
+
+def rma(x: np.ndarray, length: int) -> np.ndarray:
+    """Średnia Wildera jak pandas_ta.rma: ewm(alpha=1/length, adjust=True, min_periods=length)."""
+    out = np.full(len(x), np.nan)
+    valid = np.flatnonzero(~np.isnan(x))
+    if len(valid) < length:
+        return out
+
+    start = valid[0]
+    decay = 1.0 - 1.0 / length
+    values = x[start:]
+    # adjust=True: średnia ważona wagami decay^i = licznik / mianownik, oba jako rekurencja
+    numerator = _decay_scan(values, decay)
+    denominator = _decay_scan(np.ones(len(values)), decay)
+    out[start:] = numerator / denominator
+    out[start:start + length - 1] = np.nan
+    return out
+
+
+def rsi(close: np.ndarray, length: int = 14) -> np.ndarray:
+    diff = np.concatenate(([np.nan], np.diff(close)))
+    positive = rma(np.where(np.isnan(diff), np.nan, np.clip(diff, 0, None)), length)
+    negative = rma(np.where(np.isnan(diff), np.nan, -np.clip(diff, None, 0)), length)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return 100 * positive / (positive + np.abs(negative))
+
+
+def macd(close: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9, fast_ema=None, slow_ema=None) -> dict:
+    line = (fast_ema if fast_ema is not None else ema(close, fast)) - \
+           (slow_ema if slow_ema is not None else ema(close, slow))
+    signal_line = ema(line, signal)
+    return {"macd": line, "signal": signal_line, "hist": line - signal_line}
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    prev_close = np.concatenate(([np.nan], close[:-1]))
+    tr = np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+    tr[0] = np.nan
+    return tr
+
+
+def supertrend(high: np.ndarray, low: np.ndarray, close: np.ndarray, length: int = 7, multiplier: float = 3.0) -> np.ndarray:
+    """Linia SuperTrend (pierwsza kolumna pandas_ta.supertrend). Pasma ATR wektorowo, zapadka w jednej pętli."""
+    hl2 = (high + low) / 2
+    matr = multiplier * rma(true_range(high, low, close), length)
+    upper = (hl2 + matr).tolist()
+    lower = (hl2 - matr).tolist()
+    closes = close.tolist()
+
+    n = len(closes)
+    trend = [np.nan] * n
+    direction = 1
+    for i in range(1, n):
+        if closes[i] > upper[i - 1]:
+            direction = 1
+        elif closes[i] < lower[i - 1]:
+            direction = -1
+        else:
+            if direction > 0 and lower[i] < lower[i - 1]:
+                lower[i] = lower[i - 1]
+            if direction < 0 and upper[i] > upper[i - 1]:
+                upper[i] = upper[i - 1]
+        trend[i] = lower[i] if direction > 0 else upper[i]
+
+    return np.array(trend)
+
+
+def psar(high: np.ndarray, low: np.ndarray, close: np.ndarray, af0: float = 0.02, max_af: float = 0.2) -> np.ndarray:
+    """Parabolic SAR (long i short scalone) - ten sam przebieg co pandas_ta.psar."""
+    highs, lows = high.tolist(), low.tolist()
+    n = len(highs)
+    out = [np.nan] * n
+    if n < 2:
+        return np.array(out)
+
+    up, dn = highs[1] - highs[0], lows[0] - lows[1]
+    falling = dn > up and dn > 0
+    sar = close[0]
+    ep = lows[0] if falling else highs[0]
+    af = af0
+
+    for row in range(1, n):
+        high_, low_ = highs[row], lows[row]
+        _sar = sar + af * (ep - sar)
+        # Indeks row - 2 dla row = 1 wskazuje ostatni element - jak w pandas_ta (zgodność wyników)
+        if falling:
+            reverse = high_ > _sar
+            if low_ < ep:
+                ep = low_
+                af = min(af + af0, max_af)
+            _sar = max(highs[row - 1], highs[row - 2], _sar)
+        else:
+            reverse = low_ < _sar
+            if high_ > ep:
+                ep = high_
+                af = min(af + af0, max_af)
+            _sar = min(lows[row - 1], lows[row - 2], _sar)
+
+        if reverse:
+            _sar = ep
+            af = af0
+            falling = not falling
+            ep = low_ if falling else high_
+
+        sar = _sar
+        out[row] = sar
+
+    return np.array(out)
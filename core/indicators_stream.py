@@ -0,0 +1,455 @@
+# core/indicators_stream.py
+"""
+Wskaźniki strumieniowe: stan budowany raz na symbol/interwał i aktualizowany w O(1) na świeczkę.
+Wzory i rozgrzewka jak w indicators_numpy / pandas_ta, więc wartości pokrywają się z obliczeniem od zera -
+poza PSAR (patrz PSARState), który na początku serii może się różnić od obu backendów.
+Stany nie zależą od INDICATORS_BACKEND, dlatego w /predict są domyślnie wyłączone (INDICATORS_STREAMING=0).
+Zgodność z wybranym backendem: python -m benchmarks.bench_indicators --stream
+"""
+import math
+import os
+import threading
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+# Wskaźniki w /predict ze stanów strumieniowych (1) albo liczone od zera backendem INDICATORS_BACKEND (0)
+INDICATORS_STREAMING = os.getenv("INDICATORS_STREAMING", "0") == "1"
+
+NAN = float("nan")
+
+
+class EMAState:
+    """EMA jak pandas_ta: pierwsza wartość = SMA z 'length' świeczek, dalej rekurencja."""
+    outputs = ("value",)
+
+    def __init__(self, length: int):
+        self.length = length
+        self.alpha = 2.0 / (length + 1)
+        self.count = 0
+        self.seed_sum = 0.0
+        self.value = NAN
+
+    def push(self, x: float) -> float:
+        self.count += 1
+        if self.count < self.length:
+            self.seed_sum += x
+        elif self.count == self.length:
+            self.value = (self.seed_sum + x) / self.length
+        else:
+            self.value += self.alpha * (x - self.value)
+        return self.value
+
+    def update(self, o, h, l, c) -> dict:
+        return {"value": self.push(c)}
+
+    def snapshot(self) -> dict:
+        return {"count": self.count, "seed_sum": self.seed_sum, "value": self.value}
+
+    def restore(self, state: dict):
+        self.count, self.seed_sum, self.value = state["count"], state["seed_sum"], state["value"]
+
+
+class RMAState:
+    """Średnia Wildera jak pandas_ta.rma: ewm(alpha=1/length, adjust=True, min_periods=length)."""
+
+    def __init__(self, length: int):
+        self.length = length
+        self.decay = 1.0 - 1.0 / length
+        self.count = 0
+        self.numerator = 0.0
+        self.denominator = 0.0
+
+    def push(self, x: float) -> float:
+        self.count += 1
+        self.numerator = self.decay * self.numerator + x
+        self.denominator = self.decay * self.denominator + 1.0
+        return self.numerator / self.denominator if self.count >= self.length else NAN
+
+    def snapshot(self) -> dict:
+        return {"count": self.count, "numerator": self.numerator, "denominator": self.denominator}
+
+    def restore(self, state: dict):
+        self.count, self.numerator, self.denominator = state["count"], state["numerator"], state["denominator"]
+
+
+class RollingWindowState:
+    """Bufor pierścieniowy z sumami bieżącymi: SMA i odchylenie (ddof=0) w O(1)."""
+    outputs = ("mean", "std")
+    RESYNC_EVERY = 1000  # co tyle świeczek sumy liczone od nowa z bufora (dryf zaokrągleń)
+
+    def __init__(self, length: int):
+        self.length = length
+        self.buffer = deque(maxlen=length)
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.count = 0
+
+    def update(self, o, h, l, c) -> dict:
+        if len(self.buffer) == self.length:
+            old = self.buffer[0]
+            self.total -= old
+            self.total_sq -= old * old
+        self.buffer.append(c)
+        self.total += c
+        self.total_sq += c * c
+        self.count += 1
+
+        if self.count % self.RESYNC_EVERY == 0:
+            self.total = math.fsum(self.buffer)
+            self.total_sq = math.fsum(x * x for x in self.buffer)
+
+        if len(self.buffer) < self.length:
+            return {"mean": NAN, "std": NAN}
+        mean = self.total / self.length
+        return {"mean": mean, "std": math.sqrt(max(self.total_sq / self.length - mean * mean, 0.0))}
+
+    def snapshot(self) -> dict:
+        return {"buffer": list(self.buffer), "count": self.count}
+
+    def restore(self, state: dict):
+        self.buffer = deque(state["buffer"], maxlen=self.length)
+        self.count = state["count"]
+        self.total = math.fsum(self.buffer)
+        self.total_sq = math.fsum(x * x for x in self.buffer)
+
+
+class RSIState:
+    outputs = ("value",)
+
+    def __init__(self, length: int):
+        self.positive = RMAState(length)
+        self.negative = RMAState(length)
+        self.prev_close = None
+
+    def update(self, o, h, l, c) -> dict:
+        if self.prev_close is None:
+            self.prev_close = c
+            return {"value": NAN}
+        diff = c - self.prev_close
+        self.prev_close = c
+        pos = self.positive.push(max(diff, 0.0))
+        neg = self.negative.push(max(-diff, 0.0))
+        if math.isnan(pos) or pos + neg == 0:
+            return {"value": NAN}
+        return {"value": 100 * pos / (pos + neg)}
+
+    def snapshot(self) -> dict:
+        return {"positive": self.positive.snapshot(), "negative": self.negative.snapshot(), "prev_close": self.prev_close}
+
+    def restore(self, state: dict):
+        self.positive.restore(state["positive"])
+        self.negative.restore(state["negative"])
+        self.prev_close = state["prev_close"]
+
+
+class MACDState:
+    outputs = ("macd", "signal", "hist")
+
+    def __init__(self, fast: int, slow: int, signal: int):
+        self.fast = EMAState(fast)
+        self.slow = EMAState(slow)
+        self.signal = EMAState(signal)
+
+    def update(self, o, h, l, c) -> dict:
+        line = self.fast.push(c) - self.slow.push(c)
+        if math.isnan(line):
+            return {"macd": NAN, "signal": NAN, "hist": NAN}
+        signal_line = self.signal.push(line)
+        return {"macd": line, "signal": signal_line, "hist": line - signal_line}
+
+    def snapshot(self) -> dict:
+        return {"fast": self.fast.snapshot(), "slow": self.slow.snapshot(), "signal": self.signal.snapshot()}
+
+    def restore(self, state: dict):
+        self.fast.restore(state["fast"])
+        self.slow.restore(state["slow"])
+        self.signal.restore(state["signal"])
+
+
+class SuperTrendState:
+    outputs = ("value",)
+
+    def __init__(self, length: int, multiplier: float):
+        self.multiplier = multiplier
+        self.atr = RMAState(length)
+        self.prev_close = None
+        self.upper = NAN
+        self.lower = NAN
+        self.direction = 1
+
+    def update(self, o, h, l, c) -> dict:
+        first = self.prev_close is None
+        if first:
+            atr = NAN
+        else:
+            tr = max(h - l, abs(h - self.prev_close), abs(l - self.prev_close))
+            atr = self.atr.push(tr)
+        self.prev_close = c
+
+        hl2 = (h + l) / 2
+        upper = hl2 + self.multiplier * atr
+        lower = hl2 - self.multiplier * atr
+        if first:
+            self.upper, self.lower = upper, lower
+            return {"value": NAN}
+
+        # Porównania z NaN są fałszywe - tak jak w wersji wsadowej
+        if c > self.upper:
+            self.direction = 1
+        elif c < self.lower:
+            self.direction = -1
+        else:
+            if self.direction > 0 and lower < self.lower:
+                lower = self.lower
+            if self.direction < 0 and upper > self.upper:
+                upper = self.upper
+
+        self.upper, self.lower = upper, lower
+        return {"value": lower if self.direction > 0 else upper}
+
+    def snapshot(self) -> dict:
+        return {"atr": self.atr.snapshot(), "prev_close": self.prev_close, "upper": self.upper,
+                "lower": self.lower, "direction": self.direction}
+
+    def restore(self, state: dict):
+        self.atr.restore(state["atr"])
+        self.prev_close, self.upper, self.lower = state["prev_close"], state["upper"], state["lower"]
+        self.direction = state["direction"]
+
+
+class PSARState:
+    """
+    Parabolic SAR jak pandas_ta.psar. Jedyna różnica: na drugiej świeczce pandas_ta sięga po
+    ostatni element całej serii (indeks -1), a strumień zna tylko dwie pierwsze świeczki.
+    """
+    outputs = ("value",)
+
+    def __init__(self, af0: float = 0.02, max_af: float = 0.2):
+        self.af0 = af0
+        self.max_af = max_af
+        self.highs = deque(maxlen=2)
+        self.lows = deque(maxlen=2)
+        self.first_close = None
+        self.sar = self.ep = NAN
+        self.af = af0
+        self.falling = False
+
+    def update(self, o, h, l, c) -> dict:
+        if not self.highs:
+            self.highs.append(h)
+            self.lows.append(l)
+            self.first_close = c
+            return {"value": NAN}
+
+        if len(self.highs) == 1:
+            up, dn = h - self.highs[0], self.lows[0] - l
+            self.falling = dn > up and dn > 0
+            self.sar = self.first_close
+            self.ep = self.lows[0] if self.falling else self.highs[0]
+            prev2_high, prev2_low = h, l
+        else:
+            prev2_high, prev2_low = self.highs[0], self.lows[0]
+
+        _sar = self.sar + self.af * (self.ep - self.sar)
+        if self.falling:
+            reverse = h > _sar
+            if l < self.ep:
+                self.ep = l
+                self.af = min(self.af + self.af0, self.max_af)
+            _sar = max(self.highs[-1], prev2_high, _sar)
+        else:
+            reverse = l < _sar
+            if h > self.ep:
+                self.ep = h
+                self.af = min(self.af + self.af0, self.max_af)
+            _sar = min(self.lows[-1], prev2_low, _sar)
+
+        if reverse:
+            _sar = self.ep
+            self.af = self.af0
+            self.falling = not self.falling
+            self.ep = l if self.falling else h
+
+        self.sar = _sar
+        self.highs.append(h)
+        self.lows.append(l)
+        return {"value": self.sar}
+
+    def snapshot(self) -> dict:
+        return {"highs": list(self.highs), "lows": list(self.lows), "first_close": self.first_close,
+                "sar": self.sar, "ep": self.ep, "af": self.af, "falling": self.falling}
+
+    def restore(self, state: dict):
+        self.highs = deque(state["highs"], maxlen=2)
+        self.lows = deque(state["lows"], maxlen=2)
+        self.first_close, self.sar, self.ep = state["first_close"], state["sar"], state["ep"]
+        self.af, self.falling = state["af"], state["falling"]
+
+
+# Stany współdzielone (np. okno 20 dla SMA 20 i Bollingera, jeden MACD dla trzech wyjść)
+STATE_BUILDERS = {
+    "ema": EMAState,
+    "window": RollingWindowState,
+    "rsi": RSIState,
+    "macd": MACDState,
+    "supertrend": SuperTrendState,
+    "psar": PSARState,
+}
+
+# Wskaźnik z INDICATORS_REGISTRY -> (klucz stanu, funkcja wyjść stanu -> tablica)
+STREAM_BINDINGS = {
+    "SMA 20": (("window", 20), lambda out: out["mean"]),
+    "SMA 50": (("window", 50), lambda out: out["mean"]),
+    "SMA 200": (("window", 200), lambda out: out["mean"]),
+    "EMA 12": (("ema", 12), lambda out: out["value"]),
+    "EMA 26": (("ema", 26), lambda out: out["value"]),
+    "EMA 50": (("ema", 50), lambda out: out["value"]),
+    "Bollinger Bands": (("window", 20), lambda out: out["mean"] - 2 * out["std"]),
+    "SuperTrend": (("supertrend", 7, 3), lambda out: out["value"]),
+    "Parabolic SAR": (("psar",), lambda out: out["value"]),
+    "RSI 14": (("rsi", 14), lambda out: out["value"]),
+    "MACD": (("macd", 12, 26, 9), lambda out: out["macd"]),
+    "MACD_Signal": (("macd", 12, 26, 9), lambda out: out["signal"]),
+    "MACD_Hist": (("macd", 12, 26, 9), lambda out: out["hist"]),
+}
+
+
+class IndicatorStream:
+    """
+    Wszystkie wskaźniki strumieniowe jednego symbolu/interwału.
+    Nowa świeczka = jedna aktualizacja każdego stanu. Ostatnia świeczka może być jeszcze
+    niedomknięta, więc przed jej zastosowaniem zapamiętujemy stan i przy zmianie cofamy się o krok.
+    """
+
+    def __init__(self, max_history: int = 20000):
+        self.max_history = max_history
+        self.states = {key: STATE_BUILDERS[key[0]](*key[1:]) for key, _ in STREAM_BINDINGS.values()}
+        self.times = []
+        self.outputs = {key: {name: [] for name in state.outputs} for key, state in self.states.items()}
+        self._before_last = None
+        self._last_candle = None
+
+    @property
+    def last_time(self):
+        return self.times[-1] if self.times else None
+
+    def _apply(self, ts: int, candle: tuple):
+        for key, state in self.states.items():
+            values = state.update(*candle)
+            columns = self.outputs[key]
+            for name, value in values.items():
+                columns[name].append(value)
+        self.times.append(ts)
+        self._last_candle = candle
+
+    def _drop_last(self):
+        self.times.pop()
+        for columns in self.outputs.values():
+            for values in columns.values():
+                values.pop()
+
+    def update(self, ts: int, candle: tuple):
+        """ts - czas świeczki [ns], candle - (open, high, low, close)."""
+        if self.times and ts < self.times[-1]:
+            return
+        if self.times and ts == self.times[-1]:
+            if candle == self._last_candle:
+                return
+            # Ta sama świeczka, nowe wartości: cofamy stan o jeden krok i stosujemy ponownie
+            self._restore_states(self._before_last)
+            self._drop_last()
+        else:
+            self._before_last = self._snapshot_states()
+        self._apply(ts, candle)
+
+        if len(self.times) > self.max_history * 1.5:
+            self._trim()
+
+    def _trim(self):
+        cut = len(self.times) - self.max_history
+        del self.times[:cut]
+        for columns in self.outputs.values():
+            for values in columns.values():
+                del values[:cut]
+
+    def sync(self, df: pd.DataFrame):
+        """Dokłada z ramki tylko świeczki nowsze od ostatniej znanej (plus ewentualnie zmienioną ostatnią)."""
+        times = df.index.values.astype("datetime64[ns]").astype("int64")
+        start = 0 if self.last_time is None else int(np.searchsorted(times, self.last_time))
+        if start == len(times):
+            return
+        rows = df[["open", "high", "low", "close"]].values[start:].tolist()
+        for ts, candle in zip(times[start:].tolist(), rows):
+            self.update(ts, tuple(candle))
+
+    def series(self, name: str, index: pd.DatetimeIndex = None) -> pd.Series:
+        key, extractor = STREAM_BINDINGS[name]
+        values = extractor({k: np.asarray(v, dtype=float) for k, v in self.outputs[key].items()})
+        result = pd.Series(values, index=pd.DatetimeIndex(np.asarray(self.times, dtype="datetime64[ns]")), name=name)
+        return result.reindex(index) if index is not None else result
+
+    def _snapshot_states(self) -> dict:
+        return {key: state.snapshot() for key, state in self.states.items()}
+
+    def _restore_states(self, snapshot: dict):
+        for key, state in self.states.items():
+            state.restore(snapshot[key])
+
+    def snapshot(self) -> dict:
+        """Pełny stan (do zapisu/przeniesienia): stany wskaźników + historia wyjść."""
+        return {
+            "states": self._snapshot_states(),
+            "before_last": self._before_last,
+            "last_candle": self._last_candle,
+            "times": list(self.times),
+            "outputs": {key: {name: list(values) for name, values in columns.items()}
+                        for key, columns in self.outputs.items()},
+        }
+
+    def restore(self, snapshot: dict):
+        self._restore_states(snapshot["states"])
+        self._before_last = snapshot["before_last"]
+        self._last_candle = tuple(snapshot["last_candle"]) if snapshot["last_candle"] else None
+        self.times = list(snapshot["times"])
+        self.outputs = {key: {name: list(values) for name, values in columns.items()}
+                        for key, columns in snapshot["outputs"].items()}
+
+
+class StreamingIndicatorHub:
+    """Strumienie wskaźników per symbol/interwał; zasilany przez DataClient przy nowych świeczkach."""
+
+    def __init__(self):
+        self._streams = {}
+        self._lock = threading.Lock()
+
+    def _stream(self, symbol: str, interval: str) -> tuple:
+        key = f"{symbol.upper()}_{interval}"
+        with self._lock:
+            if key not in self._streams:
+                self._streams[key] = (IndicatorStream(), threading.Lock())
+            return self._streams[key]
+
+    def on_new_data(self, symbol: str, interval: str, df: pd.DataFrame):
+        """Listener DataClient: nowe/zmienione świeczki trafiają do stanów (O(1) na świeczkę)."""
+        stream, lock = self._stream(symbol, interval)
+        with lock:
+            stream.sync(df)
+
+    def get_series(self, symbol: str, interval: str, names: list, df: pd.DataFrame) -> dict:
+        """Serie wskaźników wyrównane do indeksu ramki (dociąga ewentualne brakujące świeczki)."""
+        stream, lock = self._stream(symbol, interval)
+        with lock:
+            stream.sync(df)
+            return {name: stream.series(name, df.index) for name in names if name in STREAM_BINDINGS}
+
+    def snapshot(self, symbol: str, interval: str) -> dict:
+        stream, lock = self._stream(symbol, interval)
+        with lock:
+            return stream.snapshot()
+
+    def restore(self, symbol: str, interval: str, snapshot: dict):
+        stream, lock = self._stream(symbol, interval)
+        with lock:
+            stream.restore(snapshot)
@@ -1,20 +1,331 @@
 # core/logger.py
-LOG_BUFFER = []
+"""
+Dziennik serwera: bufor pierścieniowy o stałej pojemności z rosnącymi numerami wpisów.
 
+Odczyt nic nie usuwa - klient pamięta numer ostatniego wpisu i pyta o nowsze (/api/logs?after=seq),
+więc kilka kart przeglądarki czyta ten sam dziennik niezależnie. Najstarsze wpisy wypadają same (deque maxlen).
+Wpis: {"seq", "time", "level", "request_id", "message"}; request_id z kontekstu żądania (contextvars) -
+przechodzi na run_in_threadpool i zadania asyncio utworzone w trakcie żądania.
 
-def log(message: str):
-    """Zapisuje wiadomość w buforze i wypisuje w terminalu."""
-    print(f"[SERVER LOG] {message}")
-    LOG_BUFFER.append(message)
+Poziom poniżej LOG_LEVEL to jedno porównanie liczb: debug("... %s", x) nie formatuje tekstu
+ani nie pisze na terminal (argumenty jak w logging - formatowane dopiero dla włączonego poziomu).
 
-    # Trzymaj tylko ostatnie 1000 logów, żeby nie zapchać pamięci
-    if len(LOG_BUFFER) > 1000:
-        LOG_BUFFER.pop(0)
+Strumień (SSE, /api/logs/stream): subskrybent czeka na asyncio.Event budzony przy nowym wpisie - bezczynne
+połączenie nie odpytuje niczego. Zdarzenia postępu (progress) nie trafiają do bufora: dostają je tylko
+subskrybenci kanału danego żądania (request_id), a bez subskrybentów progress() od razu wraca.
+Strumień sam się nie kończy, a uvicorn przy zamykaniu czeka na otwarte odpowiedzi - dlatego SIGINT/SIGTERM
+najpierw zamyka strumienie (close_streams_on_exit), przeglądarka połączy się ponownie z nowym procesem.
 
+W procesach puli (ForecastExecutor) nie ma bufora serwera: capture() zbiera wpisy zadania, które wracają
+razem z wynikiem i trafiają do dziennika procesu głównego przez replay() - z identyfikatorem żądania.
+Postęp zadania w toku proces roboczy przekazuje przez set_progress_sink() - proces główny wysyła go
+do kanału żądania, które zgłosiło zadanie (progress(..., request_id=...)).
 
-def get_logs():
-    """Zwraca i czyści bufor."""
-    global LOG_BUFFER
-    logs_to_send = list(LOG_BUFFER)
-    LOG_BUFFER.clear()
-    return logs_to_send
\ No newline at end of file
+Zbiór subskrybentów zmieniają zadania pętli zdarzeń, a czytają wątki puli (run_in_threadpool) - obie strony
+pod _lock; budzenie subskrybentów już poza blokadą, na kopii zbioru.
+
+Konfiguracja (env): LOG_LEVEL (DEBUG / INFO / WARNING / ERROR), LOG_BUFFER_SIZE, LOG_STDOUT (0 = bez terminala),
+SSE_KEEPALIVE [s] (komentarz podtrzymujący połączenie przez proxy, 0 = wyłączony)
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import signal
+import asyncio
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from itertools import islice
+
+DEBUG, INFO, WARNING, ERROR = 10, 20, 30, 40
+LEVELS = {"DEBUG": DEBUG, "INFO": INFO, "WARNING": WARNING, "ERROR": ERROR}
+LEVEL_NAMES = {value: name for name, value in LEVELS.items()}
+
+LOG_BUFFER_SIZE = int(os.getenv("LOG_BUFFER_SIZE", 1000))
+LOG_STDOUT = os.getenv("LOG_STDOUT", "1") == "1"
+SSE_KEEPALIVE = float(os.getenv("SSE_KEEPALIVE", 15))
+# Ile zdarzeń postępu czeka na wysłanie do jednego subskrybenta (wolny klient traci najstarsze)
+PROGRESS_QUEUE = 256
+
+_level = LEVELS.get(os.getenv("LOG_LEVEL", "INFO").upper(), INFO)
+_buffer = deque(maxlen=LOG_BUFFER_SIZE)
+_seq = 0
+_lock = threading.Lock()
+
+request_id_var = ContextVar("request_id", default=None)
+_subscribers = set()
+_closing = False
+_captured = None  # lista (poziom, wiadomość) w trakcie capture() - proces roboczy puli
+_progress_sink = None  # odbiorca postępu w procesie roboczym puli: sink(etap, krok, z ilu, dane)
+
+
+def set_level(level):
+    """Próg zapisu: liczba albo nazwa poziomu."""
+    global _level
+    _level = LEVELS[level.upper()] if isinstance(level, str) else int(level)
+
+
+def is_enabled(level: int) -> bool:
+    return level >= _level
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex[:8]
+
+
+def log(message: str, *args, level: int = INFO):
+    """Zapisuje wiadomość w buforze (i na terminalu). 'args' formatowane przez %, tylko gdy poziom włączony."""
+    if level < _level:
+        return
+    if args:
+        message = message % args
+    if _captured is not None:
+        _captured.append((level, message))
+        return
+
+    global _seq
+    request_id = request_id_var.get()
+    with _lock:
+        _seq += 1
+        _buffer.append({"seq": _seq, "time": time.time(), "level": LEVEL_NAMES.get(level, str(level)),
+                        "request_id": request_id, "message": message})
+        subscribers = tuple(_subscribers) if _subscribers else ()
+
+    if subscribers:
+        for subscription in subscribers:
+            if subscription.accepts(level, request_id):
+                subscription.wake()
+
+    if LOG_STDOUT:
+        prefix = "" if level == INFO else f"[{LEVEL_NAMES.get(level, level)}] "
+        suffix = f" (req {request_id})" if request_id else ""
+        print(f"{prefix}{message}{suffix}", file=sys.stderr if level >= ERROR else sys.stdout)
+
+
+@contextmanager
+def capture():
+    """Wpisy bloku zbierane do listy zamiast do bufora i na terminal (zadanie w procesie puli)."""
+    global _captured
+    previous, _captured = _captured, []
+    try:
+        yield _captured
+    finally:
+        _captured = previous
+
+
+def replay(records: list):
+    """Zapis wpisów zebranych przez capture() w innym procesie - w kontekście bieżącego żądania."""
+    for level, message in records:
+        log(message, level=level)
+
+
+def set_progress_sink(sink):
+    """Postęp przekazywany do 'sink' zamiast do subskrybentów (proces roboczy puli); None = zwykłe działanie."""
+    global _progress_sink
+    _progress_sink = sink
+
+
+def debug(message: str, *args):
+    if _level <= DEBUG:
+        log(message, *args, level=DEBUG)
+
+
+def info(message: str, *args):
+    if _level <= INFO:
+        log(message, *args, level=INFO)
+
+
+def warning(message: str, *args):
+    if _level <= WARNING:
+        log(message, *args, level=WARNING)
+
+
+def error(message: str, *args):
+    log(message, *args, level=ERROR)
+
+
+def progress(stage: str, step: int = None, total: int = None, request_id: str = None, **data):
+    """
+    Zdarzenie postępu żądania (np. progress("backtest", 5, 20, method="arima")) dla subskrybentów jego kanału.
+    request_id=None - bieżące żądanie z kontekstu. W procesie puli zdarzenie trafia do set_progress_sink().
+    """
+    if _progress_sink is not None:
+        _progress_sink(stage, step, total, data)
+        return
+    if not _subscribers:
+        return
+    request_id = request_id or request_id_var.get()
+    if request_id is None:
+        return
+    with _lock:
+        subscribers = tuple(_subscribers)
+    event = None
+    for subscription in subscribers:
+        if subscription.request_id == request_id:
+            if event is None:
+                event = {"time": time.time(), "request_id": request_id, "stage": stage, "step": step,
+                         "total": total, **data}
+            subscription.progress.append(event)
+            subscription.wake()
+
+
+class Subscription:
+    """Subskrybent strumienia: wpisy od poziomu 'level' (tylko żądania 'request_id', jeśli podane) + jego postęp."""
+
+    def __init__(self, level: int = DEBUG, request_id: str = None):
+        self.level = level
+        self.request_id = request_id
+        self.loop = asyncio.get_running_loop()
+        self.event = asyncio.Event()
+        self.progress = deque(maxlen=PROGRESS_QUEUE)
+
+    def accepts(self, level: int, request_id) -> bool:
+        return level >= self.level and (self.request_id is None or request_id == self.request_id)
+
+    def wake(self):
+        """Z dowolnego wątku: asyncio.Event nie jest bezpieczny wątkowo, więc spoza pętli przez call_soon_threadsafe."""
+        if self.event.is_set():
+            return
+        try:
+            if asyncio.get_running_loop() is self.loop:
+                self.event.set()
+                return
+        except RuntimeError:
+            pass
+        try:
+            self.loop.call_soon_threadsafe(self.event.set)
+        except RuntimeError:
+            pass  # pętla zamknięta - subskrybent i tak zaraz zniknie
+
+    async def wait(self, timeout: float = None) -> bool:
+        """Czeka na nowe zdarzenie; False po 'timeout' sekundach bez zdarzeń."""
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout or None)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+def close_streams():
+    """Kończy wszystkie strumienie (zamykanie serwera)."""
+    global _closing
+    _closing = True
+    with _lock:
+        subscribers = tuple(_subscribers)
+    for subscription in subscribers:
+        try:
+            subscription.loop.call_soon_threadsafe(subscription.event.set)
+        except RuntimeError:
+            pass
+
+
+def close_streams_on_exit():
+    """
+    Przy SIGINT/SIGTERM zamyka strumienie, zanim sygnał obsłuży serwer (także restart przy --reload).
+    Wywoływane przy starcie aplikacji - po zainstalowaniu obsługi sygnałów przez uvicorn; tylko w głównym wątku.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        previous = signal.getsignal(sig)
+        if not callable(previous):
+            continue
+
+        def handler(signum, frame, previous=previous):
+            close_streams()
+            previous(signum, frame)
+
+        signal.signal(sig, handler)
+
+
+def _sse(event: str, data: dict, event_id: int = None) -> str:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def stream_events(after: int = None, level: int = DEBUG, request_id: str = None):
+    """
+    Strumień SSE: 'log' (id = seq, przeglądarka wznawia od Last-Event-ID) i 'progress' kanału 'request_id'.
+    after=None - tylko nowe wpisy. Kończy się anulowaniem przy rozłączeniu klienta.
+    """
+    subscription = Subscription(level, request_id)
+    with _lock:
+        _subscribers.add(subscription)
+    try:
+        if after is None:
+            after = _seq
+        yield "retry: 2000\n\n"
+        while not _closing:
+            # Najpierw gasimy flagę, potem czytamy - wpis dodany w międzyczasie obudzi nas ponownie
+            subscription.event.clear()
+            while subscription.progress:
+                yield _sse("progress", subscription.progress.popleft())
+            batch = get_logs(after=after, level=level, request_id=request_id)
+            for record in batch["logs"]:
+                yield _sse("log", record, record["seq"])
+            after = batch["last_seq"]
+            if after < _seq:
+                continue  # zaległości ponad limit jednego odczytu - dalej bez czekania
+            if not await subscription.wait(SSE_KEEPALIVE):
+                yield ": keepalive\n\n"
+    finally:
+        with _lock:
+            _subscribers.discard(subscription)
+
+
+def get_logs(after: int = 0, limit: int = 500, level: int = DEBUG, request_id: str = None) -> dict:
+    """
+    Wpisy o numerach > after (najwyżej 'limit'), bez usuwania z bufora.
+    'last_seq' - numer, od którego pytać następnym razem (też gdy filtry odrzuciły wszystkie wpisy),
+    'missed' - ile wpisów wypadło z bufora, zanim klient je odczytał.
+    """
+    with _lock:
+        if after > _seq:
+            after = 0  # numeracja od nowa - serwer zrestartowany od ostatniego odczytu
+        first = _buffer[0]["seq"] if _buffer else _seq + 1
+        skip = max(after - first + 1, 0)
+        newer = len(_buffer) - skip
+        if newer <= limit:
+            # Zwykły odczyt przyrostowy: kilka najnowszych wpisów - od prawego końca deque, bez przechodzenia całości
+            scanned = list(islice(reversed(_buffer), newer))[::-1]
+        else:
+            scanned = list(islice(_buffer, skip, skip + limit))
+        last_seq = _seq
+
+    missed = max(first - after - 1, 0) if after else 0
+    if scanned and len(scanned) == limit:
+        last_seq = scanned[-1]["seq"]
+    records = [r for r in scanned if LEVELS[r["level"]] >= level and (request_id is None or r["request_id"] == request_id)]
+    return {"logs": records, "last_seq": max(last_seq, after), "missed": missed}
+
+
+class RequestIdMiddleware:
+    """
+    Middleware ASGI: identyfikator żądania (nagłówek X-Request-ID klienta albo nowy) w kontekście
+    na czas obsługi + w nagłówku odpowiedzi. Czyste ASGI - bez kosztu BaseHTTPMiddleware przy strumieniach.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request_id = next((v.decode("latin-1") for k, v in scope["headers"] if k == b"x-request-id"), None)
+        request_id = (request_id or new_request_id())[:64]
+        token = request_id_var.set(request_id)
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id_var.reset(token)
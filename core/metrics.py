@@ -0,0 +1,210 @@
+# core/metrics.py
+"""
+Pomiary czasu etapów /predict: histogramy w formacie Prometheus (GET /metrics), rozkład czasu jednego
+żądania (pole 'timings', /predict?timings=1) i profil jednego żądania (/predict?profile=1).
+
+    with metrics.span("indicators"): ...                -> forecast_stage_seconds{stage="indicators"}
+    with metrics.span("forecast", method="arima"): ...  -> forecast_stage_seconds{stage="forecast",method="arima"}
+
+Metody liczone w procesach puli odsyłają czas razem z wynikiem, proces główny zapisuje go przez observe().
+Histogramy są osobne dla każdego procesu (przy WEB_CONCURRENCY > 1 - osobne w każdym workerze uvicorn).
+
+Koszt: METRICS=0 i brak ?timings=1 - span() zwraca wspólny pusty kontekst (poniżej mikrosekundy);
+włączone - dwa odczyty perf_counter i wpis pod blokadą, kilka µs na etap (etapów jest kilka-kilkanaście na żądanie,
+pomiarów nie ma w pętlach metod ani okien backtestu).
+
+Konfiguracja (env): METRICS (1 = histogramy włączone), PROFILE_DIR (katalog zrzutów ?profile=1)
+"""
+import io
+import os
+import time
+import pstats
+import cProfile
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+from core import logger
+
+try:
+    from pyinstrument import Profiler
+except ImportError:
+    Profiler = None
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENABLED = os.getenv("METRICS", "1") == "1"
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(PROJECT_ROOT, "data", "profiles"))
+
+# Granice koszyków [s]: od milisekundy (wskaźnik) do minuty (backtest wolnej metody)
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Histogram:
+    """Histogram Prometheus: liczniki koszyków + suma + liczba obserwacji dla każdego zestawu etykiet."""
+
+    def __init__(self, name: str, description: str, buckets: tuple = BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = buckets
+        self._series = {}  # etykiety (krotka par) -> [liczniki koszyków..., +Inf, suma]
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, labels: tuple = ()):
+        i = bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += seconds
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(labels, list(series)) for labels, series in sorted(self._series.items())]
+        for labels, series in snapshot:
+            base = ",".join(f'{key}="{_escape(value)}"' for key, value in labels)
+            prefix = base + "," if base else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series[:-1]):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            suffix = f"{{{base}}}" if base else ""
+            lines.append(f"{self.name}_sum{suffix} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+
+STAGES = Histogram("forecast_stage_seconds", "Czas etapow /predict (pobranie, wskazniki, metody, odpowiedz)")
+REQUESTS = Histogram("forecast_request_seconds", "Czas calego /predict")
+HISTOGRAMS = [STAGES, REQUESTS]
+
+
+class Timings:
+    """Czasy etapów jednego żądania (suma, gdy etap wystąpił kilka razy)."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.spans = {}
+
+    def add(self, key: str, seconds: float):
+        self.spans[key] = self.spans.get(key, 0.0) + seconds
+
+    def as_ms(self) -> dict:
+        """Milisekundy, w kolejności pierwszego wystąpienia etapu + 'total' od początku żądania."""
+        result = {key: round(seconds * 1000, 3) for key, seconds in self.spans.items()}
+        result["total"] = round((time.perf_counter() - self.start) * 1000, 3)
+        return result
+
+
+# Zbieranie czasów bieżącego żądania; kontekst przechodzi na run_in_threadpool (ten sam obiekt Timings)
+_timings = ContextVar("timings", default=None)
+_NULL_SPAN = nullcontext()
+
+
+def observe(stage: str, seconds: float, **labels):
+    """Zapis gotowego pomiaru (np. czasu metody odesłanego z procesu puli)."""
+    if ENABLED:
+        STAGES.observe(seconds, (("stage", stage),) + tuple(labels.items()))
+    timings = _timings.get()
+    if timings is not None:
+        timings.add(":".join((stage, *map(str, labels.values()))), seconds)
+
+
+class _Span:
+    __slots__ = ("stage", "labels", "start")
+
+    def __init__(self, stage: str, labels: dict):
+        self.stage = stage
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.stage, time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+def span(stage: str, **labels):
+    """Kontekst mierzący czas etapu; bez histogramów i bez ?timings=1 - pusty kontekst bez pomiaru."""
+    if not ENABLED and _timings.get() is None:
+        return _NULL_SPAN
+    return _Span(stage, labels)
+
+
+@contextmanager
+def collect(enabled: bool = True):
+    """Zbiera czasy etapów w obrębie bloku (Timings albo None, gdy enabled=False)."""
+    if not enabled:
+        yield None
+        return
+    timings = Timings()
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+
+def observe_request(seconds: float):
+    if ENABLED:
+        REQUESTS.observe(seconds)
+
+
+def render() -> str:
+    """Tekstowy format ekspozycji Prometheus (text/plain; version=0.0.4)."""
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    return "\n".join(lines) + "\n"
+
+
+_profile_lock = threading.Lock()
+
+
+def profile_call(name: str, func, *args):
+    """
+    Wykonuje func(*args) pod profilerem (pyinstrument, gdy zainstalowany, inaczej cProfile) i zapisuje zrzut
+    w PROFILE_DIR: <name>.html albo <name>.prof (pstats / snakeviz). Zwraca (wynik, ścieżka zrzutu).
+    Profiler widzi tylko bieżący wątek - metody w procesach puli widać jako oczekiwanie na wynik
+    (szczegóły metod: FORECAST_WORKERS=1). Jeden profil naraz; równoległe żądanie liczy się bez profilu.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        logger.warning("[PROFILE] Inny profil w toku - żądanie bez profilu")
+        return func(*args), None
+    # Nazwa pochodzi z nagłówka klienta (X-Request-ID) - tylko bezpieczne znaki
+    name = time.strftime("%Y%m%d-%H%M%S-") + ("".join(c for c in name if c.isalnum() or c in "-_")[:64] or "predict")
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        if Profiler is not None:
+            profiler = Profiler()
+            profiler.start()
+            try:
+                result = func(*args)
+            finally:
+                profiler.stop()
+            path = os.path.join(PROFILE_DIR, f"{name}.html")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(profiler.output_html())
+            logger.info(f"[PROFILE] Zrzut pyinstrument: {path}")
+            return result, path
+
+        profiler = cProfile.Profile()
+        result = profiler.runcall(func, *args)
+        path = os.path.join(PROFILE_DIR, f"{name}.prof")
+        profiler.dump_stats(path)
+        if logger.is_enabled(logger.DEBUG):
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(15)
+            logger.debug(out.getvalue())
+        logger.info(f"[PROFILE] Zrzut cProfile: {path}")
+        return result, path
+    finally:
+        _profile_lock.release()
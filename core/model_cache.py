@@ -0,0 +1,88 @@
+# core/model_cache.py
+import os
+import sys
+import pickle
+import threading
+from collections import OrderedDict
+
+
+def data_fingerprint(df) -> str:
+    """Odcisk danych: czas ostatniej świeczki + długość. Zmienia się dopiero z nową świeczką."""
+    if df is None or len(df) == 0:
+        return "empty"
+    return f"{int(df.index[-1].value)}:{len(df)}"
+
+
+def _estimate_size(value) -> int:
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+class ModelCache:
+    """
+    Cache wyników metod (prognoza, pewność) między żądaniami.
+    Klucz: (metoda, symbol, interwał, odcisk danych, horyzont). Eviction LRU + limit pamięci.
+
+    Konfiguracja (env): MODEL_CACHE_ENTRIES, MODEL_CACHE_MB
+    """
+
+    def __init__(self, max_entries: int = None, max_bytes: int = None):
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("MODEL_CACHE_ENTRIES", 512))
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.getenv("MODEL_CACHE_MB", 256)) * 1024 * 1024
+        self._entries = OrderedDict()  # klucz -> (wartość, rozmiar)
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(method_key: str, symbol: str, interval: str, df, horizon: int) -> tuple:
+        return method_key, symbol.upper(), interval, data_fingerprint(df), horizon
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, size: int = None):
+        size = size if size is not None else _estimate_size(value)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old[1]
+
+            self._entries[key] = (value, size)
+            self.total_bytes += size
+
+            while self._entries and (len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups * 100, 1) if lookups else 0.0
+            }
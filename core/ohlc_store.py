@@ -0,0 +1,202 @@
+# core/ohlc_store.py
+import os
+import json
+import time
+import asyncio
+from contextlib import asynccontextmanager, contextmanager
+import numpy as np
+import pandas as pd
+from core import logger
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+COLUMNS = ["open", "high", "low", "close", "volume"]
+
+# Jeden plik .npy na symbol/interwał: rekordy (czas w ns + OHLCV), czytane przez mmap
+RECORD_DTYPE = np.dtype([("time", "<i8")] + [(c, "<f8") for c in COLUMNS])
+
+
+class FileLock:
+    """
+    Blokada międzyprocesowa na pliku: flock (POSIX) albo msvcrt.locking (Windows).
+    Zwalniana przez system przy śmierci procesu - brak osieroconych blokad po awarii workera.
+    Próby nieblokujące w pętli: jeden mechanizm dla limitu czasu i wersji asynchronicznej.
+    """
+
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = None
+
+    def try_acquire(self) -> bool:
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def acquire(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while not self.try_acquire():
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(self.POLL_INTERVAL)
+        return True
+
+    async def acquire_async(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while not self.try_acquire():
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(self.POLL_INTERVAL)
+        return True
+
+
+class OHLCStore:
+    """
+    Trwały magazyn świeczek na dysku (memory-mapped NumPy).
+    Historia przetrwa restart serwera, a odświeżenie dociąga tylko nowe świeczki.
+    Wspólna warstwa danych dla wielu workerów uvicorn: pliki .npy czytane przez mmap (strony współdzielone
+    w cache systemu), świeżość w .json, blokada pobierania per symbol/interwał w .lock.
+
+    Konfiguracja (env): FETCH_LOCK_TIMEOUT - ile czekać na pobranie w innym procesie [s]
+    """
+
+    FETCH_LOCK_TIMEOUT = float(os.getenv("FETCH_LOCK_TIMEOUT", 15))
+
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+
+    def _base_path(self, symbol: str, interval: str) -> str:
+        safe_symbol = symbol.upper().replace("/", "-").replace(":", "-")
+        return os.path.join(self.root_dir, f"{safe_symbol}_{interval}")
+
+    def _lock(self, symbol: str, interval: str) -> FileLock:
+        os.makedirs(self.root_dir, exist_ok=True)
+        return FileLock(self._base_path(symbol, interval) + ".lock")
+
+    @contextmanager
+    def fetch_lock(self, symbol: str, interval: str):
+        """
+        Jedno pobranie symbolu/interwału naraz we wszystkich procesach. Po wejściu trzeba ponownie
+        sprawdzić świeżość - inny proces mógł właśnie zapisać dane. Po przekroczeniu limitu czasu
+        wchodzimy bez blokady (lepiej zdublować zapytanie niż zawiesić żądanie).
+        """
+        lock = self._lock(symbol, interval)
+        acquired = lock.acquire(self.FETCH_LOCK_TIMEOUT)
+        if not acquired:
+            logger.warning(f"[STORE] Blokada pobierania {symbol} ({interval}) zajęta ponad {self.FETCH_LOCK_TIMEOUT}s")
+        try:
+            yield acquired
+        finally:
+            lock.release()
+
+    @asynccontextmanager
+    async def fetch_lock_async(self, symbols: list, interval: str):
+        """Jak fetch_lock, dla wielu symboli naraz (kolejność alfabetyczna - bez zakleszczeń), bez blokowania pętli."""
+        locks = []
+        try:
+            for symbol in sorted(symbols):
+                lock = self._lock(symbol, interval)
+                if await lock.acquire_async(self.FETCH_LOCK_TIMEOUT):
+                    locks.append(lock)
+                else:
+                    logger.warning(f"[STORE] Blokada pobierania {symbol} ({interval}) zajęta ponad {self.FETCH_LOCK_TIMEOUT}s")
+            yield
+        finally:
+            for lock in locks:
+                lock.release()
+
+    def _meta(self, symbol: str, interval: str) -> dict:
+        try:
+            with open(self._base_path(symbol, interval) + ".json", "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def fetched_at(self, symbol: str, interval: str) -> float:
+        """Kiedy ostatnio (dowolny proces) zapisał świeże dane z API. 0 = nigdy."""
+        return float(self._meta(symbol, interval).get("fetched_at", 0))
+
+    def load(self, symbol: str, interval: str):
+        """Zwraca zapisaną historię jako DataFrame (jak DataClient.fetch_series) albo None."""
+        path = self._base_path(symbol, interval) + ".npy"
+        if not os.path.exists(path):
+            return None
+
+        try:
+            records = np.load(path, mmap_mode="r")
+        except (OSError, ValueError) as e:
+            logger.warning(f"[STORE] Uszkodzony plik {path}: {e}")
+            return None
+
+        if len(records) == 0:
+            return None
+
+        index = pd.DatetimeIndex(records["time"].astype("datetime64[ns]"), name="datetime")
+        return pd.DataFrame({c: records[c] for c in COLUMNS}, index=index)
+
+    def save(self, symbol: str, interval: str, df: pd.DataFrame):
+        """Zapisuje całą historię atomowo (plik tymczasowy + os.replace)."""
+        os.makedirs(self.root_dir, exist_ok=True)
+        base = self._base_path(symbol, interval)
+
+        records = np.empty(len(df), dtype=RECORD_DTYPE)
+        records["time"] = df.index.values.astype("datetime64[ns]").astype("int64")
+        for c in COLUMNS:
+            records[c] = df[c].values
+
+        tmp_path = f"{base}.{os.getpid()}.tmp.npy"
+        np.save(tmp_path, records)
+        os.replace(tmp_path, base + ".npy")
+        self.touch(symbol, interval, rows=len(df))
+
+    def touch(self, symbol: str, interval: str, rows: int = None):
+        """Oznacza dane jako świeże (bez przepisywania świeczek)."""
+        os.makedirs(self.root_dir, exist_ok=True)
+        base = self._base_path(symbol, interval)
+        meta = self._meta(symbol, interval)
+        meta["fetched_at"] = time.time()
+        if rows is not None:
+            meta["rows"] = rows
+
+        tmp_path = f"{base}.{os.getpid()}.tmp.json"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, base + ".json")
+
+    @staticmethod
+    def merge(stored: pd.DataFrame, fresh: pd.DataFrame) -> pd.DataFrame:
+        """Dokleja nowe świeczki. Ostatnia zapisana świeczka mogła być niedomknięta - wygrywa świeża wersja."""
+        if stored is None or stored.empty:
+            return fresh
+        if fresh is None or fresh.empty:
+            return stored
+
+        combined = pd.concat([stored[stored.index < fresh.index[0]], fresh])
+        combined = combined[~combined.index.duplicated(keep="last")]
+        return combined.sort_index()
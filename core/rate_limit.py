@@ -0,0 +1,248 @@
+# core/rate_limit.py
+"""
+Limit kredytów Twelve Data: kubełek żetonów + kolejka priorytetowa oczekujących.
+
+Pojemność kubełka to minutowy limit kredytów (zapytanie o N symboli kosztuje N kredytów),
+żetony wracają równomiernie w ciągu minuty. Stan korygują nagłówki odpowiedzi
+(api-credits-used / api-credits-left) - serwer liczy kredyty wszystkich procesów z tym samym kluczem,
+a ich suma to faktyczny limit planu (wartość z env obowiązuje tylko do pierwszej odpowiedzi).
+Wyczerpanie limitu (0 pozostałych albo HTTP 429) blokuje kubełek do początku następnej minuty
+zegarowej (w takich minutach Twelve Data rozlicza limit).
+
+Oczekujący stoją w kolejce: najpierw priorytet (interaktywne /predict przed zadaniami wsadowymi),
+potem kolejność zgłoszenia. Żetony dostaje wyłącznie czoło kolejki.
+
+Konfiguracja (env): TWELVE_DATA_CREDITS_PER_MINUTE, TWELVE_DATA_DAILY_CREDITS, TWELVE_DATA_CREDITS_PERIOD [s]
+"""
+import os
+import time
+import heapq
+import asyncio
+import itertools
+import threading
+from datetime import datetime, timezone
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 1
+
+# Co ile sekund oczekujący spoza czoła kolejki sprawdza, czy już jego kolej
+QUEUE_POLL = 0.05
+
+
+class RateLimitExceeded(Exception):
+    """Brak kredytów w dopuszczalnym czasie oczekiwania; retry_after - sekundy do odnowienia limitu."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _utc_day() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+
+class CreditLimiter:
+    def __init__(self, per_minute: int = None, daily: int = None, period: float = None):
+        self.capacity = per_minute or int(os.getenv("TWELVE_DATA_CREDITS_PER_MINUTE", 8))
+        self.daily_limit = daily or int(os.getenv("TWELVE_DATA_DAILY_CREDITS", 800))
+        self.period = period or float(os.getenv("TWELVE_DATA_CREDITS_PERIOD", 60))
+        self._rate = self.capacity / self.period
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._inflight = 0  # kredyty przyznane, na które serwer jeszcze nie odpowiedział
+        self._header_window = None  # minuta zegarowa ostatnich nagłówków api-credits-*
+        self._queue = []  # kopiec (priorytet, numer zgłoszenia)
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+        # Zużycie raportowane przez get_quota
+        self.day = _utc_day()
+        self.daily_used = 0
+        self.minute_used = 0
+        self.minute_left = self.capacity
+        self.rejected = 0
+
+    def cost(self, credits: int) -> int:
+        """Koszt zapytania w żetonach - nigdy ponad pojemność kubełka (inaczej czekałby w nieskończoność)."""
+        return max(1, min(credits, self.capacity))
+
+    def _window(self) -> int:
+        return int(time.time() // self.period)
+
+    def _refill(self, now: float):
+        # Nie więcej, niż serwer jeszcze przyjmie: w minucie znanej z nagłówków - 'left', później cały limit
+        ceiling = self.capacity - self._inflight
+        if self._header_window == self._window():
+            ceiling = min(ceiling, self.minute_left - self._inflight)
+        ceiling = float(max(ceiling, 0))
+
+        if now < self._blocked_until:
+            self._tokens = 0.0
+        elif self._updated < self._blocked_until:
+            self._tokens = ceiling  # nowa minuta - serwer odnowił limit
+        else:
+            self._tokens = min(ceiling, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def _block_until_next_period(self):
+        """Blokada do początku następnej minuty zegarowej (pod self._lock)."""
+        wall = time.time()
+        boundary = (wall // self.period + 1) * self.period
+        self._blocked_until = max(self._blocked_until, time.monotonic() + boundary - wall)
+        self._tokens = 0.0
+
+    def _check_day(self):
+        today = _utc_day()
+        if today != self.day:
+            self.day, self.daily_used = today, 0
+
+    def _enqueue(self, priority: int) -> tuple:
+        ticket = (priority, next(self._seq))
+        with self._lock:
+            heapq.heappush(self._queue, ticket)
+        return ticket
+
+    def _cancel(self, ticket: tuple):
+        with self._lock:
+            if ticket in self._queue:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+
+    def _next_delay(self, ticket: tuple, credits: int, deadline: float):
+        """0 - żetony przyznane, None - nie zdąży przed terminem, inaczej sekundy do ponownej próby."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._check_day()
+            if self.daily_used + credits > self.daily_limit:
+                return None
+
+            head = self._queue[0] == ticket
+            if head:
+                if self._tokens >= credits:
+                    self._tokens -= credits
+                    self._inflight += credits
+                    heapq.heappop(self._queue)
+                    return 0
+                wait = max(self._blocked_until - now, 0.0) + (credits - self._tokens) / self._rate
+            else:
+                wait = QUEUE_POLL
+
+        remaining = deadline - now
+        if remaining <= 0 or (head and wait > remaining):
+            return None
+        return min(wait, remaining)
+
+    def retry_after(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            if self.daily_used >= self.daily_limit:
+                wall = time.time()
+                return 86400 - wall % 86400
+            if now < self._blocked_until:
+                return self._blocked_until - now  # nowa minuta odnawia cały limit
+            return max(1.0 - self._tokens, 0.0) / self._rate
+
+    def _rejected(self, credits: int):
+        self.rejected += 1
+        raise RateLimitExceeded(f"Limit kredytów API wyczerpany (koszt {credits})", self.retry_after())
+
+    def acquire(self, credits: int = 1, priority: int = PRIORITY_INTERACTIVE, timeout: float = 30.0):
+        """Czeka (blokująco) na kredyty; RateLimitExceeded, gdy nie zdąży w 'timeout' sekund."""
+        credits = self.cost(credits)
+        ticket = self._enqueue(priority)
+        deadline = time.monotonic() + timeout
+        granted = False
+        try:
+            while True:
+                delay = self._next_delay(ticket, credits, deadline)
+                if delay is None:
+                    self._rejected(credits)
+                if delay == 0:
+                    granted = True
+                    return
+                time.sleep(delay)
+        finally:
+            if not granted:
+                self._cancel(ticket)
+
+    async def acquire_async(self, credits: int = 1, priority: int = PRIORITY_INTERACTIVE, timeout: float = 30.0):
+        """Asynchroniczny odpowiednik acquire - oczekiwanie nie blokuje pętli zdarzeń."""
+        credits = self.cost(credits)
+        ticket = self._enqueue(priority)
+        deadline = time.monotonic() + timeout
+        granted = False
+        try:
+            while True:
+                delay = self._next_delay(ticket, credits, deadline)
+                if delay is None:
+                    self._rejected(credits)
+                if delay == 0:
+                    granted = True
+                    return
+                await asyncio.sleep(delay)
+        finally:
+            if not granted:
+                self._cancel(ticket)
+
+    def release(self, credits: int):
+        """Zapytanie bez odpowiedzi (błąd połączenia) - kredyty przestają być 'w drodze'."""
+        with self._lock:
+            self._inflight = max(self._inflight - self.cost(credits), 0)
+
+    def refund(self, credits: int):
+        """Przydział niewykorzystany (dane pobrał w międzyczasie inny proces) - żetony wracają do kubełka."""
+        if credits <= 0:
+            return
+        with self._lock:
+            credits = self.cost(credits)
+            self._inflight = max(self._inflight - credits, 0)
+            self._tokens = min(self._tokens + credits, float(self.capacity))
+
+    def record(self, credits: int, used=None, left=None):
+        """
+        Odpowiedź z danymi: zużycie dzienne + korekta kubełka nagłówkami api-credits-*.
+        'left' nie uwzględnia zapytań jeszcze w drodze - odejmujemy je, inaczej równoległe zapytania
+        wydałyby te same kredyty dwa razy.
+        """
+        with self._lock:
+            self._inflight = max(self._inflight - self.cost(credits), 0)
+            self._check_day()
+            self.daily_used += credits
+            try:
+                used, left = int(used), int(left)
+            except (TypeError, ValueError):
+                return
+            self._refill(time.monotonic())
+            self.minute_used, self.minute_left = used, left
+            self._header_window = self._window()
+            if used + left > 0 and used + left != self.capacity:
+                self.capacity = used + left
+                self._rate = self.capacity / self.period
+            self._refill(time.monotonic())
+            if left <= 0:
+                self._block_until_next_period()
+
+    def exhausted(self, credits: int):
+        """Serwer odrzucił zapytanie limitem (429) - do końca minuty nie pytamy ponownie."""
+        with self._lock:
+            self._inflight = max(self._inflight - self.cost(credits), 0)
+            self.minute_used, self.minute_left = self.capacity, 0
+            self._header_window = self._window()
+            self._block_until_next_period()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            self._check_day()
+            self._refill(time.monotonic())
+            return {
+                "limit": self.daily_limit,
+                "remaining": max(self.daily_limit - self.daily_used, 0),
+                "used": self.daily_used,
+                "percent": round(100 * self.daily_used / self.daily_limit) if self.daily_limit else 0,
+                "minute": {"limit": self.capacity, "used": self.minute_used, "remaining": self.minute_left,
+                           "tokens": round(self._tokens, 2), "in_flight": self._inflight},
+                "queued": len(self._queue),
+                "rejected": self.rejected,
+            }
@@ -1,29 +1,102 @@
 # core/registry.py
 import os
 import sys
+import ast
 import glob
+import time
+import threading
 import importlib.util
 import inspect
+from functools import partial
 from typing import Callable, Any, Dict, List, Optional
+from core.model_cache import ModelCache
+from core import logger
+from core.training import TrainingWindow, FULL_WINDOW
 
 # Definicja typu dla metody prognozowania
 # Musi przyjmować pd.Series i zwracać pd.Series
 ForecastFunc = Callable[[Any, int], Any]
 
 
+# Opcjonalny protokół backtestu przyrostowego:
+# walk_forward(series, horizon, origins) -> {indeks_startowy: prognoza (długość horizon)}
+# Model dopasowany raz na najwcześniejszym oknie, kolejne okna tylko dokładają obserwacje.
+WalkForwardFunc = Callable[[Any, int, List[int]], Dict[int, Any]]
+
+# Leniwe ładowanie (env METHODS_LAZY): plik z METHOD_META (słownik albo lista słowników z samymi literałami)
+# jest rejestrowany bez wykonywania - statsmodels/arch/xgboost importują się przy pierwszym użyciu metody.
+# Pliki bez METHOD_META ładowane są od razu, jak dotąd.
+METHODS_LAZY = os.getenv("METHODS_LAZY", "1") == "1"
+# Co ile sekund sprawdzać zmiany plików metod (hot reload); 0 = wyłączone
+METHODS_RELOAD_INTERVAL = float(os.getenv("METHODS_RELOAD_INTERVAL", 2))
+
+
+def read_method_meta(path: str) -> Optional[list]:
+    """METHOD_META z pliku metody - parsowane przez ast.literal_eval, bez importu modułu i jego zależności."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == "METHOD_META" for t in node.targets):
+            meta = ast.literal_eval(node.value)
+            return meta if isinstance(meta, list) else [meta]
+    return None
+
+
 class ForecastMethod:
-    def __init__(self, key: str, name: str, category: str, func: ForecastFunc, description: str = ""):
+    """
+    Metoda prognozowania. Przy leniwym ładowaniu 'loader' zwraca pełną specyfikację (z funkcjami)
+    dopiero przy pierwszym odwołaniu do func / walk_forward.
+    version - wersja kodu (mtime pliku metody): ta sama we wszystkich workerach, zmienia się przy edycji pliku.
+    """
+
+    def __init__(self, key: str, name: str, category: str, func: ForecastFunc = None, description: str = "",
+                 walk_forward: Optional[WalkForwardFunc] = None, training: TrainingWindow = FULL_WINDOW,
+                 loader: Callable[[], dict] = None, version: str = ""):
         self.key = key
         self.name = name
         self.category = category
-        self.func = func
         self.description = description
+        self.training = training
+        self.version = version
+        self._func = func
+        self._walk_forward = walk_forward
+        self._loader = loader
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loader is None
+
+    def _resolve(self):
+        if self._loader is None:
+            return
+        with self._lock:
+            if self._loader is not None:
+                self._func, self._walk_forward = MethodRegistry._bind(self._loader())
+                self._loader = None
+
+    @property
+    def func(self) -> ForecastFunc:
+        self._resolve()
+        return self._func
+
+    @property
+    def walk_forward(self) -> Optional[WalkForwardFunc]:
+        self._resolve()
+        return self._walk_forward
 
 
 class MethodRegistry:
     def __init__(self, methods_dir: str):
         self._methods: Dict[str, ForecastMethod] = {}
         self.methods_dir = methods_dir
+        # Wyniki metod (prognoza + pewność) współdzielone między żądaniami
+        self.cache = ModelCache()
+        self._files: Dict[str, tuple] = {}  # ścieżka -> (mtime, klucze metod z pliku)
+        self._import_lock = threading.RLock()
+        self._last_refresh = 0.0
+        # Słuchacze przeładowania: fn(klucze metod) - np. odświeżenie puli procesów ze starym kodem
+        self._reload_listeners = []
 
     def register(self, method: ForecastMethod):
         self._methods[method.key] = method
@@ -34,47 +107,165 @@ class MethodRegistry:
     def all_methods(self) -> List[ForecastMethod]:
         return list(self._methods.values())
 
+    def add_reload_listener(self, listener):
+        self._reload_listeners.append(listener)
+
+    @staticmethod
+    def _bind(spec_dict: dict) -> tuple:
+        """
+        Opcjonalne 'params' (np. {"mode": "direct"}) są wiązane z funkcjami forecast/walk_forward -
+        ta sama funkcja może obsłużyć kilka wariantów metody.
+        """
+        params = spec_dict.get("params") or {}
+        func = spec_dict["forecast"]
+        walk_forward = spec_dict.get("walk_forward")
+        if params:
+            func = partial(func, **params)
+            walk_forward = partial(walk_forward, **params) if walk_forward else None
+        return func, walk_forward
+
+    @staticmethod
+    def _method_from_spec(spec_dict: dict, loader: Callable[[], dict] = None, version: str = "") -> ForecastMethod:
+        """
+        Walidacja specyfikacji (pełnej albo samego METHOD_META z 'loader').
+        Opcjonalne 'max_window' / 'downsample' / 'full_resolution' - okno treningowe (core/training.py).
+        """
+        func, walk_forward = (None, None) if loader else MethodRegistry._bind(spec_dict)
+
+        return ForecastMethod(
+            key=str(spec_dict["key"]),
+            name=str(spec_dict["name"]),
+            category=str(spec_dict["category"]),
+            func=func,
+            description=spec_dict.get("description", ""),
+            walk_forward=walk_forward,
+            training=TrainingWindow.from_spec(spec_dict),
+            loader=loader,
+            version=version
+        )
+
+    @staticmethod
+    def _module_name(path: str) -> str:
+        # Unikalna nazwa modułu
+        return f"methods.{os.path.splitext(os.path.basename(path))[0]}"
+
+    def _import(self, path: str):
+        """Import pliku metody (raz; po przeładowaniu pliku - od nowa)."""
+        mod_name = self._module_name(path)
+        with self._import_lock:
+            module = sys.modules.get(mod_name)
+            if module is not None:
+                return module
+            # Dynamiczny import
+            spec = importlib.util.spec_from_file_location(mod_name, path)
+            module = importlib.util.module_from_spec(spec)
+            sys.modules[mod_name] = module
+            try:
+                spec.loader.exec_module(module)
+            except Exception:
+                del sys.modules[mod_name]
+                raise
+            return module
+
+    def _specs(self, path: str) -> list:
+        specs = self._import(path).get_forecast_method()
+        # Plik może udostępniać kilka wariantów metody (lista specyfikacji)
+        return specs if isinstance(specs, list) else [specs]
+
+    def _spec_loader(self, path: str, key: str):
+        def load() -> dict:
+            start = time.perf_counter()
+            for spec_dict in self._specs(path):
+                if str(spec_dict["key"]) == key:
+                    logger.info(f"[Core] Zaimportowano metodę {key} ({(time.perf_counter() - start) * 1000:.0f} ms)")
+                    return spec_dict
+            raise KeyError(f"{os.path.basename(path)}: brak metody '{key}' w get_forecast_method()")
+        return load
+
+    def _load_file(self, path: str) -> list:
+        """Rejestruje metody z pliku; zwraca ich klucze."""
+        fname = os.path.basename(path)
+        keys = []
+        try:
+            # Wersja w kluczach wyników (też SharedCache innych workerów) i w ETag /predict
+            version = str(os.stat(path).st_mtime_ns)
+            meta = read_method_meta(path) if METHODS_LAZY else None
+            if meta is not None:
+                methods = [self._method_from_spec(m, loader=self._spec_loader(path, str(m["key"])), version=version)
+                           for m in meta]
+            else:
+                methods = [self._method_from_spec(s, version=version) for s in self._specs(path)] \
+                    if hasattr(self._import(path), "get_forecast_method") else []
+
+            for method in methods:
+                self.register(method)
+                keys.append(method.key)
+                logger.info(f"[Core] Załadowano metodę: {method.name}{'' if method.loaded else ' (leniwie)'}")
+        except Exception as e:
+            logger.error(f"[Core] Błąd ładowania {fname}: {e}")
+        return keys
+
+    def _method_files(self) -> list:
+        search_path = os.path.join(self.methods_dir, "*.py")
+        return [path for path in sorted(glob.glob(search_path)) if not os.path.basename(path).startswith("_")]
+
     def load_methods(self):
         """Dynamicznie ładuje pliki .py z folderu methods/"""
         self._methods.clear()
+        self._files.clear()
+        self.cache.clear()
 
         # Zabezpieczenie: sprawdź czy folder istnieje
         if not os.path.exists(self.methods_dir):
             os.makedirs(self.methods_dir)
-            print(f"[Core] Utworzono folder metod: {self.methods_dir}")
+            logger.info(f"[Core] Utworzono folder metod: {self.methods_dir}")
 
-        search_path = os.path.join(self.methods_dir, "*.py")
-        files = glob.glob(search_path)
+        files = self._method_files()
+        logger.info(f"[Core] Znaleziono plików metod: {len(files)}")
+
+        for path in files:
+            self._files[path] = (os.path.getmtime(path), self._load_file(path))
+        self._last_refresh = time.monotonic()
+
+    def refresh(self, force: bool = False) -> list:
+        """
+        Hot reload: pliki nowe, zmienione (mtime) i usunięte są przeładowywane bez restartu serwera.
+        Sprawdzenie to kilka wywołań stat, najczęściej co METHODS_RELOAD_INTERVAL sekund.
+        Zwraca klucze przeładowanych metod.
+        """
+        if not force and (METHODS_RELOAD_INTERVAL <= 0 or time.monotonic() - self._last_refresh < METHODS_RELOAD_INTERVAL):
+            return []
 
-        print(f"[Core] Znaleziono plików metod: {len(files)}")
+        with self._import_lock:
+            self._last_refresh = time.monotonic()
+            current = {path: os.path.getmtime(path) for path in self._method_files()}
+            changed = [path for path in set(current) | set(self._files)
+                       if current.get(path) != self._files.get(path, (None,))[0]]
+            if not changed:
+                return []
 
-        for path in sorted(files):
-            fname = os.path.basename(path)
-            if fname.startswith("_"):
-                continue
+            reloaded = []
+            for path in sorted(changed):
+                _, old_keys = self._files.pop(path, (None, []))
+                for key in old_keys:
+                    self._methods.pop(key, None)
+                reloaded.extend(old_keys)
+                sys.modules.pop(self._module_name(path), None)
+                if path in current:
+                    logger.info(f"[Core] Przeładowanie: {os.path.basename(path)}")
+                    keys = self._load_file(path)
+                    self._files[path] = (current[path], keys)
+                    reloaded.extend(keys)
+                else:
+                    logger.info(f"[Core] Usunięto plik metody: {os.path.basename(path)}")
 
-            # Unikalna nazwa modułu
-            mod_name = f"methods.{os.path.splitext(fname)[0]}"
+            # Wyniki starego kodu nieaktualne
+            self.cache.clear()
 
+        reloaded = list(dict.fromkeys(reloaded))
+        for listener in self._reload_listeners:
             try:
-                # Dynamiczny import
-                spec = importlib.util.spec_from_file_location(mod_name, path)
-                if spec and spec.loader:
-                    module = importlib.util.module_from_spec(spec)
-                    sys.modules[mod_name] = module
-                    spec.loader.exec_module(module)
-
-                    if hasattr(module, "get_forecast_method"):
-                        spec_dict = module.get_forecast_method()
-                        # Walidacja i rejestracja
-                        method = ForecastMethod(
-                            key=str(spec_dict["key"]),
-                            name=str(spec_dict["name"]),
-                            category=str(spec_dict["category"]),
-                            func=spec_dict["forecast"],
-                            description=spec_dict.get("description", "")
-                        )
-                        self.register(method)
-                        print(f"[Core] Załadowano metodę: {method.name}")
+                listener(reloaded)
             except Exception as e:
-                print(f"[Core] Błąd ładowania {fname}: {e}")
\ No newline at end of file
+                logger.error(f"[Core] Błąd słuchacza przeładowania: {e}")
+        return reloaded
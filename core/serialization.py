@@ -0,0 +1,105 @@
+# core/serialization.py
+"""
+Kolumnowy format odpowiedzi /predict: równoległe tablice zamiast słownika na każdy punkt.
+
+- JSON kolumnowy: tablice NumPy serializowane bezpośrednio z buforów (orjson, gdy jest zainstalowany).
+- Binarny: nagłówek JSON + spakowane float64 (little-endian), dekodowany w przeglądarce przez Float64Array.
+  Układ: b"FCOL" | uint32 długość nagłówka | nagłówek JSON (dopełniony do 8 bajtów) | bufory float64.
+  W nagłówku każda tablica zastąpiona jest przez {"$buf": [offset, długość]} (w elementach float64).
+"""
+import json
+import struct
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+COLUMNAR_JSON = "application/vnd.fintech.columnar+json"
+COLUMNAR_BINARY = "application/vnd.fintech.columnar"
+BINARY_MAGIC = b"FCOL"
+
+HISTORY_COLUMNS = ("open", "high", "low", "close", "volume")
+
+
+def negotiate_format(accept: str = None, requested: str = None) -> str:
+    """'records' (dotychczasowy JSON), 'columnar' albo 'binary' - z parametru format lub nagłówka Accept."""
+    if requested in ("records", "columnar", "binary"):
+        return requested
+    for media_type in (accept or "").split(","):
+        media_type = media_type.split(";")[0].strip()
+        if media_type == COLUMNAR_BINARY:
+            return "binary"
+        if media_type == COLUMNAR_JSON:
+            return "columnar"
+    return "records"
+
+
+def epoch_seconds(index: pd.DatetimeIndex) -> np.ndarray:
+    return index.values.astype("datetime64[s]").astype(np.int64)
+
+
+def history_columns(df: pd.DataFrame) -> dict:
+    """Historia OHLCV jako równoległe tablice (bez kopiowania kolumn float64)."""
+    columns = {"time": epoch_seconds(df.index)}
+    for name in HISTORY_COLUMNS:
+        columns[name] = np.ascontiguousarray(df[name].values, dtype=np.float64)
+    return columns
+
+
+def series_columns(series: pd.Series) -> dict:
+    """Seria wskaźnika bez NaN (rozgrzewka) jako tablice time/value."""
+    values = np.asarray(series.values, dtype=np.float64)
+    mask = ~np.isnan(values)
+    return {"time": epoch_seconds(series.index)[mask], "value": values[mask]}
+
+
+def since_position(index: pd.DatetimeIndex, since: int = None) -> int:
+    """Pozycja pierwszej świeczki z czasem >= since (0 = cała historia)."""
+    if since is None:
+        return 0
+    return int(np.searchsorted(epoch_seconds(index), since, side="left"))
+
+
+def _default(obj):
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    raise TypeError(f"Nie można zserializować {type(obj).__name__}")
+
+
+def dumps_json(payload) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, default=_default).encode("utf-8")
+
+
+def dumps_binary(payload) -> bytes:
+    buffers = []
+    offset = 0
+
+    def extract(obj):
+        nonlocal offset
+        if isinstance(obj, np.ndarray):
+            array = np.ascontiguousarray(obj, dtype="<f8")
+            buffers.append(array)
+            ref = {"$buf": [offset, len(array)]}
+            offset += len(array)
+            return ref
+        if isinstance(obj, dict):
+            return {key: extract(value) for key, value in obj.items()}
+        if isinstance(obj, (list, tuple)):
+            return [extract(value) for value in obj]
+        if hasattr(obj, "model_dump"):
+            return extract(obj.model_dump())
+        return obj
+
+    header = dumps_json(extract(payload))
+    header += b" " * ((-(len(BINARY_MAGIC) + 4 + len(header))) % 8)
+    return b"".join([BINARY_MAGIC, struct.pack("<I", len(header)), header] + [memoryview(b) for b in buffers])
@@ -0,0 +1,114 @@
+# core/shared_cache.py
+"""
+Wyniki współdzielone między workerami uvicorn (wskaźniki, prognozy + pewność).
+
+Każdy worker ma własną pamięć: bez tej warstwy N workerów liczy ten sam symbol N razy.
+Wpis to plik pickle w katalogu w pamięci (domyślnie /dev/shm - tmpfs, bez zapisu na dysk),
+zapisywany atomowo (plik tymczasowy + os.replace). Klucz musi zawierać wersję danych
+(odcisk ramki), więc nowe świeczki same unieważniają stare wpisy; stare pliki sprząta TTL.
+
+pickle.load wykonuje kod z pliku, a /dev/shm jest zapisywalny dla wszystkich: katalog jest osobny
+dla użytkownika, tworzony z prawami 0700 i sprawdzany (właściciel, prawa, nie dowiązanie) - cudzy
+katalog to błąd startu; odczytywane są tylko pliki należące do bieżącego użytkownika.
+
+Konfiguracja (env): SHARED_CACHE_DIR, SHARED_CACHE_TTL [s]
+"""
+import os
+import glob
+import stat
+import time
+import pickle
+import hashlib
+import tempfile
+
+from core import logger
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+_getuid = getattr(os, "getuid", None)  # brak na Windows - bez sprawdzania właściciela
+
+
+def _default_dir() -> str:
+    # Osobny katalog dla każdej kopii projektu i użytkownika (kilka instancji na jednej maszynie się nie miesza)
+    project = hashlib.sha1(PROJECT_ROOT.encode()).hexdigest()[:8]
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    user = f"-{_getuid()}" if _getuid else ""
+    return os.path.join(base, f"fintech-engine{user}-{project}")
+
+
+def _private_dir(path: str):
+    """Tworzy katalog 0700 i sprawdza, że należy do nas i nikt inny nie może w nim zapisywać."""
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    if _getuid is None:
+        return
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != _getuid() or info.st_mode & 0o077:
+        raise PermissionError(f"Katalog SharedCache {path} nie jest prywatnym katalogiem bieżącego użytkownika "
+                              f"(właściciel {info.st_uid}, prawa {stat.filemode(info.st_mode)}) - "
+                              f"usuń go albo ustaw SHARED_CACHE_DIR")
+
+
+class SharedCache:
+    def __init__(self, root_dir: str = None, ttl: float = None):
+        self.root_dir = root_dir or os.getenv("SHARED_CACHE_DIR") or _default_dir()
+        self.ttl = ttl if ttl is not None else float(os.getenv("SHARED_CACHE_TTL", 900))
+        self._last_cleanup = 0.0
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(os.path.abspath(self.root_dir)), exist_ok=True)
+        _private_dir(self.root_dir)
+
+    def _path(self, key) -> str:
+        return os.path.join(self.root_dir, hashlib.sha1(repr(key).encode()).hexdigest() + ".pkl")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                if _getuid is not None and os.fstat(f.fileno()).st_uid != _getuid():
+                    raise PermissionError(f"cudzy plik {path}")
+                value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"[SHARED] Zapis nieudany: {e}")
+            return
+        self._cleanup()
+
+    def _cleanup(self):
+        """Usuwa wpisy starsze niż TTL (najwyżej raz na minutę, w dowolnym procesie)."""
+        now = time.time()
+        if now - self._last_cleanup < 60:
+            return
+        self._last_cleanup = now
+        for path in glob.glob(os.path.join(self.root_dir, "*.pkl")):
+            try:
+                if now - os.path.getmtime(path) > self.ttl:
+                    os.remove(path)
+            except OSError:
+                continue
+
+    def stats(self) -> dict:
+        files = glob.glob(os.path.join(self.root_dir, "*.pkl"))
+        return {
+            "dir": self.root_dir,
+            "entries": len(files),
+            "bytes": sum(os.path.getsize(p) for p in files if os.path.exists(p)),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
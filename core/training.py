@@ -0,0 +1,81 @@
+# core/training.py
+"""
+Okno treningowe metody: ile historii widzi model i czy starsza część jest przerzedzana.
+
+Metody dostają pełną serię z DataClient (do 5000 świeczek), a koszt dopasowania ARIMA/GARCH/XGBoost
+rośnie z jej długością. Stare dane niewiele wnoszą przy krótkich horyzontach, więc każda metoda może
+zadeklarować w specyfikacji:
+
+    "max_window": 1000,       # najwyżej tyle ostatnich świeczek (None = cała seria)
+    "downsample": 4,          # co która świeczka ze starszej części okna (1 = bez przerzedzania)
+    "full_resolution": 250,   # tyle ostatnich świeczek zawsze w pełnej rozdzielczości
+
+Żądanie może nadpisać max_window / downsample dla wszystkich wybranych metod.
+Bez przerzedzania okno to wycinek iloc (widok - bez kopiowania danych, attrs zostają).
+"""
+from typing import Optional
+
+import pandas as pd
+
+
+class TrainingWindow:
+    def __init__(self, max_window: Optional[int] = None, downsample: int = 1, full_resolution: int = 250):
+        self.max_window = max_window or None
+        self.downsample = max(1, int(downsample or 1))
+        self.full_resolution = int(full_resolution)
+
+    @classmethod
+    def from_spec(cls, spec: dict) -> "TrainingWindow":
+        return cls(spec.get("max_window"), spec.get("downsample", 1), spec.get("full_resolution", 250))
+
+    def override(self, max_window: Optional[int] = None, downsample: Optional[int] = None) -> "TrainingWindow":
+        """Nadpisanie z żądania (None = wartość ze specyfikacji metody; max_window=0 = cała seria)."""
+        return TrainingWindow(
+            self.max_window if max_window is None else max_window,
+            self.downsample if downsample is None else downsample,
+            self.full_resolution,
+        )
+
+    @property
+    def is_full(self) -> bool:
+        return self.max_window is None and self.downsample == 1
+
+    @property
+    def tag(self) -> str:
+        """Fragment klucza cache - różne okna to różne prognozy."""
+        return "full" if self.is_full else f"w{self.max_window or 0}d{self.downsample}r{self.full_resolution}"
+
+    def apply(self, series: pd.Series) -> pd.Series:
+        """Seria treningowa: ostatnie max_window świeczek, starsza część (poza full_resolution) co downsample."""
+        if self.max_window is not None and len(series) > self.max_window:
+            series = series.iloc[-self.max_window:]
+        if self.downsample > 1 and len(series) > self.full_resolution:
+            split = len(series) - self.full_resolution
+            # Wyrównanie do końca starszej części - przerzedzone punkty stykają się z pełną rozdzielczością
+            older = series.iloc[:split][::-1].iloc[::self.downsample][::-1]
+            series = pd.concat([older, series.iloc[split:]])
+        return series
+
+    def window(self, series: pd.Series, origin: int) -> pd.Series:
+        """Dane treningowe dla punktu startowego backtestu 'origin' (dane do 'origin' włącznie)."""
+        if self.downsample == 1:
+            start = 0 if self.max_window is None else max(0, origin + 1 - self.max_window)
+            return series.iloc[start:origin + 1]
+        return self.apply(series.iloc[:origin + 1])
+
+    def walk_forward_frame(self, series: pd.Series, first_origin: int):
+        """
+        Seria dla backtestu przyrostowego (walk_forward): najwcześniejszy punkt startowy widzi okno
+        treningowe, kolejne świeczki są dokładane bez zmian. Zwraca (seria, przesunięcie indeksów).
+        """
+        if self.is_full:
+            return series, 0
+        prefix = self.window(series, first_origin)
+        offset = len(prefix) - (first_origin + 1)
+        if self.downsample == 1:
+            start = first_origin + 1 - len(prefix)
+            return series.iloc[start:], offset
+        return pd.concat([prefix, series.iloc[first_origin + 1:]]), offset
+
+
+FULL_WINDOW = TrainingWindow()
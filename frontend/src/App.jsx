@@ -1,9 +1,10 @@
-import { useEffect, useState } from 'react';
+import { useEffect, useRef, useState } from 'react';
 import './App.css';
 import './mobile.css';
 import TopBar from './components/TopBar';
 import ChartContainer from './components/ChartContainer';
 import LogConsole from './components/LogConsole';
+import { PREDICT_ACCEPT, decodePredictResponse, lastCandleTime, mergeDelta } from './columnar';
 
 const API_URL = "http://127.0.0.1:8000";
 
@@ -15,6 +16,19 @@ const formatVol = (val) => {
   return val.toFixed(0);
 };
 
+// Kanał postępu prognozy (SSE): zdarzenia 'progress' żądania o danym X-Request-ID.
+// Czekamy na otwarcie strumienia (najwyżej chwilę), żeby nie zgubić pierwszych etapów.
+const openProgress = (requestId, onProgress) => new Promise(resolve => {
+  const source = new EventSource(`${API_URL}/api/logs/stream?request_id=${requestId}&level=ERROR`);
+  source.addEventListener('progress', e => onProgress(JSON.parse(e.data)));
+  const ready = () => resolve(source);
+  source.onopen = ready;
+  source.onerror = ready;
+  setTimeout(ready, 500);
+});
+
+const progressLabel = (p) => p.total ? `${p.stage} ${p.step}/${p.total}` : p.stage;
+
 const useDebounce = (value, delay) => {
   const [debouncedValue, setDebouncedValue] = useState(value);
   useEffect(() => { const handler = setTimeout(() => setDebouncedValue(value), delay); return () => clearTimeout(handler); }, [value, delay]);
@@ -33,6 +47,7 @@ function App() {
   const [selectedMethod, setSelectedMethod] = useState('simple_ma');
   const [horizon, setHorizon] = useState(14);
   const [aiStatus, setAiStatus] = useState('Idle');
+  const [aiProgress, setAiProgress] = useState('');
   const [marketData, setMarketData] = useState({ lastPrice: 0, change: 0, changePercent: 0 });
   const [apiUsage, setApiUsage] = useState({ percent: 0, used: 0, limit: 800 });
   const [cachedData, setCachedData] = useState(null);
@@ -40,6 +55,8 @@ function App() {
   const [availableMethods, setAvailableMethods] = useState([{ key: 'simple_ma', name: 'Simple MA' }]);
   const [availableIndicators, setAvailableIndicators] = useState([]);
   const [predictionHistory, setPredictionHistory] = useState([]);
+  // Ostatnio pobrany widok (symbol/interwał/wskaźniki) i jego ETag - kolejne żądania pobierają tylko nowe świeczki
+  const lastFetchRef = useRef({ key: null, etag: null });
 
   useEffect(() => {
     const init = async () => {
@@ -59,11 +76,29 @@ function App() {
 
   const handleFetch = async (isForecast = false) => {
     if (isForecast) setAiStatus('Thinking...');
+    let progressSource = null;
     try {
       const methodList = isForecast ? [selectedMethod] : [];
-      const payload = { ticker, method_keys: methodList, horizon: parseInt(horizon), indicators: debouncedIndicators, interval };
-      const res = await fetch(`${API_URL}/predict`, { method: 'POST', headers: {'Content-Type': 'application/json'}, body: JSON.stringify(payload) });
-      const data = await res.json();
+      const viewKey = `${ticker}|${interval}|${debouncedIndicators.join(',')}`;
+      const canDelta = lastFetchRef.current.key === viewKey && cachedData;
+      const payload = { ticker, method_keys: methodList, horizon: parseInt(horizon), indicators: debouncedIndicators, interval,
+                        since: canDelta ? lastCandleTime(cachedData) : undefined };
+      const headers = {'Content-Type': 'application/json', 'Accept': PREDICT_ACCEPT};
+      if (canDelta && lastFetchRef.current.etag) headers['If-None-Match'] = lastFetchRef.current.etag;
+      if (isForecast) {
+        const requestId = Math.random().toString(16).slice(2, 10);
+        headers['X-Request-ID'] = requestId;
+        setAiProgress('');
+        progressSource = await openProgress(requestId, p => setAiProgress(progressLabel(p)));
+      }
+      const res = await fetch(`${API_URL}/predict`, { method: 'POST', headers, body: JSON.stringify(payload) });
+      if (res.status === 304) {
+        // Nic się nie zmieniło od ostatniego pobrania
+        if (isForecast) setAiStatus('Done');
+        return;
+      }
+      const data = mergeDelta(canDelta ? cachedData : null, await decodePredictResponse(res));
+      lastFetchRef.current = { key: viewKey, etag: res.headers.get('ETag') };
       if (data.api_usage) setApiUsage(data.api_usage);
       setCachedData(data);
 
@@ -79,6 +114,9 @@ function App() {
 
       if (isForecast) setAiStatus('Done');
     } catch (e) { console.error(e); setAiStatus('Error'); }
+    finally {
+      if (progressSource) { progressSource.close(); setAiProgress(''); }
+    }
   };
 
   useEffect(() => {
@@ -94,9 +132,11 @@ function App() {
 
   // --- LOGIKA VOLUMENU (NAPRAWIONA) ---
   // Sprawdzamy czy w ogóle mamy wolumen w danych (czy suma > 0)
-  const hasVolume = cachedData?.history?.some(d => d.volume > 0) || false;
+  // Historia może przyjść jako rekordy albo kolumnowo (volume jako tablica)
+  const volumes = Array.isArray(cachedData?.history) ? cachedData.history.map(d => d.volume) : (cachedData?.history?.volume || []);
+  const hasVolume = volumes.some(v => v > 0) || false;
   // Pobieramy wartość z ostatniej świeczki do wyświetlenia w nagłówku
-  const currentVolume = cachedData?.history?.[cachedData.history.length - 1]?.volume || 0;
+  const currentVolume = volumes[volumes.length - 1] || 0;
   // -------------------------------------
 
   return (
@@ -117,6 +157,7 @@ function App() {
         availableMethods={availableMethods}
         handleFetch={handleFetch}
         aiStatus={aiStatus}
+        aiProgress={aiProgress}
         horizon={horizon} setHorizon={setHorizon}
 
       />
@@ -0,0 +1,133 @@
+// Dekodowanie odpowiedzi /predict: JSON (rekordy), JSON kolumnowy albo binarny (spakowane float64).
+// Format binarny: "FCOL" | uint32 długość nagłówka | nagłówek JSON | bufory float64 (little-endian).
+// W nagłówku tablice zastąpione są przez {"$buf": [offset, długość]} (w elementach float64).
+
+export const COLUMNAR_JSON = 'application/vnd.fintech.columnar+json';
+export const COLUMNAR_BINARY = 'application/vnd.fintech.columnar';
+export const PREDICT_ACCEPT = `${COLUMNAR_BINARY}, ${COLUMNAR_JSON};q=0.9, application/json;q=0.5`;
+
+const MAGIC = 'FCOL';
+
+const decodeBinary = (buffer) => {
+  const view = new DataView(buffer);
+  const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+  if (magic !== MAGIC) throw new Error('Nieznany format binarny');
+
+  const headerLength = view.getUint32(4, true);
+  const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 8, headerLength)));
+  // Nagłówek dopełniony do 8 bajtów - widok Float64Array bez kopiowania
+  const data = new Float64Array(buffer, 8 + headerLength);
+
+  const resolve = (obj) => {
+    if (Array.isArray(obj)) return obj.map(resolve);
+    if (obj && typeof obj === 'object') {
+      if (obj.$buf) return data.subarray(obj.$buf[0], obj.$buf[0] + obj.$buf[1]);
+      return Object.fromEntries(Object.entries(obj).map(([k, v]) => [k, resolve(v)]));
+    }
+    return obj;
+  };
+  return resolve(header);
+};
+
+export const decodePredictResponse = async (res) => {
+  const contentType = res.headers.get('content-type') || '';
+  if (contentType.startsWith(COLUMNAR_BINARY) && !contentType.startsWith(COLUMNAR_JSON)) {
+    return decodeBinary(await res.arrayBuffer());
+  }
+  return res.json();
+};
+
+// Historia jako wiersze {time, open, high, low, close, volume} (format wejściowy lightweight-charts)
+export const historyRows = (data) => {
+  const history = data?.history;
+  if (!history) return [];
+  if (Array.isArray(history)) return history.map(d => ({ ...d, time: parseInt(d.time) })).sort((a, b) => a.time - b.time);
+
+  const { time, open, high, low, close, volume } = history;
+  const rows = new Array(time.length);
+  for (let i = 0; i < time.length; i++) {
+    rows[i] = { time: time[i], open: open[i], high: high[i], low: low[i], close: close[i], volume: volume[i] };
+  }
+  return rows;
+};
+
+// Punkty serii wskaźnika {time, value} - z rekordów (data) lub z równoległych tablic (time/value)
+export const seriesPoints = (series) => {
+  if (series.data) return series.data.map(d => ({ time: parseInt(d.time), value: d.value }));
+  const points = new Array(series.time.length);
+  for (let i = 0; i < series.time.length; i++) points[i] = { time: series.time[i], value: series.value[i] };
+  return points;
+};
+
+// --- Odpowiedzi przyrostowe (since): dokładamy nowe/zmienione świeczki do poprzednich danych ---
+
+// Czas ostatniej świeczki (parametr 'since' kolejnego żądania)
+export const lastCandleTime = (data) => {
+  const history = data?.history;
+  if (!history) return undefined;
+  const times = Array.isArray(history) ? history.map(d => d.time) : history.time;
+  return times.length ? Number(times[times.length - 1]) : undefined;
+};
+
+// Liczba elementów z czasem < start (reszta jest zastępowana przez deltę)
+const keepCount = (times, start) => {
+  let i = times.length;
+  while (i > 0 && Number(times[i - 1]) >= start) i--;
+  return i;
+};
+
+const concat = (a, b) => {
+  if (ArrayBuffer.isView(a) && ArrayBuffer.isView(b)) {
+    const out = new Float64Array(a.length + b.length);
+    out.set(a);
+    out.set(b, a.length);
+    return out;
+  }
+  return Array.from(a).concat(Array.from(b));
+};
+
+const mergeRecords = (prev, delta) => {
+  if (!delta.length) return prev;
+  const start = Number(delta[0].time);
+  return prev.slice(0, keepCount(prev.map(d => d.time), start)).concat(delta);
+};
+
+const mergeColumns = (prev, delta, keys) => {
+  if (!delta.time.length) return prev;
+  const keep = keepCount(prev.time, Number(delta.time[0]));
+  return { ...delta, ...Object.fromEntries(keys.map(k => [k, concat(prev[k].slice(0, keep), delta[k])])) };
+};
+
+const mergeSeries = (prev, delta) => {
+  if (!prev) return delta;
+  if (delta.data) return { ...delta, data: mergeRecords(prev.data || [], delta.data) };
+  return mergeColumns(prev, delta, ['time', 'value']);
+};
+
+const mergeSeriesList = (prevList = [], deltaList = []) => {
+  const deltaByName = Object.fromEntries(deltaList.map(s => [s.name, s]));
+  const merged = prevList.map(s => (deltaByName[s.name] ? mergeSeries(s, deltaByName[s.name]) : s));
+  const known = new Set(prevList.map(s => s.name));
+  return merged.concat(deltaList.filter(s => !known.has(s.name)));
+};
+
+export const mergeDelta = (prev, delta) => {
+  if (!prev || delta.since === undefined || delta.since === null) return delta;
+
+  const history = Array.isArray(delta.history)
+    ? mergeRecords(prev.history, delta.history)
+    : mergeColumns(prev.history, delta.history, ['time', 'open', 'high', 'low', 'close', 'volume']);
+
+  const prevPanels = Object.fromEntries((prev.panels || []).map(p => [p.id, p]));
+  const panels = (prev.panels || []).map(p => {
+    const deltaPanel = (delta.panels || []).find(d => d.id === p.id);
+    return deltaPanel ? { ...p, series: mergeSeriesList(p.series, deltaPanel.series) } : p;
+  }).concat((delta.panels || []).filter(p => !prevPanels[p.id]));
+
+  return {
+    ...delta,
+    history,
+    technical_indicators: mergeSeriesList(prev.technical_indicators, delta.technical_indicators),
+    panels,
+  };
+};
@@ -2,6 +2,7 @@ import { useEffect, useRef, useState, useMemo } from 'react';
 import { createChart, ColorType } from 'lightweight-charts';
 import DrawingToolbar from './DrawingToolbar';
 import { v4 as uuidv4 } from 'uuid';
+import { historyRows, seriesPoints } from '../columnar';
 
 // BROKER: 15% to standard "Pro". Wystarczy, żeby widzieć trend wskaźnika.
 const PANEL_HEIGHT = 0.12;
@@ -18,7 +19,7 @@ const ChartContainer = ({ data, appMode, onPriceUpdate, showSR, showVolume }) =>
   const chartContainerRef = useRef(null);
   const chartInstanceRef = useRef(null);
   const legendRef = useRef(null);
-  const seriesRef = useRef({ candles: null, volume: null, prediction: null, overlays: [], panels: [] });
+  const seriesRef = useRef({ candles: null, volume: null, prediction: null, bands: [], overlays: [], panels: [] });
 
   const [activeTool, setActiveTool] = useState(null);
   const [drawings, setDrawings] = useState([]);
@@ -28,7 +29,8 @@ const ChartContainer = ({ data, appMode, onPriceUpdate, showSR, showVolume }) =>
 
   const hasVolumeData = useMemo(() => {
       if (!data || !data.history) return false;
-      return data.history.some(d => d.volume && d.volume > 0.0001);
+      const volumes = Array.isArray(data.history) ? data.history.map(d => d.volume) : data.history.volume;
+      return volumes.some(v => v && v > 0.0001);
   }, [data]);
 
   useEffect(() => {
@@ -125,7 +127,7 @@ const ChartContainer = ({ data, appMode, onPriceUpdate, showSR, showVolume }) =>
     if (!data || !chartInstanceRef.current) return;
     const chart = chartInstanceRef.current;
 
-    const history = (data.history || []).map(d => ({ ...d, time: parseInt(d.time) })).sort((a,b)=>a.time-b.time);
+    const history = historyRows(data);
     seriesRef.current.candles.setData(history);
 
     const volumeData = history.map(d => ({
@@ -153,6 +155,18 @@ const ChartContainer = ({ data, appMode, onPriceUpdate, showSR, showVolume }) =>
        seriesRef.current.prediction.applyOptions({ visible: false });
     }
 
+    // Wachlarz kwantyli prognozy (Monte Carlo, pasma wariancji GARCH: p5/p25/p75/p95) - cieńsze linie wokół ścieżki
+    seriesRef.current.bands.forEach(s => chart.removeSeries(s));
+    seriesRef.current.bands = [];
+    if (appMode === 'lab' && data.predictions?.[0]?.bands) {
+       Object.entries(data.predictions[0].bands).forEach(([name, values]) => {
+          const outer = name === 'p5' || name === 'p95';
+          const band = chart.addLineSeries({ color: outer ? 'rgba(252, 213, 53, 0.35)' : 'rgba(252, 213, 53, 0.6)', lineWidth: 1, lineStyle: 2, title: name, lastValueVisible: false, priceLineVisible: false });
+          band.setData(Object.entries(values).map(([t,v]) => ({time: parseInt(t), value: v})).sort((a,b)=>a.time-b.time));
+          seriesRef.current.bands.push(band);
+       });
+    }
+
     seriesRef.current.overlays.forEach(s => chart.removeSeries(s));
     seriesRef.current.overlays = [];
     seriesRef.current.panels.forEach(p => chart.removeSeries(p.series));
@@ -164,7 +178,7 @@ const ChartContainer = ({ data, appMode, onPriceUpdate, showSR, showVolume }) =>
         if (data.technical_indicators) {
             data.technical_indicators.forEach(ind => {
                 const line = chart.addLineSeries({ color: ind.color, lineWidth: 1, title: ind.name, lastValueVisible: false, priceLineVisible: false });
-                line.setData(ind.data);
+                line.setData(seriesPoints(ind));
                 seriesRef.current.overlays.push(line);
             });
         }
@@ -193,10 +207,10 @@ const ChartContainer = ({ data, appMode, onPriceUpdate, showSR, showVolume }) =>
 
                 if (s.type === 'histogram') {
                     series = chart.addHistogramSeries(options);
-                    series.setData(s.data.map(d => ({ time: parseInt(d.time), value: d.value, color: d.value >= 0 ? '#26a69a' : '#ef5350' })));
+                    series.setData(seriesPoints(s).map(d => ({ ...d, color: d.value >= 0 ? '#26a69a' : '#ef5350' })));
                 } else {
                     series = chart.addLineSeries({ ...options, lineWidth: 1 });
-                    series.setData(s.data.map(d => ({time: parseInt(d.time), value: d.value})));
+                    series.setData(seriesPoints(s));
                 }
                 seriesRef.current.panels.push({ series, name: s.name, color: s.color });
             });
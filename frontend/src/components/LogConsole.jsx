@@ -1,23 +1,29 @@
 import React, { useState, useEffect, useRef } from 'react';
 
+// Ile wpisów trzymać w konsoli (serwer i tak przechowuje tylko ostatnie LOG_BUFFER_SIZE)
+const MAX_LINES = 1000;
+
+const LEVEL_COLORS = { DEBUG: '#888', INFO: '#00ff00', WARNING: '#f0b90b', ERROR: '#f6465d' };
+
 const LogConsole = () => {
   const [logs, setLogs] = useState([]);
   const [isMinimized, setIsMinimized] = useState(false); // Domyślnie otwarte
   const bottomRef = useRef(null);
+  // Numer ostatniego odebranego wpisu - po zerwaniu połączenia przeglądarka wznawia od niego (Last-Event-ID)
+  const lastSeqRef = useRef(0);
 
   useEffect(() => {
-    const interval = setInterval(() => {
-      fetch('http://127.0.0.1:8000/api/logs')
-        .then(res => res.json())
-        .then(data => {
-          if (data.logs && data.logs.length > 0) {
-            setLogs(prev => [...prev, ...data.logs]);
-          }
-        })
-        .catch(() => {}); // Cicho ignoruj błędy sieci
-    }, 500);
+    // Strumień SSE zamiast odpytywania co 500 ms: serwer wysyła wpisy, gdy się pojawią
+    const source = new EventSource('http://127.0.0.1:8000/api/logs/stream?after=0');
+    source.addEventListener('log', (e) => {
+      const log = JSON.parse(e.data);
+      if (log.seq <= lastSeqRef.current) setLogs([]); // serwer zrestartowany - numeracja od nowa
+      lastSeqRef.current = log.seq;
+      setLogs(prev => [...prev, log].slice(-MAX_LINES));
+    });
+    // Błędy sieci: EventSource sam ponawia połączenie
 
-    return () => clearInterval(interval);
+    return () => source.close();
   }, []);
 
   // Przewijaj na dół tylko gdy konsola jest otwarta
@@ -84,10 +90,13 @@ const LogConsole = () => {
             padding: '10px',
             flex: 1
         }}>
-          {logs.map((log, index) => (
-            <div key={index} style={{ marginBottom: '2px' }}>
-              <span style={{ opacity: 0.5, marginRight: '8px' }}>{'>'}</span>
-              {log}
+          {logs.map((log) => (
+            <div key={log.seq} style={{ marginBottom: '2px', color: LEVEL_COLORS[log.level] || '#00ff00' }}>
+              <span style={{ opacity: 0.5, marginRight: '8px' }}>
+                {new Date(log.time * 1000).toLocaleTimeString()} {'>'}
+              </span>
+              {log.message}
+              {log.request_id && <span style={{ opacity: 0.4, marginLeft: '8px' }}>#{log.request_id}</span>}
             </div>
           ))}
           <div ref={bottomRef} />
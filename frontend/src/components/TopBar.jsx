@@ -14,6 +14,7 @@ const TopBar = ({
   availableMethods,
   handleFetch,
   aiStatus,
+  aiProgress,
   horizon, setHorizon
 }) => {
 
@@ -101,13 +102,14 @@ const TopBar = ({
                   </select>
 
                   <button className="btn-action btn-run" onClick={()=>handleFetch(true)}>
-                      {aiStatus === 'Thinking...' ? '...' : 'RUN'}
+                      {aiStatus === 'Thinking...' ? (aiProgress || '...') : 'RUN'}
                   </button>
               </div>
           )}
       </div>
 
-      <div className="api-widget mobile-hide" style={{marginLeft:'15px'}}>
+      <div className="api-widget mobile-hide" style={{marginLeft:'15px'}}
+           title={`Kredyty dziś: ${apiUsage.used}/${apiUsage.limit}` + (apiUsage.minute ? ` | bieżąca minuta: ${apiUsage.minute.used}/${apiUsage.minute.limit}` : '')}>
           <div className="api-text">API: {apiUsage.percent}%</div>
           <div className="api-bar-bg"><div className="api-bar-fill" style={{width:`${apiUsage.percent}%`, background: apiUsage.percent>80?'#f6465d':'#0ecb81'}}></div></div>
       </div>
@@ -1,15 +1,27 @@
-import uvicorn
 import os
+import hashlib
 import math
+import time
 import pandas as pd
-from fastapi import FastAPI, HTTPException
+from typing import Optional
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from core.registry import MethodRegistry
 from core.data_client import client as data_client
-from schemas import ForecastRequest, PredictionResponse, ForecastResult, ChartPanel, IndicatorSeriesDef
-from core.indicators_lib import calculate_indicator, get_indicators_metadata
-from core.backtester import calculate_confidence
-from core.logger import get_logs
+from core.rate_limit import RateLimitExceeded
+from schemas import BacktestRequest, BatchForecastRequest, ForecastRequest, PredictionResponse, ForecastResult, ChartPanel, IndicatorSeriesDef
+from core.indicators_lib import calculate_indicators, expand_indicator_names, get_indicators_metadata
+from core.indicators_stream import INDICATORS_STREAMING, StreamingIndicatorHub
+from core.backtester import walk_forward_origins
+from core.executor import ForecastExecutor
+from core.batch import BatchScheduler
+from core.model_cache import data_fingerprint
+from core.shared_cache import SharedCache
+from core.serialization import (COLUMNAR_BINARY, COLUMNAR_JSON, dumps_binary, dumps_json, history_columns,
+                                negotiate_format, series_columns, since_position)
+from core import logger, metrics
 
 app = FastAPI(title="Fintech Engine", version="v32.0_FIXED_TIME")
 
@@ -19,11 +31,27 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Request-ID"],
 )
+# Identyfikator żądania w kontekście (wpisy dziennika) i w nagłówku X-Request-ID odpowiedzi
+app.add_middleware(logger.RequestIdMiddleware)
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 METHODS_DIR = os.path.join(BASE_DIR, "methods")
 registry = MethodRegistry(METHODS_DIR)
+executor = ForecastExecutor()
+
+# Tryb wielu workerów (WEB_CONCURRENCY, jak w uvicorn/gunicorn): świeczki współdzieli magazyn mmap
+# z blokadą pobierania, wskaźniki i prognozy - SharedCache (SHARED_CACHE=1/0, domyślnie gdy workerów > 1)
+WORKERS = int(os.getenv("WEB_CONCURRENCY", 1))
+shared_cache = SharedCache() if os.getenv("SHARED_CACHE", "1" if WORKERS > 1 else "0") == "1" else None
+# Po przeładowaniu pliku metody procesy robocze muszą zaimportować nowy kod
+registry.add_reload_listener(lambda keys: executor.recycle() if executor.parallel else None)
+
+# Stany wskaźników per symbol/interwał, aktualizowane przy każdym dociągnięciu świeczek
+indicator_hub = StreamingIndicatorHub()
+if INDICATORS_STREAMING:
+    data_client.add_listener(indicator_hub.on_new_data)
 
 INTERVAL_SECONDS = {
     "1min": 60,
@@ -43,6 +71,13 @@ INTERVAL_SECONDS = {
 @app.on_event("startup")
 def startup_event():
     registry.load_methods()
+    logger.close_streams_on_exit()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    executor.shutdown()
+    await data_client.aclose()
 
 
 @app.get("/assets")
@@ -50,78 +85,205 @@ def list_assets():
     return {"assets": data_client.get_all_assets()}
 
 @app.get("/api/logs")
-def api_get_logs():
-    """Frontend odpytuje ten endpoint co chwilę"""
-    return {"logs": get_logs()}
+def api_get_logs(after: int = 0, limit: int = Query(500, ge=1, le=5000), level: str = "DEBUG",
+                 request_id: Optional[str] = None):
+    """
+    Frontend odpytuje ten endpoint co chwilę: wpisy nowsze niż 'after' (numer z poprzedniej odpowiedzi),
+    bez usuwania - każda karta czyta dziennik niezależnie.
+    """
+    return logger.get_logs(after=after, limit=limit, level=logger.LEVELS.get(level.upper(), logger.DEBUG),
+                           request_id=request_id)
+
+
+@app.get("/api/logs/stream")
+async def api_stream_logs(http_request: Request, after: Optional[int] = None, level: str = "DEBUG",
+                          request_id: Optional[str] = None):
+    """
+    Server-Sent Events zamiast odpytywania: 'log' - nowe wpisy dziennika (od 'after', bez niego tylko nowe),
+    'progress' - postęp żądania 'request_id' (pobranie, wskaźniki, metoda k/n, okno backtestu i/n).
+    Klient wysyła /predict z nagłówkiem X-Request-ID równym 'request_id'. Po zerwaniu połączenia
+    przeglądarka wznawia od Last-Event-ID.
+    """
+    last_event_id = http_request.headers.get("last-event-id", "")
+    if last_event_id.isdigit():
+        after = int(last_event_id)
+    events = logger.stream_events(after, logger.LEVELS.get(level.upper(), logger.DEBUG), request_id)
+    return StreamingResponse(events, media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 
 @app.get("/methods")
 def list_methods():
+    registry.refresh()
     methods = registry.all_methods()
     return {"count": len(methods), "methods": [{"key": m.key, "name": m.name, "category": m.category} for m in methods]}
 
 
+@app.post("/methods/reload")
+def reload_methods():
+    """Natychmiastowe przeładowanie zmienionych plików metod (bez czekania na METHODS_RELOAD_INTERVAL)."""
+    return {"reloaded": registry.refresh(force=True)}
+
+
+@app.get("/cache")
+def cache_stats():
+    stats = registry.cache.stats()
+    if shared_cache is not None:
+        stats["shared"] = shared_cache.stats()
+    return stats
+
+
+@app.get("/quota")
+def quota():
+    """Zużycie kredytów Twelve Data (dzień + bieżąca minuta) i kolejka oczekujących na kredyty."""
+    return data_client.get_quota()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Histogramy czasu etapów /predict w formacie Prometheus (osobne dla każdego workera uvicorn)."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/indicators")
 def list_indicators():
     meta = get_indicators_metadata()
-    filtered = [m for m in meta if "_Signal" not in m['key'] and "_Hist" not in m['key']]
+    # Wyjścia pomocnicze (np. MACD_Signal) przychodzą razem ze wskaźnikiem głównym
+    filtered = [m for m in meta if m.get('parent') is None]
     return {"count": len(filtered), "indicators": [{"key": m['key']} for m in filtered]}
 
 
 def format_ta_series(series):
     if series is None or series.empty: return []
     try:
-        timestamps = series.index.astype('int64') // 10 ** 9
-        values = series.values
-        formatted = [{"time": int(t), "value": float(v)} for t, v in zip(timestamps, values) if not math.isnan(v)]
-        return sorted(formatted, key=lambda x: x['time'])
+        # Indeks jest już rosnący (historia z DataClient) - bez ponownego sortowania
+        points = series_columns(series)
+        return [{"time": t, "value": v} for t, v in zip(points["time"].tolist(), points["value"].tolist())]
     except:
         return []
 
 
 @app.post("/predict", response_model=PredictionResponse)
-def generate_prediction(request: ForecastRequest):
-    ticker = request.ticker
-    interval = request.interval
-    safe_horizon = max(request.horizon, 5)
-
-    print(f"[API] Analiza: {ticker} ({interval}) | Horyzont: {safe_horizon}")
-
+async def generate_prediction(request: ForecastRequest, http_request: Request, http_response: Response,
+                              response_format: Optional[str] = Query(None, alias="format"),
+                              timings: bool = False, profile: bool = False):
+    """
+    ?timings=1 - w odpowiedzi pole 'timings' (ms na etap: fetch, indicators, forecast:<metoda>, ...),
+    ?profile=1 - zrzut profilera części obliczeniowej w PROFILE_DIR (nazwa w nagłówku X-Profile).
+    """
+    start = time.perf_counter()
+    with metrics.collect(timings) as spans:
+        result = await _generate_prediction(request, http_request, http_response, response_format, spans, profile)
+    metrics.observe_request(time.perf_counter() - start)
+    return result
+
+
+async def _generate_prediction(request: ForecastRequest, http_request: Request, http_response: Response,
+                               response_format: Optional[str], spans: Optional[metrics.Timings], profile: bool):
+    logger.info(f"[API] Analiza: {request.ticker} ({request.interval}) | Horyzont: {max(request.horizon, 5)}")
+
+    # Pobieranie asynchroniczne (wspólna pula połączeń, jedno zapytanie na symbol mimo wielu klientów)
     try:
-        df_ohlc = data_client.fetch_series(ticker, interval=interval, outputsize=5000)
+        with metrics.span("fetch"):
+            df_ohlc = await data_client.fetch_series_async(request.ticker, interval=request.interval,
+                                                           outputsize=5000)
         if df_ohlc.empty:
             raise Exception("Otrzymano pusty DataFrame z API")
-        close_series = df_ohlc["close"]
+        logger.progress("fetch", candles=len(df_ohlc))
+    except RateLimitExceeded as e:
+        # Brak kredytów i brak danych lokalnych do odpowiedzi awaryjnej
+        logger.error(f"[API ERROR] {str(e)}")
+        raise HTTPException(status_code=429, detail=f"Limit API: {str(e)}",
+                            headers={"Retry-After": str(math.ceil(e.retry_after))})
     except Exception as e:
-        print(f"[API ERROR] {str(e)}")
+        logger.error(f"[API ERROR] {str(e)}")
         raise HTTPException(status_code=500, detail=f"Błąd danych: {str(e)}")
 
+    # Format odpowiedzi: ?format=records|columnar|binary albo nagłówek Accept
+    fmt = negotiate_format(http_request.headers.get("accept"), response_format)
+
+    # Dane bez zmian od poprzedniego odpytania (ta sama ramka z cache DataClient) - pusta odpowiedź 304
+    etag = prediction_etag(request, df_ohlc, fmt)
+    if not profile and etag in [tag.strip() for tag in http_request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    # Obliczenia CPU poza pętlą zdarzeń
+    if profile:
+        result, dump = await run_in_threadpool(metrics.profile_call, logger.request_id_var.get() or "predict",
+                                               build_prediction, request, df_ohlc, fmt, spans)
+    else:
+        result, dump = await run_in_threadpool(build_prediction, request, df_ohlc, fmt, spans), None
+    headers = (result if isinstance(result, Response) else http_response).headers
+    headers["ETag"] = etag
+    if dump:
+        headers["X-Profile"] = os.path.basename(dump)
+    return result
+
+
+def prediction_etag(request: ForecastRequest, df_ohlc: pd.DataFrame, fmt: str) -> str:
+    """
+    Wersja odpowiedzi: ostatnia świeczka (czas, liczba świeczek i wartości - niedomknięta świeczka się zmienia)
+    + parametry żądania + wersje kodu metod (po edycji pliku metody stara prognoza nie dostaje 304).
+    'since' nie wchodzi do ETag: klient z aktualnymi danymi dostaje 304 niezależnie od niego.
+    """
+    registry.refresh()
+    methods = tuple((key, getattr(registry.get_by_key(key), "version", None)) for key in request.method_keys)
+    version = (frame_version(df_ohlc), request.ticker.upper(), request.interval,
+               tuple(request.indicators), methods, max(request.horizon, 5),
+               request.max_window, request.downsample, fmt)
+    return f'W/"{hashlib.sha1(repr(version).encode()).hexdigest()[:20]}"'
+
+
+def frame_version(df_ohlc: pd.DataFrame) -> tuple:
+    """Odcisk ramki + wartości ostatniej świeczki (niedomknięta świeczka zmienia się bez nowego czasu)."""
+    return data_fingerprint(df_ohlc), tuple(df_ohlc.iloc[-1][["open", "high", "low", "close", "volume"]].tolist())
+
+
+def compute_indicators(request: ForecastRequest, df_ohlc: pd.DataFrame) -> dict:
+    if not request.indicators:
+        return {}
+
+    names = expand_indicator_names(request.indicators)
+    shared_key = None
+    if shared_cache is not None:
+        # Inny worker mógł już policzyć te wskaźniki dla tej samej wersji danych
+        shared_key = ("indicators", request.ticker.upper(), request.interval, frame_version(df_ohlc), tuple(names))
+        shared = shared_cache.get(shared_key)
+        if shared is not None:
+            return shared
+
     raw_indicators = {}
+    if INDICATORS_STREAMING:
+        # Stan strumieniowy (INDICATORS_STREAMING=1): od zera tylko przy pierwszym żądaniu, potem O(1) na świeczkę;
+        # wzory wbudowane, niezależnie od INDICATORS_BACKEND
+        with metrics.span("indicators_stream"):
+            raw_indicators = indicator_hub.get_series(request.ticker, request.interval, names, df_ohlc)
+    # Pozostałe (bez wersji strumieniowej): jeden kontekst na żądanie, wspólne węzły liczone raz
+    missing = [name for name in names if name not in raw_indicators]
+    if missing:
+        raw_indicators.update(calculate_indicators(missing, df_ohlc))
+    result = {name: raw_indicators[name] for name in names if name in raw_indicators}
+    if shared_key is not None:
+        shared_cache.put(shared_key, result)
+    return result
+
+
+def layout_indicators(raw_indicators: dict, encode) -> tuple:
+    """Podział na nakładki i panele; encode(series) -> dane serii w wybranym formacie (None = pomiń)."""
     meta_lookup = {m['key']: m for m in get_indicators_metadata()}
-
-    if request.indicators:
-        for ind_name in request.indicators:
-            try:
-                res = calculate_indicator(ind_name, df_ohlc)
-                if res is not None: raw_indicators[ind_name] = res
-                if ind_name == "MACD":
-                    raw_indicators["MACD_Signal"] = calculate_indicator("MACD_Signal", df_ohlc)
-                    raw_indicators["MACD_Hist"] = calculate_indicator("MACD_Hist", df_ohlc)
-            except:
-                pass
-
     final_overlays = []
     panels_map = {}
 
     for name, series in raw_indicators.items():
         meta = meta_lookup.get(name, {"type": "overlay", "color": "#ccc"})
-        formatted = format_ta_series(series)
-        if not formatted: continue
+        encoded = encode(series)
+        if not encoded: continue
 
         obj = {
             "name": name,
             "type": meta.get("viz_type", "line"),
             "color": meta.get("color", "#fff"),
-            "data": formatted
+            **encoded
         }
 
         if meta["type"] == "overlay":
@@ -131,24 +293,60 @@ def generate_prediction(request: ForecastRequest):
             if pid not in panels_map: panels_map[pid] = []
             panels_map[pid].append(obj)
 
-    final_panels = []
-    for pid, slist in panels_map.items():
-        final_panels.append(ChartPanel(id=pid, height=160, series=slist))
+    final_panels = [{"id": pid, "height": 160, "series": slist} for pid, slist in panels_map.items()]
+    return final_overlays, final_panels
+
+
+def compute_forecasts(request: ForecastRequest, df_ohlc: pd.DataFrame) -> list:
+    ticker = request.ticker
+    interval = request.interval
+    safe_horizon = max(request.horizon, 5)
+    close_series = df_ohlc["close"]
 
     results = []
     step = INTERVAL_SECONDS.get(interval, 86400)
     last_timestamp = int(df_ohlc.index[-1].timestamp())
 
-    for key in request.method_keys:
-        method = registry.get_by_key(key)
-        if not method: continue
+    registry.refresh()
+    methods = [registry.get_by_key(key) for key in request.method_keys]
+    methods = [m for m in methods if m]
+
+    # Okno treningowe: ze specyfikacji metody, opcjonalnie nadpisane przez żądanie
+    windows = {m.key: m.training.override(request.max_window, request.downsample) for m in methods}
+
+    # Cache wyników: ta sama świeczka + horyzont + okno = ta sama prognoza, bez ponownego dopasowania
+    # Wersja metody w kluczu: SharedCache innych workerów nie czyści się przy przeładowaniu pliku metody
+    cache_keys = {m.key: registry.cache.make_key(f"{m.key}@{m.version}@{windows[m.key].tag}", ticker, interval,
+                                                 df_ohlc, safe_horizon) for m in methods}
+    cached = {m.key: registry.cache.get(cache_keys[m.key]) for m in methods}
+    if shared_cache is not None:
+        # Wyniki policzone przez inne workery
+        for m in methods:
+            if cached[m.key] is None:
+                cached[m.key] = shared_cache.get(cache_keys[m.key])
+                if cached[m.key] is not None:
+                    registry.cache.put(cache_keys[m.key], cached[m.key])
+    to_run = [m for m in methods if cached[m.key] is None]
+
+    # Metody i okna backtestu liczone równolegle (pula procesów), wyniki w kolejności zgłoszenia
+    for outcome in executor.run_methods(to_run, close_series, safe_horizon, training=windows):
+        if outcome.error is None:
+            cached[outcome.method.key] = (outcome.forecast, outcome.confidence)
+            registry.cache.put(cache_keys[outcome.method.key], cached[outcome.method.key])
+            if shared_cache is not None:
+                shared_cache.put(cache_keys[outcome.method.key], cached[outcome.method.key])
+        else:
+            logger.error(f"[AI CRITICAL] Błąd metody {outcome.method.key}: {outcome.error}")
+
+    for method in methods:
+        if cached[method.key] is None:
+            continue
 
         try:
-            confidence = calculate_confidence(method.func, close_series, safe_horizon)
-            fc = method.func(close_series, horizon=safe_horizon)
+            fc, confidence = cached[method.key]
 
             if len(fc) < 2:
-                print(f"[AI WARNING] Metoda {method.name} zwróciła tylko {len(fc)} punktów!")
+                logger.warning(f"[AI WARNING] Metoda {method.name} zwróciła tylko {len(fc)} punktów!")
 
             values = fc.values
             fc_dict = {}
@@ -159,31 +357,233 @@ def generate_prediction(request: ForecastRequest):
                 next_ts = last_timestamp + ((i + 1) * step)
                 fc_dict[str(next_ts)] = float(values[i])
 
+            # Opcjonalne pasma niepewności (np. kwantyle Monte Carlo) - na tych samych znacznikach czasu
+            bands = None
+            if fc.attrs.get("bands"):
+                bands = {name: dict(zip(fc_dict, map(float, band))) for name, band in fc.attrs["bands"].items()}
+
             results.append(ForecastResult(
                 method_name=method.name,
                 forecast_values=fc_dict,
-                confidence_score=confidence
+                confidence_score=confidence,
+                bands=bands
             ))
-            print(f"[AI] Sukces: {method.name} | Pewność: {confidence}% | Punktów: {len(fc_dict)}")
+            logger.info(f"[AI] Sukces: {method.name} | Pewność: {confidence}% | Punktów: {len(fc_dict)}")
 
         except Exception as e:
-            print(f"[AI CRITICAL] Błąd metody {key}: {e}")
+            logger.error(f"[AI CRITICAL] Błąd metody {method.key}: {e}")
             continue
 
-    temp = df_ohlc.reset_index()
-    temp['time'] = temp['datetime'].astype('int64') // 10 ** 9
-    history = temp[['time', 'open', 'high', 'low', 'close', 'volume']].to_dict('records')
+    return results
+
+
+def _records_series(series):
+    data = format_ta_series(series)
+    return {"data": data} if data else None
+
+
+def _columnar_series(series):
+    if series is None or series.empty: return None
+    columns = series_columns(series)
+    return columns if len(columns["time"]) else None
+
+
+def build_prediction(request: ForecastRequest, df_ohlc: pd.DataFrame, fmt: str = "records",
+                     spans: metrics.Timings = None):
+    with metrics.span("indicators"):
+        raw_indicators = compute_indicators(request, df_ohlc)
+    logger.progress("indicators", count=len(raw_indicators))
+    with metrics.span("forecasts"):
+        results = compute_forecasts(request, df_ohlc)
+    logger.progress("forecasts", count=len(results))
+
+    with metrics.span("response"):
+        return _build_response(request, df_ohlc, raw_indicators, results, fmt, spans)
+
+
+def _build_response(request: ForecastRequest, df_ohlc: pd.DataFrame, raw_indicators: dict, results: list,
+                    fmt: str, spans: Optional[metrics.Timings]):
+    # Odpowiedź przyrostowa: prognozy z pełnej historii, ale do klienta tylko świeczki od 'since'
+    history_df = df_ohlc.iloc[since_position(df_ohlc.index, request.since):]
+    raw_indicators = {name: series.iloc[since_position(series.index, request.since):]
+                      for name, series in raw_indicators.items()}
+
+    if fmt == "records":
+        final_overlays, final_panels = layout_indicators(raw_indicators, _records_series)
+        history_cols = history_columns(history_df)
+        keys = list(history_cols)
+        history = [dict(zip(keys, row)) for row in zip(*(col.tolist() for col in history_cols.values()))]
+
+        # Pydantic + serializacja liczą się już po zamknięciu 'timings' (są w histogramie etapu 'response')
+        return PredictionResponse(
+            ticker=request.ticker,
+            status="Success",
+            history=history,
+            predictions=results,
+            technical_indicators=final_overlays,
+            panels=[ChartPanel(**panel) for panel in final_panels],
+            api_usage=data_client.get_quota(),
+            since=request.since,
+            timings=spans.as_ms() if spans is not None else None
+        )
+
+    # Kolumnowo: tablice NumPy prosto do serializera, bez słownika na punkt i bez walidacji Pydantic
+    final_overlays, final_panels = layout_indicators(raw_indicators, _columnar_series)
+    payload = {
+        "ticker": request.ticker,
+        "status": "Success",
+        "format": "columnar",
+        "history": history_columns(history_df),
+        "predictions": results,
+        "technical_indicators": final_overlays,
+        "panels": final_panels,
+        "api_usage": data_client.get_quota(),
+        "since": request.since
+    }
+    if spans is not None:
+        payload["timings"] = spans.as_ms()
+    if fmt == "binary":
+        return Response(content=dumps_binary(payload), media_type=COLUMNAR_BINARY, headers={"Vary": "Accept"})
+    return Response(content=dumps_json(payload), media_type=COLUMNAR_JSON, headers={"Vary": "Accept"})
+
+
+# Górna granica okien jednej ewaluacji (każde okno to prognoza - przy pełnych dopasowaniach kosztowna)
+BACKTEST_MAX_WINDOWS = int(os.getenv("BACKTEST_MAX_WINDOWS", 2000))
+
+
+@app.post("/backtest")
+async def run_backtest(request: BacktestRequest):
+    """
+    Ewaluacja walk-forward: 'windows' punktów startowych co 'stride' świeczek, z każdego prognoza na 'horizon'.
+    Dla każdej metody miary per krok horyzontu (mae, rmse, mape, directional, coverage) i ich średnie.
+    """
+    if request.horizon < 1 or request.stride < 1 or not 1 <= request.windows <= BACKTEST_MAX_WINDOWS:
+        raise HTTPException(status_code=400, detail=f"horizon >= 1, stride >= 1, windows 1..{BACKTEST_MAX_WINDOWS}")
+    if request.mode not in ("auto", "walk_forward", "refit"):
+        raise HTTPException(status_code=400, detail="mode: auto | walk_forward | refit")
+
+    registry.refresh()
+    methods = [registry.get_by_key(key) for key in request.method_keys]
+    unknown = [key for key, method in zip(request.method_keys, methods) if method is None]
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"Nieznane metody: {', '.join(unknown)}")
+
+    try:
+        with metrics.span("fetch"):
+            df_ohlc = await data_client.fetch_series_async(request.ticker, interval=request.interval,
+                                                           outputsize=5000)
+        if df_ohlc.empty:
+            raise Exception("Otrzymano pusty DataFrame z API")
+    except RateLimitExceeded as e:
+        logger.error(f"[API ERROR] {str(e)}")
+        raise HTTPException(status_code=429, detail=f"Limit API: {str(e)}",
+                            headers={"Retry-After": str(math.ceil(e.retry_after))})
+    except Exception as e:
+        logger.error(f"[API ERROR] {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Błąd danych: {str(e)}")
+
+    series = df_ohlc["close"]
+    origins = walk_forward_origins(len(series), request.horizon, request.windows, request.stride)
+    if not origins:
+        raise HTTPException(status_code=400, detail=f"Za mało danych ({len(series)} świeczek) na horyzont "
+                                                    f"{request.horizon}")
+    logger.info(f"[BACKTEST] {request.ticker} ({request.interval}): {len(origins)} okien co {request.stride}, "
+                f"horyzont {request.horizon}, metody: {', '.join(request.method_keys)}")
+
+    def evaluate():
+        results = []
+        for method in methods:
+            training = method.training.override(request.max_window, request.downsample)
+            start = time.perf_counter()
+            outcome = executor.run_backtest(method, series, request.horizon, origins, training, request.mode)
+            if outcome.error:
+                logger.error(f"[BACKTEST] {method.key}: {outcome.error}")
+            elif outcome.failed:
+                logger.warning(f"[BACKTEST] {method.key}: {outcome.failed}/{len(origins)} okien bez prognozy "
+                               f"({outcome.errors[0] if outcome.errors else 'brak wyniku'})")
+            results.append({**outcome.as_dict(), "elapsed": round(time.perf_counter() - start, 3)})
+        return results
+
+    return {
+        "ticker": request.ticker,
+        "interval": request.interval,
+        "horizon": request.horizon,
+        "stride": request.stride,
+        "origins": {"first": int(df_ohlc.index[origins[0]].timestamp()),
+                    "last": int(df_ohlc.index[origins[-1]].timestamp()), "count": len(origins)},
+        "results": await run_in_threadpool(evaluate),
+    }
+
+
+def process_batch_group(ticker: str, interval: str, df_ohlc: pd.DataFrame, params: dict) -> dict:
+    """Jeden symbol/interwał zadania wsadowego: jeden przebieg wskaźników, wszystkie metody."""
+    request = ForecastRequest(ticker=ticker, interval=interval, **params)
+    with metrics.span("indicators"):
+        raw_indicators = compute_indicators(request, df_ohlc)
+    with metrics.span("forecasts"):
+        results = compute_forecasts(request, df_ohlc)
+
+    last_values = {}
+    for name, series in raw_indicators.items():
+        valid = series.dropna()
+        last_values[name] = float(valid.iloc[-1]) if len(valid) else None
+
+    return {
+        "ticker": ticker,
+        "interval": interval,
+        "status": "ok",
+        "last_time": int(df_ohlc.index[-1].timestamp()),
+        "last_close": float(df_ohlc["close"].iloc[-1]),
+        "predictions": [r.model_dump() for r in results],
+        "indicators": last_values
+    }
+
+
+batch_scheduler = BatchScheduler(
+    fetch_many=lambda symbols, interval: data_client.fetch_many(symbols, interval=interval, outputsize=5000),
+    process_group=process_batch_group
+)
+
+
+@app.post("/predict/batch")
+async def submit_batch(request: BatchForecastRequest):
+    tickers = request.tickers or [asset["symbol"] for asset in data_client.get_all_assets()]
+    if not tickers or not request.intervals:
+        raise HTTPException(status_code=400, detail="Brak symboli lub interwałów")
+
+    params = {"method_keys": request.method_keys, "horizon": request.horizon, "indicators": request.indicators,
+              "max_window": request.max_window, "downsample": request.downsample}
+    job = batch_scheduler.submit(tickers, request.intervals, params)
+    return {**job.status(), "results_url": f"/predict/batch/{job.id}"}
+
+
+@app.get("/predict/batch/{job_id}")
+async def stream_batch(job_id: str):
+    """Wyniki zadania jako NDJSON (linia na symbol/interwał), wysyłane w miarę kończenia."""
+    job = batch_scheduler.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Nieznane zadanie")
+
+    async def lines():
+        async for result in job.stream():
+            yield dumps_json(result) + b"\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
 
-    return PredictionResponse(
-        ticker=ticker,
-        status="Success",
-        history=history,
-        predictions=results,
-        technical_indicators=final_overlays,
-        panels=final_panels,
-        api_usage=data_client.get_quota()
-    )
+@app.get("/predict/batch/{job_id}/status")
+def batch_status(job_id: str):
+    job = batch_scheduler.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Nieznane zadanie")
+    return job.status()
 
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="127.0.0.1", port=8000)
\ No newline at end of file
+    # uvicorn tylko przy uruchomieniu bezpośrednim - 'uvicorn main:app' importuje go sam
+    import uvicorn
+    if WORKERS > 1:
+        # Każdy worker importuje aplikację sam (ścieżka importu zamiast obiektu)
+        uvicorn.run("main:app", host="127.0.0.1", port=8000, workers=WORKERS)
+    else:
+        uvicorn.run(app, host="127.0.0.1", port=8000)
\ No newline at end of file
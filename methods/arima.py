@@ -1,15 +1,105 @@
+import os
 import pandas as pd
 import numpy as np
 from statsmodels.tsa.arima.model import ARIMA as StatsARIMA
 import warnings
 
+from core.model_cache import ModelCache
+from core import logger
 
-def forecast_arima(series: pd.Series, horizon: int = 7) -> pd.Series:
+AR_ORDER = 5
+
+# Sposób dopasowania (env ARIMA_FIT):
+# 'cls' - warunkowe najmniejsze kwadraty: OLS na opóźnionych różnicach z wyrazem wolnym (szybka ścieżka)
+# 'mle' - pełne innovations_mle statsmodels; ARIMA_WARM_START=1 używa parametrów poprzedniego
+#         dopasowania dla tego samego symbolu/interwału (series.attrs) i przelicza tylko filtr stanu,
+#         pełny refit co ARIMA_WARM_REFIT nowych świeczek
+ARIMA_FIT = os.getenv("ARIMA_FIT", "cls")
+ARIMA_WARM_START = os.getenv("ARIMA_WARM_START", "1") == "1"
+ARIMA_WARM_REFIT = int(os.getenv("ARIMA_WARM_REFIT", 50))
+
+# (parametry, czas ostatniej świeczki przy dopasowaniu) ostatnich dopasowań MLE per symbol/interwał
+# (w każdym procesie roboczym osobno)
+_warm_params = ModelCache(max_entries=256, max_bytes=1024 * 1024)
+
+
+def _fit_cls(log_values: np.ndarray, order: int = AR_ORDER) -> np.ndarray:
+    """
+    AR(order) na różnicach logarytmów z wyrazem wolnym - odpowiednik ARIMA(order,1,0) z trendem 't'
+    (trend liniowy poziomu = stały dryf różnic). Zwraca [c, phi_1..phi_order].
+    """
+    diffs = np.diff(log_values)
+    # Wiersz i: [d(t-1), ..., d(t-order)] dla celu d(t) = diffs[i + order]
+    lags = np.lib.stride_tricks.sliding_window_view(diffs[:-1], order)[:, ::-1]
+    design = np.column_stack([np.ones(len(lags)), lags])
+    coef, *_ = np.linalg.lstsq(design, diffs[order:], rcond=None)
+    return coef
+
+
+def _forecast_cls(log_values: np.ndarray, coef: np.ndarray, horizon: int) -> np.ndarray:
+    """Rekurencja AR na różnicach, potem suma od ostatniego poziomu (w logarytmach)."""
+    intercept, phi = coef[0], coef[1:]
+    recent = list(np.diff(log_values[-(len(phi) + 1):])[::-1])  # najnowsza różnica pierwsza
+    steps = np.empty(horizon)
+    for k in range(horizon):
+        steps[k] = intercept + np.dot(phi, recent[:len(phi)])
+        recent.insert(0, steps[k])
+    return log_values[-1] + np.cumsum(steps)
+
+
+def _warm_key(series: pd.Series):
+    symbol = series.attrs.get("symbol")
+    return (symbol, series.attrs.get("interval")) if symbol else None
+
+
+def _build_model(log_values: np.ndarray):
+    # Model AR(5) - patrzy na 5 kroków w tył (lepsze dla krypto niż (1,1,1))
+    # trend='t' próbuje uchwycić liniowy trend wewnątrz próbki
+    return StatsARIMA(
+        log_values,
+        order=(5, 1, 0),
+        trend='t',  # 't' = linear trend, pomaga uniknąć płaskiej linii
+        enforce_stationarity=False,
+        enforce_invertibility=False
+    )
+
+
+def _fit_model(log_values: np.ndarray):
+    # method='innovations_mle' jest szybsza i stabilniejsza dla prostych arrayów
+    return _build_model(log_values).fit(method='innovations_mle')
+
+
+def _fit_warm(log_values: np.ndarray, index: pd.Index, key):
+    """
+    Ciepły start MLE. Z trendem statsmodels liczy innovations_mle przez GLS, które nie przyjmuje
+    start_params - zamiast tego bierzemy parametry poprzedniego dopasowania i przeliczamy
+    tylko filtr stanu (jak append(refit=False) w backteście). Pełny refit co ARIMA_WARM_REFIT świeczek.
+    Parametry dopasowane na świeczkach nowszych od końca serii (np. wycinek historii w backteście po
+    prognozie na pełnej serii) znałyby przyszłość - wtedy pełne dopasowanie bez nadpisywania wpisu.
+    """
+    cached = _warm_params.get(key)
+    if cached is not None:
+        params, fitted_last = cached
+        if index[-1] < fitted_last:
+            return _fit_model(log_values)
+        # Okno danych przesuwa się (stała długość) - liczymy świeczki nowsze od ostatniego dopasowania
+        new_candles = len(index) - index.searchsorted(fitted_last, side="right")
+        if fitted_last >= index[0] and new_candles <= ARIMA_WARM_REFIT:
+            return _build_model(log_values).filter(params)
+
+    model_fit = _fit_model(log_values)
+    _warm_params.put(key, (np.asarray(model_fit.params), index[-1]))
+    return model_fit
+
+
+def forecast_arima(series: pd.Series, horizon: int = 7, fit: str = None) -> pd.Series:
     """
     Strategia 'ARIMA (Aggressive)'.
     Używa rzędu (5,1,0), aby wyłapać pęd (momentum) z ostatnich 5 świeczek,
     zamiast uśredniać wszystko do płaskiej linii.
+    fit - 'cls' albo 'mle' (domyślnie ARIMA_FIT).
     """
+    fit = fit or ARIMA_FIT
     # Wyciszamy wszystko co zbędne
     warnings.simplefilter('ignore')
 
@@ -25,21 +115,15 @@ def forecast_arima(series: pd.Series, horizon: int = 7) -> pd.Series:
     log_values = np.log(values)
 
     try:
-        # 2. Model AR(5) - patrzy na 5 kroków w tył (lepsze dla krypto niż (1,1,1))
-        # trend='t' próbuje uchwycić liniowy trend wewnątrz próbki
-        model = StatsARIMA(
-            log_values,
-            order=(5, 1, 0),
-            trend='t',  # 't' = linear trend, pomaga uniknąć płaskiej linii
-            enforce_stationarity=False,
-            enforce_invertibility=False
-        )
-
-        # method='innovations_mle' jest szybsza i stabilniejsza dla prostych arrayów
-        model_fit = model.fit(method='innovations_mle')
-
-        # 3. Prognoza
-        forecast_log = model_fit.forecast(steps=horizon)
+        if fit == "cls":
+            forecast_log = _forecast_cls(log_values, _fit_cls(log_values), horizon)
+        else:
+            # Ciepły start: parametry z poprzedniego dopasowania tego symbolu (zwykle o świeczkę krótszego)
+            key = _warm_key(series) if ARIMA_WARM_START else None
+            model_fit = _fit_warm(log_values, clean_series.index, key) if key else _fit_model(log_values)
+
+            # 3. Prognoza
+            forecast_log = model_fit.forecast(steps=horizon)
 
         # Odwrócenie logarytmu
         forecast_price = np.exp(forecast_log)
@@ -47,7 +131,7 @@ def forecast_arima(series: pd.Series, horizon: int = 7) -> pd.Series:
         return pd.Series(data=forecast_price)
 
     except Exception as e:
-        print(f"CRITICAL ARIMA ERROR: {e}")
+        logger.error(f"CRITICAL ARIMA ERROR: {e}")
         # Jeśli model się wywali, zrób prostą projekcję liniową z ostatnich 2 punktów
         # żeby wykres nie był chamsko płaski
         try:
@@ -60,12 +144,54 @@ def forecast_arima(series: pd.Series, horizon: int = 7) -> pd.Series:
             return pd.Series([clean_series.iloc[-1]] * horizon)
 
 
+def walk_forward_arima(series: pd.Series, horizon: int, origins: list, fit: str = None) -> dict:
+    """
+    Backtest przyrostowy: jedno dopasowanie MLE na najwcześniejszym oknie,
+    potem kolejne świeczki dokładane przez append(refit=False) - parametry zostają,
+    przeliczany jest tylko filtr stanu.
+    """
+    warnings.simplefilter('ignore')
+
+    if not origins:
+        return {}
+
+    values = series.values.astype(float)
+    if np.isnan(values[:origins[-1] + 1]).any():
+        raise ValueError("Luki (NaN) w danych - wymagane pełne dopasowania")
+
+    log_values = np.log(values)
+    forecasts = {}
+
+    if (fit or ARIMA_FIT) == "cls":
+        # Dopasowanie CLS to jedno lstsq - pełny refit dla każdego okna jest tańszy niż filtr stanu
+        for done, origin in enumerate(origins, 1):
+            window = log_values[:origin + 1]
+            forecasts[origin] = np.exp(_forecast_cls(window, _fit_cls(window), horizon))
+            logger.progress("backtest", done, len(origins))
+        return forecasts
+
+    model_fit = _fit_model(log_values[:origins[0] + 1])
+    previous = origins[0]
+    for done, origin in enumerate(origins, 1):
+        if origin > previous:
+            model_fit = model_fit.append(log_values[previous + 1:origin + 1], refit=False)
+            previous = origin
+        forecasts[origin] = np.exp(model_fit.forecast(steps=horizon))
+        logger.progress("backtest", done, len(origins))
+
+    return forecasts
+
+
+# Metadane bez importu statsmodels (rejestr czyta je przez ast, funkcje ładuje przy pierwszym użyciu)
+METHOD_META = {
+    "key": "arima",
+    "name": "ARIMA (Momentum)",
+    "category": "Statistical Models",
+    "description": "Model autoregresyjny (AR-5) na różnicach logarytmów z dryfem, nastawiony na wykrywanie krótkoterminowego pędu ceny. Ignoruje luki w czasie.",
+    "color": "#ffaa00",
+    "max_window": 1000  # starsze świeczki nie poprawiają prognozy krótkoterminowej (bench_training_window)
+}
+
+
 def get_forecast_method():
-    return {
-        "key": "arima",
-        "name": "ARIMA (Momentum)",
-        "category": "Statistical Models",
-        "forecast": forecast_arima,
-        "description": "Model autoregresyjny (AR-5) nastawiony na wykrywanie krótkoterminowego pędu ceny. Ignoruje luki w czasie.",
-        "color": "#ffaa00"
-    }
\ No newline at end of file
+    return {**METHOD_META, "forecast": forecast_arima, "walk_forward": walk_forward_arima}
@@ -1,7 +1,11 @@
+import os
 import pandas as pd
 import numpy as np
 import warnings
 
+from core.garch import fit_garch
+from core import logger
+
 try:
     from arch import arch_model
 
@@ -9,23 +13,64 @@ try:
 except ImportError:
     HAS_ARCH = False
 
+# Estymator (env GARCH_BACKEND): 'numpy' - wbudowany GARCH(1,1) (core/garch.py, szybszy),
+# 'arch' - biblioteka arch (jeśli zainstalowana, inaczej i tak numpy)
+GARCH_BACKEND = os.getenv("GARCH_BACKEND", "numpy")
+
+# Pasma wachlarza z prognozy wariancji: kwantyle rozkładu normalnego skumulowanego zwrotu
+BAND_Z = {"p5": -1.6448536269514722, "p25": -0.6744897501960817, "p75": 0.6744897501960817, "p95": 1.6448536269514722}
+
+# Luki uzupełniamy tylko, gdy brakuje pojedynczych świeczek (rynek 24/7); sesje giełdowe (noce, weekendy) zostają
+GAP_FILL_LIMIT = 0.05
+
+
+def _fill_gaps(series: pd.Series) -> pd.Series:
+    """
+    Uzupełnienie brakujących świeczek (ffill) według częstotliwości z df.attrs["freq"] - ustawianej
+    raz na ramkę przez DataClient, bez pd.infer_freq przy każdym wywołaniu (i każdym oknie backtestu).
+    Sprawdzenie luk to porównanie rozpiętości czasu z liczbą świeczek - O(1), bez reindeksacji.
+    """
+    freq = series.attrs.get("freq")
+    if not freq or len(series) < 2:
+        return series
+    try:
+        step = pd.Timedelta(freq)
+    except ValueError:
+        return series  # częstotliwości kalendarzowe (tydzień, miesiąc) - bez uzupełniania
+
+    expected = int((series.index[-1] - series.index[0]) / step) + 1
+    missing = expected - len(series)
+    if 0 < missing <= GAP_FILL_LIMIT * len(series):
+        # Siatka od pierwszej świeczki ze stałym krokiem - asfreq("1W") zakotwiczyłby tygodnie na niedzielach
+        # (W-SUN) i przesunął świeczki z poniedziałków
+        grid = pd.date_range(series.index[0], series.index[-1], freq=step, name=series.index.name)
+        return series.reindex(grid, method='ffill')
+    return series
+
+
+def _fit_arch(returns: np.ndarray, horizon: int):
+    """(średnie zwroty, wariancje) kroków 1..horizon z biblioteki arch."""
+    # GARCH(1,1)
+    model = arch_model(returns, vol='Garch', p=1, q=1, mean='Constant', dist='Normal')
+    # rescale=False zapobiega automatycznemu przeskalowaniu, jeśli dane są już x100
+    res = model.fit(disp='off', options={'maxiter': 200})
+    forecasts = res.forecast(horizon=horizon)
+    return forecasts.mean.iloc[-1].values, forecasts.variance.iloc[-1].values
+
+
+def _fit_numpy(returns: np.ndarray, horizon: int):
+    """(średnie zwroty, wariancje) kroków 1..horizon z wbudowanego estymatora."""
+    fit = fit_garch(returns)
+    return np.full(horizon, fit.mu), fit.variance_forecast(horizon)
+
 
 def forecast_arima_garch(series: pd.Series, horizon: int = 7) -> pd.Series:
     """
     Strategia 'ARIMA-GARCH'.
     Dynamicznie obsługuje interwał (1h, 1d) przekazany w danych.
+    Prognoza = ścieżka średniego zwrotu; pasma 5/25/75/95 z prognozy wariancji w series.attrs["bands"].
     """
-    clean_series = series.dropna()
-
-    # --- FIX: Dynamiczne wykrywanie częstotliwości ---
-    try:
-        if clean_series.index.freq is None:
-            inferred_freq = pd.infer_freq(clean_series.index)
-            if inferred_freq:
-                clean_series = clean_series.asfreq(inferred_freq, method='ffill')
-    except Exception:
-        pass
-    # -----------------------------------------------
+    clean_series = _fill_gaps(series.dropna())
 
     last_price = clean_series.iloc[-1]
 
@@ -33,50 +78,42 @@ def forecast_arima_garch(series: pd.Series, horizon: int = 7) -> pd.Series:
         return pd.Series([last_price] * horizon)
 
     # Obliczanie zwrotów (skalowane x100 dla stabilności GARCH)
-    returns = 100 * clean_series.pct_change().dropna()
-
-    if not HAS_ARCH:
-        print("Brak biblioteki 'arch'. Zainstaluj: pip install arch")
-        return pd.Series([last_price] * horizon)
+    values = clean_series.values.astype(float)
+    returns = 100 * (values[1:] / values[:-1] - 1)
 
     try:
         with warnings.catch_warnings():
             warnings.simplefilter("ignore")
+            if GARCH_BACKEND == "arch" and HAS_ARCH:
+                forecast_returns, variance = _fit_arch(returns, horizon)
+            else:
+                forecast_returns, variance = _fit_numpy(returns, horizon)
 
-            # GARCH(1,1)
-            model = arch_model(returns, vol='Garch', p=1, q=1, mean='Constant', dist='Normal')
-            # rescale=False zapobiega automatycznemu przeskalowaniu, jeśli dane są już x100
-            res = model.fit(disp='off', options={'maxiter': 200})
+        # Rekonstrukcja ceny (zwroty w %)
+        forecast_prices = last_price * np.cumprod(1 + forecast_returns / 100)
 
-            # Prognoza wariancji/średniej
-            forecasts = res.forecast(horizon=horizon)
-
-            # Pobieramy prognozowaną średnią (mean) zwrotu
-            forecast_returns = forecasts.mean.iloc[-1].values
-
-        # Rekonstrukcja ceny
-        forecast_prices = []
-        current_price = last_price
-
-        for ret in forecast_returns:
-            # ret jest w %, więc dzielimy przez 100
-            next_price = current_price * (1 + ret / 100)
-            forecast_prices.append(next_price)
-            current_price = next_price
-
-        return pd.Series(data=forecast_prices)
+        # Wariancja skumulowanego zwrotu rośnie z horyzontem - wachlarz wokół ścieżki średniej
+        spread = np.sqrt(np.cumsum(variance)) / 100
+        forecast = pd.Series(data=forecast_prices)
+        forecast.attrs["bands"] = {name: (forecast_prices * np.exp(z * spread)).tolist() for name, z in BAND_Z.items()}
+        return forecast
 
     except Exception as e:
-        print(f"Błąd ARIMA-GARCH: {e}")
+        logger.warning(f"Błąd ARIMA-GARCH: {e}")
         return pd.Series([last_price] * horizon)
 
 
+# Metadane bez importu arch/scipy (rejestr czyta je przez ast, funkcje ładuje przy pierwszym użyciu)
+METHOD_META = {
+    "key": "arima_garch",
+    "name": "ARIMA-GARCH (Auto-Freq)",
+    "category": "Statistical Models",
+    "description": "Model hybrydowy uwzględniający zmienność (GARCH). Obsługuje dynamiczne interwały. "
+                   "Pasma to kwantyle 5/25/75/95 z prognozy wariancji.",
+    "color": "#00ced1",
+    "max_window": 1000  # dopasowanie GARCH rośnie z długością serii
+}
+
+
 def get_forecast_method():
-    return {
-        "key": "arima_garch",
-        "name": "ARIMA-GARCH (Auto-Freq)",
-        "category": "Statistical Models",
-        "forecast": forecast_arima_garch,
-        "description": "Model hybrydowy uwzględniający zmienność (GARCH). Obsługuje dynamiczne interwały.",
-        "color": "#00ced1"
-    }
\ No newline at end of file
+    return {**METHOD_META, "forecast": forecast_arima_garch}
@@ -7,94 +7,210 @@ try:
 except ImportError:
     xgb = None
 
-from core.logger import log
+from core import logger
+from core.executor import thread_budget
 
 
-def forecast_xgboost_strategy(series: pd.Series, horizon: int) -> pd.Series:
-    """
-    Strategia XGBoost (Returns Regression). Bez emotikon.
-    """
-
-    log(f"[XGBoost] Uruchamiam metode. Horyzont: {horizon} dni.")
-
-    if xgb is None:
-        log("[XGBoost] BLAD: Brak biblioteki 'xgboost'. Zainstaluj ja: pip install xgboost")
-        return pd.Series([series.iloc[-1]] * horizon)
+WINDOW_SIZE = 15
 
-    # 1. Przygotowanie danych
-    log("[XGBoost] Przetwarzanie danych historycznych...")
-
-    returns = series.pct_change().dropna()
+# Tryb bezpośredni: model przewiduje skumulowany log-wzrost w kilku krokach kotwicznych (siatka geometryczna
+# 1..horizon), kroki pośrednie interpolujemy. Koszt treningu rośnie z liczbą wyjść, nie z horyzontem.
+DIRECT_ANCHORS = 8
 
-    if len(returns) < 30:
-        log(f"[XGBoost] Za malo danych ({len(returns)}). Wymagane min. 30. Zwracam linie plaska.")
-        return pd.Series([series.iloc[-1]] * horizon)
 
-    WINDOW_SIZE = 15
-    values = returns.values
-    X, y = [], []
+def _build_training_set(values: np.ndarray):
+    # Okna jako widok na tablicę zwrotów (bez kopiowania): X[i] = values[i:i+W], y[i] = values[i+W]
+    X = np.lib.stride_tricks.sliding_window_view(values[:-1], WINDOW_SIZE)
+    y = values[WINDOW_SIZE:]
+    return X, y
 
-    for i in range(WINDOW_SIZE, len(values)):
-        X.append(values[i - WINDOW_SIZE:i])
-        y.append(values[i])
 
-    X = np.array(X)
-    y = np.array(y)
+def _direct_anchors(horizon: int) -> np.ndarray:
+    if horizon <= DIRECT_ANCHORS:
+        return np.arange(1, horizon + 1)
+    return np.unique(np.round(np.geomspace(1, horizon, DIRECT_ANCHORS)).astype(int))
 
-    log(f"[XGBoost] Utworzono zbior treningowy: {len(X)} probek.")
-
-    # 2. Trening
-    log("[XGBoost] Trenowanie modelu (moze to chwile potrwac)...")
 
+def _build_direct_training_set(values: np.ndarray, horizon: int):
+    """
+    Tryb bezpośredni: to samo okno wejściowe co w trybie rekurencyjnym,
+    cel Y[i, j] = skumulowany log-wzrost od końca okna do kroku kotwicznego j.
+    """
+    anchors = _direct_anchors(horizon)
+    X = np.lib.stride_tricks.sliding_window_view(values[:-horizon], WINDOW_SIZE)
+    log_growth = np.concatenate(([0.0], np.cumsum(np.log1p(values))))
+    start = WINDOW_SIZE + np.arange(len(X))
+    Y = log_growth[start[:, None] + anchors[None, :]] - log_growth[start][:, None]
+    return X, Y
+
+
+def _train_model(X: np.ndarray, y: np.ndarray):
+    # Wiele kolumn celu (tryb bezpośredni): jeden booster, drzewo na wyjście w każdej rundzie
+    # (multi_output_tree z wektorem w liściach trenuje się tu wolniej)
+    multi_output = {"tree_method": "hist"} if y.ndim == 2 else {}
     model = XGBRegressor(
         n_estimators=100,
         learning_rate=0.05,
         max_depth=3,
-        n_jobs=-1,
+        n_jobs=thread_budget(),  # w puli procesów: limit wątków na proces, inaczej wszystkie rdzenie
         objective='reg:squarederror',
-        random_state=42
+        random_state=42,
+        **multi_output
     )
 
     model.fit(X, y)
-    log("[XGBoost] Model wytrenowany. Rozpoczynam predykcje...")
+    return model
+
+
+def _predict_returns_batch(model, windows: np.ndarray, horizon: int) -> np.ndarray:
+    """
+    Predykcja rekurencyjna wielu okien naraz (B x WINDOW_SIZE -> B x horizon).
+    Jedno wywołanie inplace_predict na krok dla wszystkich okien - bez DMatrix i narzutu sklearn.
+    """
+    booster = model.get_booster()
+    inputs = np.array(windows, dtype=np.float32, ndmin=2)
+    predicted = np.empty((len(inputs), horizon))
+
+    for step in range(horizon):
+        pred_return = np.clip(booster.inplace_predict(inputs), -0.15, 0.15)
+        predicted[:, step] = pred_return
+        # Przesunięcie okna o jeden krok w miejscu: najstarszy zwrot wypada, przewidziany dochodzi na koniec
+        inputs[:, :-1] = inputs[:, 1:]
+        inputs[:, -1] = pred_return
+
+    return predicted
 
-    # 3. Predykcja
-    predicted_returns = []
-    current_input = values[-WINDOW_SIZE:]
 
-    for i in range(horizon):
-        if i > 0 and i % 10 == 0:
-            log(f"[XGBoost] Obliczono dzien {i}/{horizon}...")
+def _predict_direct_batch(model, windows: np.ndarray, horizon: int) -> np.ndarray:
+    """
+    Tryb bezpośredni: wszystkie okna w jednym wywołaniu (B x WINDOW_SIZE -> B x horizon zwrotów).
+    Log-wzrost między krokami kotwicznymi interpolowany liniowo (stałe tempo w przedziale).
+    """
+    inputs = np.array(windows, dtype=np.float32, ndmin=2)
+    anchors = np.concatenate(([0], _direct_anchors(horizon)))
+    predicted = np.asarray(model.get_booster().inplace_predict(inputs), dtype=float).reshape(len(inputs), -1)
+    at_anchors = np.hstack([np.zeros((len(inputs), 1)), predicted])
+
+    steps = np.arange(1, horizon + 1)
+    upper = np.searchsorted(anchors, steps)
+    lower = upper - 1
+    weight = (steps - anchors[lower]) / (anchors[upper] - anchors[lower])
+    log_growth = at_anchors[:, lower] + weight * (at_anchors[:, upper] - at_anchors[:, lower])
+
+    step_returns = np.expm1(np.diff(log_growth, axis=1, prepend=0.0))
+    return np.clip(step_returns, -0.15, 0.15)
 
-        pred_return = model.predict(current_input.reshape(1, -1))[0]
-        pred_return = np.clip(pred_return, -0.15, 0.15)
 
-        predicted_returns.append(pred_return)
-        current_input = np.append(current_input[1:], pred_return)
+def _predict_returns(model, window: np.ndarray, horizon: int) -> np.ndarray:
+    return _predict_returns_batch(model, window[None, :], horizon)[0]
 
-    # 4. Rekonstrukcja
-    log("[XGBoost] Rekonstrukcja cen z przewidzianych zwrotow...")
 
-    last_price = series.iloc[-1]
-    predicted_prices = []
-    current_price = last_price
+def _returns_to_prices(last_price, predicted_returns: np.ndarray) -> np.ndarray:
+    # Zwroty przycięte do +-15%, więc ceny pozostają dodatnie; maximum jak dawne zabezpieczenie
+    last_price = np.asarray(last_price, dtype=float)
+    growth = np.cumprod(1 + np.asarray(predicted_returns, dtype=float), axis=-1)
+    return np.maximum(last_price[..., None] * growth, 0)
 
-    for ret in predicted_returns:
-        next_price = current_price * (1 + ret)
-        if next_price < 0: next_price = 0
-        predicted_prices.append(next_price)
-        current_price = next_price
 
-    log("[XGBoost] Zakonczono sukcesem. Zwracam wynik.")
+def forecast_xgboost_strategy(series: pd.Series, horizon: int, mode: str = "recursive") -> pd.Series:
+    """
+    Strategia XGBoost (Returns Regression). Bez emotikon.
+    mode='recursive' - jeden krok naprzód, predykcje wracają na wejście (horizon wywołań).
+    mode='direct' - jeden model wielowyjściowy przewiduje od razu wszystkie kroki z tego samego okna
+                    (log-wzrost w krokach kotwicznych, reszta interpolowana).
+    """
+
+    # Diagnostyka na poziomie DEBUG - przy LOG_LEVEL=INFO to samo porównanie poziomu, bez formatowania i zapisu
+    logger.debug("[XGBoost] Uruchamiam metode. Horyzont: %s dni.", horizon)
+
+    if xgb is None:
+        logger.error("[XGBoost] BLAD: Brak biblioteki 'xgboost'. Zainstaluj ja: pip install xgboost")
+        return pd.Series([series.iloc[-1]] * horizon)
+
+    # 1. Przygotowanie danych
+    returns = series.pct_change().dropna()
+
+    direct = mode == "direct"
+    min_returns = 30 + (horizon if direct else 0)
+    if len(returns) < min_returns:
+        logger.warning("[XGBoost] Za malo danych (%s). Wymagane min. %s. Zwracam linie plaska.", len(returns), min_returns)
+        return pd.Series([series.iloc[-1]] * horizon)
+
+    X, y = _build_direct_training_set(returns.values, horizon) if direct else _build_training_set(returns.values)
+
+    # 2. Trening
+    logger.debug("[XGBoost] Trenowanie modelu (%s) na %s probkach...", mode, len(X))
+    model = _train_model(X, y)
+
+    # 3. Predykcja (inplace_predict) i rekonstrukcja cen
+    window = returns.values[-WINDOW_SIZE:]
+    if direct:
+        predicted_returns = _predict_direct_batch(model, window, horizon)[0]
+    else:
+        predicted_returns = _predict_returns(model, window, horizon)
+    predicted_prices = _returns_to_prices(series.iloc[-1], predicted_returns)
+
+    logger.debug("[XGBoost] Zakonczono sukcesem. Zwracam wynik.")
     return pd.Series(predicted_prices)
 
 
-def get_forecast_method():
-    return {
+def walk_forward_xgboost(series: pd.Series, horizon: int, origins: list, mode: str = "recursive") -> dict:
+    """
+    Backtest przyrostowy: model trenowany raz na danych do najwcześniejszego okna,
+    kolejne okna tylko przesuwają wejście o nowe zwroty (bez ponownego treningu).
+    """
+    if xgb is None:
+        raise ImportError("Brak biblioteki 'xgboost'")
+    if not origins:
+        return {}
+
+    values = series.values.astype(float)
+    if np.isnan(values[:origins[-1] + 1]).any():
+        raise ValueError("Luki (NaN) w danych - wymagane pełne dopasowania")
+
+    # returns[k] = zmiana ceny z k na k+1, więc dla punktu 'i' znamy returns[:i]
+    returns = values[1:] / values[:-1] - 1
+    direct = mode == "direct"
+    if origins[0] < WINDOW_SIZE + 30 + (horizon if direct else 0):
+        raise ValueError("Za malo danych dla najwczesniejszego okna")
+
+    logger.debug("[XGBoost] Backtest przyrostowy (%s): 1 trening zamiast %s.", mode, len(origins))
+    training = returns[:origins[0]]
+    model = _train_model(*(_build_direct_training_set(training, horizon) if direct else _build_training_set(training)))
+
+    # Wszystkie okna backtestu w jednej predykcji wsadowej
+    # (rekurencyjnie: horizon wywołań zamiast horizon x okna; bezpośrednio: jedno wywołanie)
+    origins = np.asarray(origins)
+    windows = np.lib.stride_tricks.sliding_window_view(returns, WINDOW_SIZE)[origins - WINDOW_SIZE]
+    predicted = _predict_direct_batch(model, windows, horizon) if direct else _predict_returns_batch(model, windows, horizon)
+    paths = _returns_to_prices(values[origins], predicted)
+
+    return dict(zip(origins.tolist(), paths))
+
+
+# Metadane bez importu xgboost (rejestr czyta je przez ast, funkcje ładuje przy pierwszym użyciu)
+METHOD_META = [
+    {
         "key": "xgboost_strategy",
         "name": "XGBoost (ML Regression)",
         "category": "Machine Learning",
-        "forecast": forecast_xgboost_strategy,
         "description": "Deterministyczny model Gradient Boosting z podgladem na zywo.",
-        "color": "#FF8C00"
-    }
\ No newline at end of file
+        "color": "#FF8C00",
+        "max_window": 2000
+    },
+    {
+        "key": "xgboost_direct",
+        "name": "XGBoost (Direct Multi-Horizon)",
+        "category": "Machine Learning",
+        "params": {"mode": "direct"},
+        "description": "Gradient Boosting wielowyjściowy: wszystkie kroki horyzontu z jednego okna, "
+                       "bez sprzężenia zwrotnego predykcji.",
+        "color": "#FFB74D",
+        "max_window": 2000
+    }
+]
+
+
+def get_forecast_method():
+    return [{**meta, "forecast": forecast_xgboost_strategy, "walk_forward": walk_forward_xgboost}
+            for meta in METHOD_META]
@@ -7,11 +7,35 @@ class ForecastRequest(BaseModel):
     horizon: int = 7
     indicators: List[str] = []
     interval: str = "1day"
+    since: Optional[int] = None  # czas [s] ostatniej świeczki po stronie klienta: historia i wskaźniki od tej chwili
+    max_window: Optional[int] = None  # nadpisanie okna treningowego metod (liczba świeczek, 0 = cała seria)
+    downsample: Optional[int] = None  # nadpisanie przerzedzania starszych danych (co która świeczka)
+
+class BatchForecastRequest(BaseModel):
+    tickers: List[str] = []  # pusta lista = wszystkie symbole z selected_assets.csv
+    method_keys: List[str]
+    intervals: List[str] = ["1day"]
+    horizon: int = 7
+    indicators: List[str] = []
+    max_window: Optional[int] = None
+    downsample: Optional[int] = None
+
+class BacktestRequest(BaseModel):
+    ticker: str
+    method_keys: List[str]
+    interval: str = "1day"
+    horizon: int = 7
+    windows: int = 100  # liczba punktów startowych (najnowsze, dla których znamy pełny horyzont)
+    stride: int = 1  # odstęp między punktami startowymi [świeczki]
+    mode: str = "auto"  # auto | walk_forward | refit (pełne dopasowania, pasma -> coverage)
+    max_window: Optional[int] = None
+    downsample: Optional[int] = None
 
 class ForecastResult(BaseModel):
     method_name: str
     forecast_values: Dict[str, float]
     confidence_score: Optional[float] = None  # <--- [DODAJ TO POLE]
+    bands: Optional[Dict[str, Dict[str, float]]] = None  # kwantyle ścieżek (np. p5/p95), ten sam format co forecast_values
 
 class IndicatorSeriesDef(BaseModel):
     name: str
@@ -32,4 +56,6 @@ class PredictionResponse(BaseModel):
     predictions: List[ForecastResult]
     technical_indicators: List[IndicatorSeriesDef]
     panels: List[ChartPanel]
-    api_usage: Dict[str, Any]
\ No newline at end of file
+    api_usage: Dict[str, Any]
+    since: Optional[int] = None  # ustawione = odpowiedź przyrostowa (tylko świeczki od 'since' włącznie)
+    timings: Optional[Dict[str, float]] = None  # ?timings=1: czas etapów [ms], np. {"fetch": 1.2, "forecast:arima": 840.0, "total": ...}
\ No newline at end of file